@@ -10,9 +10,13 @@ from livekit import rtc
 from livekit.agents import (
     Agent,
     AgentSession,
+    AgentStateChangedEvent,
     JobContext,
     JobProcess,
+    ConversationItemAddedEvent,
     MetricsCollectedEvent,
+    UserInputTranscribedEvent,
+    UserStateChangedEvent,
     WorkerOptions,
     cli,
     metrics,
@@ -51,7 +55,9 @@ print("🔧 MONKEY PATCHES COMPLETE!")
 
 # import your custom plugins
 from plugins.stt_faster_whisper import create as create_stt  # Using local Faster Whisper
+from plugins.stt_faster_whisper import prewarm as prewarm_stt
 from plugins.tts_fallback import create as create_tts  # TTS with fallback: Edge → Flite
+from plugins.tts_fallback import prewarm as prewarm_tts
 from latency_monitor import LatencyMonitor  # Latency tracking
 from custom_audio_input import CustomAudioInput  # Accept SOURCE_UNKNOWN tracks
 
@@ -59,11 +65,14 @@ from custom_audio_input import CustomAudioInput  # Accept SOURCE_UNKNOWN tracks
 from app.core.agent_api_client import AgentAPIClient
 
 # ✅ Intake flow engine
-from app.core.intake_flow import load_schema, get_next_question
+from app.core.intake_flow import load_schema, get_next_question, static_prompts
 
 
 logger = logging.getLogger("agent")
 
+GREETING = "Hello! I'm ready to talk. Please speak now."
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "app/core/intake_schema.json")
+
 # Global cleanup flag for graceful shutdown
 _shutting_down = False
 
@@ -85,6 +94,14 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
+def intake_language(detected: str | None) -> str:
+    """
+    Map the STT's detected language to an intake prompt language (en/ur).
+    Whisper often labels spoken Urdu as Hindi, so both use the Urdu prompts.
+    """
+    return "ur" if detected in ("ur", "hi") else "en"
+
+
 class Assistant(Agent):
     def __init__(self, intake_schema=None, api_client=None, ctx_proc_userdata=None) -> None:
         # Build dynamic instructions based on intake mode
@@ -102,6 +119,10 @@ class Assistant(Agent):
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # Load the Whisper model once per process; jobs share it
+    prewarm_stt()
+    # Render the greeting and intake prompts in the background (or load them from disk)
+    prewarm_tts([GREETING, *static_prompts(load_schema(SCHEMA_PATH))])
 
 
 async def entrypoint(ctx: JobContext):
@@ -115,9 +136,8 @@ async def entrypoint(ctx: JobContext):
     api_client = AgentAPIClient(tenant_id=tenant_id)
 
     # ✅ Load intake schema
-    schema_path = os.path.join(os.path.dirname(__file__), "app/core/intake_schema.json")
-    intake_schema = load_schema(schema_path)
-    logger.info(f"✅ [INTAKE] Loaded schema from {schema_path}")
+    intake_schema = load_schema(SCHEMA_PATH)
+    logger.info(f"✅ [INTAKE] Loaded schema from {SCHEMA_PATH}")
 
     # ✅ Create a DB session as soon as we start (safe try/catch so agent never breaks)
     try:
@@ -139,8 +159,9 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"Using Ollama model: {ollama_model}")
 
     # Build session with STT, LLM, TTS
+    stt = create_stt()  # Local Faster Whisper (streaming, interim transcripts)
     session = AgentSession(
-        stt=create_stt(),  # Local Faster Whisper
+        stt=stt,
         llm=openai.LLM.with_ollama(model=ollama_model),
         tts=create_tts(),  # TTS with fallback: Zonos (primary) → Edge → Flite
         vad=ctx.proc.userdata["vad"],
@@ -150,23 +171,24 @@ async def entrypoint(ctx: JobContext):
 
     # ✅ HOOKS FOR STT + LLM OUTPUT + LATENCY TRACKING
 
-    @session.on("user_started_speaking")
-    def _on_user_started_speaking():
-        latency_monitor.on_user_started_speaking()
-
-    @session.on("user_stopped_speaking")
-    def _on_user_stopped_speaking():
-        latency_monitor.on_user_stopped_speaking()
-
-    @session.on("transcript_received")
-    def _on_transcript(transcript):
-        if transcript.text.strip():
-            logger.info(f"✅ [STT] Transcript: {transcript.text}")
-            latency_monitor.on_transcript_received(transcript.text)
+    @session.on("user_state_changed")
+    def _on_user_state_changed(ev: UserStateChangedEvent):
+        if ev.new_state == "speaking":
+            latency_monitor.on_user_started_speaking()
+        elif ev.old_state == "speaking":
+            latency_monitor.on_user_stopped_speaking()
+        # Reuse the session VAD's speech regions and finalize the transcript at end of turn
+        stt.on_user_state_changed(ev.old_state, ev.new_state)
+
+    @session.on("user_input_transcribed")
+    def _on_transcript(transcript: UserInputTranscribedEvent):
+        if transcript.is_final and transcript.transcript.strip():
+            logger.info(f"✅ [STT] Transcript: {transcript.transcript}")
+            latency_monitor.on_transcript_received(transcript.transcript)
 
             # ✅ Save user transcript to DB (safe)
             try:
-                api_client.append_transcript(f"USER: {transcript.text}")
+                api_client.append_transcript(f"USER: {transcript.transcript}")
             except Exception as e:
                 logger.error(f"❌ [DB] Failed to append USER transcript: {e}")
 
@@ -175,7 +197,7 @@ async def entrypoint(ctx: JobContext):
                 # Step 1: Save user's answer if we were expecting one
                 current_key = ctx.proc.userdata.get("intake_current_key")
                 if current_key and current_key != "confirm":
-                    user_answer = transcript.text.strip()
+                    user_answer = transcript.transcript.strip()
                     logger.info(f"✅ [INTAKE] Saving answer for '{current_key}': {user_answer}")
                     api_client.save_answer(current_key, user_answer)
 
@@ -184,7 +206,9 @@ async def entrypoint(ctx: JobContext):
                 logger.info(f"✅ [INTAKE] Fetched collected_data: {list(collected_data.keys())}")
 
                 # Step 3: Determine next action
-                result = get_next_question(collected_data, intake_schema, language="en")
+                result = get_next_question(
+                    collected_data, intake_schema, language=intake_language(stt.detected_language)
+                )
 
                 if result["action"] == "ask":
                     logger.info(f"✅ [INTAKE] Next question: {result['key']} - {result['prompt']}")
@@ -192,29 +216,34 @@ async def entrypoint(ctx: JobContext):
                     ctx.proc.userdata["intake_current_key"] = result["key"]
                     ctx.proc.userdata["intake_mode"] = "ask"
                     ctx.proc.userdata["intake_next_prompt"] = result["prompt"]
+                    # Short yes/no/enum/number answers can use the fast STT model
+                    stt.set_expected_answer(result["field"].get("type"))
                 elif result["action"] == "confirm":
                     logger.info(f"✅ [INTAKE] Ready to confirm: {result['prompt']}")
                     ctx.proc.userdata["intake_current_key"] = "confirm"
                     ctx.proc.userdata["intake_mode"] = "confirm"
                     ctx.proc.userdata["intake_next_prompt"] = result["prompt"]
+                    stt.set_expected_answer("boolean")
                 else:
                     logger.info(f"✅ [INTAKE] Intake complete, switching to RAG mode")
                     ctx.proc.userdata["intake_current_key"] = None
                     ctx.proc.userdata["intake_mode"] = "rag"
                     ctx.proc.userdata["intake_next_prompt"] = None
+                    stt.set_expected_answer(None)
 
             except Exception as e:
                 logger.error(f"❌ [INTAKE] Error in intake flow: {e}")
 
-    @session.on("response_received")
-    def _on_response(response):
-        if response.text.strip():
-            logger.info(f"✅ [LLM] Response: {response.text}")
-            latency_monitor.on_llm_response_received(response.text)
+    @session.on("conversation_item_added")
+    def _on_response(ev: ConversationItemAddedEvent):
+        text = ev.item.text_content if ev.item.role == "assistant" else None
+        if text and text.strip():
+            logger.info(f"✅ [LLM] Response: {text}")
+            latency_monitor.on_llm_response_received(text)
 
             # ✅ Save agent response to DB (safe)
             try:
-                api_client.append_transcript(f"AGENT: {response.text}")
+                api_client.append_transcript(f"AGENT: {text}")
             except Exception as e:
                 logger.error(f"❌ [DB] Failed to append AGENT transcript: {e}")
 
@@ -226,16 +255,17 @@ async def entrypoint(ctx: JobContext):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
 
-    @session.on("agent_started_speaking")
-    def _on_agent_started_speaking():
-        logger.info("✅ [TTS] Agent started speaking")
-        latency_monitor.on_tts_started()
-        latency_monitor.on_agent_started_speaking()
-
-    @session.on("agent_stopped_speaking")
-    def _on_agent_stopped_speaking():
-        latency_monitor.on_tts_completed()
-        latency_monitor.on_agent_stopped_speaking()
+    @session.on("agent_state_changed")
+    def _on_agent_state_changed(ev: AgentStateChangedEvent):
+        if ev.new_state == "speaking":
+            logger.info("✅ [TTS] Agent started speaking")
+            latency_monitor.on_tts_started()
+            latency_monitor.on_agent_started_speaking()
+        elif ev.old_state == "speaking":
+            latency_monitor.on_tts_completed()
+            latency_monitor.on_agent_stopped_speaking()
+        # Lets the STT tell a barge-in from an ordinary turn
+        stt.on_agent_state_changed(ev.old_state, ev.new_state)
 
     async def cleanup_session():
         """Clean up session resources on disconnect"""
@@ -339,9 +369,8 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"✅ Agent session started! Listening to: {first_participant.identity}")
 
     # Send initial greeting so user knows agent is ready
-    initial_greeting = "Hello! I'm ready to talk. Please speak now."
-    logger.info(f"Sending greeting: {initial_greeting}")
-    await session.say(initial_greeting, allow_interruptions=True)
+    logger.info(f"Sending greeting: {GREETING}")
+    await session.say(GREETING, allow_interruptions=True)
 
     # Chat message handler
     @ctx.room.on("data_received")
@@ -423,5 +452,8 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            # prewarm loads Silero, Whisper and Zonos and, on a host's first
+            # start, calibrates Whisper; the 10 s default kills it half way
+            initialize_process_timeout=float(os.getenv("AGENT_PREWARM_TIMEOUT", "120")),
         )
     )
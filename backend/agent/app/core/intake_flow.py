@@ -132,6 +132,28 @@ def _format_confirmation(schema: Schema, collected_data: CollectedData, language
     return template.format_map(SafeDict(**collected_data))
 
 
+def static_prompts(schema: Schema) -> List[str]:
+    """
+    Every fixed prompt the flow can ask, in both languages, so the TTS can
+    render them ahead of time. Prompts with placeholders (the confirmation)
+    depend on the answers and are left out.
+    """
+    fields: List[Dict[str, Any]] = list(schema.get("fields", []) or [])
+    for rule in schema.get("conditional_rules", []) or []:
+        if isinstance(rule, dict):
+            fields.extend(rule.get("fields", []) or [])
+
+    out: List[str] = []
+    for f in fields + [schema.get("confirmation", {}) or {}]:
+        if not isinstance(f, dict):
+            continue
+        for lang_key in ("prompt_en", "prompt_ur"):
+            prompt = f.get(lang_key)
+            if prompt and "{" not in prompt and prompt not in out:
+                out.append(prompt)
+    return out
+
+
 def get_next_question(
     collected_data: Union[CollectedData, None],
     schema: Schema,
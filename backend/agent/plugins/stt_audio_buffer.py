@@ -0,0 +1,158 @@
+"""
+Audio accumulation for the Whisper STT stream.
+
+AudioRingBuffer keeps the current utterance as 16 kHz mono float32 in one
+preallocated array. Incoming frames are downmixed and scaled straight into the
+buffer, so there is no per-frame array, no final concatenation and no separate
+int16 -> float32 pass before decoding. The array is reused across turns and
+its size is capped: past `max_seconds` the oldest audio is dropped.
+
+The streaming recognizer asks RecognizeStream for 16 kHz input, so livekit's
+band-limited resampler has already run on its frames. Frames at another rate
+(the one-shot recognize path) go through an rtc.AudioResampler here; naive
+interpolation would alias everything above 8 kHz into the speech band.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+_INT16_SCALE = 1.0 / 32768.0
+
+
+class AudioRingBuffer:
+    """
+    Growable, capped float32 buffer holding the current utterance at 16 kHz.
+
+    Positions are absolute sample indices since the start of the utterance, so
+    dropping old audio from the front does not shift timestamps.
+    """
+
+    def __init__(self, sample_rate: int = 16000, initial_seconds: float = 10.0, max_seconds: float = 120.0):
+        self._sample_rate = sample_rate
+        self._max_samples = int(max_seconds * sample_rate)
+        self._buffer = np.zeros(int(initial_seconds * sample_rate), dtype=np.float32)
+        self._head = 0  # array index of the first live sample
+        self._tail = 0  # array index past the last live sample
+        self._origin = 0  # absolute index of array position 0
+        self._readers = 0
+        self._resampler: Optional[rtc.AudioResampler] = None
+        self._resampler_format = None  # (input rate, channels) of _resampler
+        self._overflow_logged = False
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    @property
+    def start(self) -> int:
+        """Absolute index of the oldest retained sample."""
+        return self._origin + self._head
+
+    @property
+    def end(self) -> int:
+        """Absolute index one past the newest sample."""
+        return self._origin + self._tail
+
+    def push(self, frame: rtc.AudioFrame) -> int:
+        """Downmix, resample if needed and append a frame. Returns samples written."""
+        if frame.sample_rate == self._sample_rate:
+            return self._append(frame)
+
+        audio_format = (frame.sample_rate, frame.num_channels)
+        if self._resampler_format != audio_format:
+            self.flush()
+            self._resampler = rtc.AudioResampler(
+                frame.sample_rate,
+                self._sample_rate,
+                num_channels=frame.num_channels,
+                quality=rtc.AudioResamplerQuality.HIGH,
+            )
+            self._resampler_format = audio_format
+        return sum(self._append(f) for f in self._resampler.push(frame))
+
+    def flush(self) -> int:
+        """Append the audio still held by the resampler. Returns samples written."""
+        resampler, self._resampler, self._resampler_format = self._resampler, None, None
+        if resampler is None:
+            return 0
+        return sum(self._append(f) for f in resampler.flush())
+
+    def _append(self, frame: rtc.AudioFrame) -> int:
+        pcm = np.frombuffer(frame.data, dtype=np.int16)
+        n = len(pcm) // frame.num_channels
+        dest = self._reserve(n)
+        if frame.num_channels > 1:
+            np.mean(pcm[:n * frame.num_channels].reshape(n, frame.num_channels), axis=1, dtype=np.float32, out=dest)
+            dest *= _INT16_SCALE
+        else:
+            np.multiply(pcm, _INT16_SCALE, out=dest, casting="unsafe")
+        self._tail += n
+        return n
+
+    def view(self, start: Optional[int] = None) -> np.ndarray:
+        """
+        Zero-copy view of the audio from absolute index `start` to the end.
+        Hold pinned() while another thread reads the view.
+        """
+        begin = self._head if start is None else min(max(start - self._origin, self._head), self._tail)
+        return self._buffer[begin:self._tail]
+
+    @contextmanager
+    def pinned(self):
+        """Keep views valid: while pinned, compaction moves to a fresh array."""
+        self._readers += 1
+        try:
+            yield
+        finally:
+            self._readers -= 1
+
+    def drop_before(self, position: int):
+        """Release audio before absolute index `position`."""
+        self._head = min(max(self._head, position - self._origin), self._tail)
+
+    def reset(self, keep_from: Optional[int] = None):
+        """
+        Start a new utterance. Audio from absolute index `keep_from` on (pushed
+        while the previous turn was being finalized) is kept and renumbered to
+        start at 0.
+        """
+        if keep_from is None:
+            self._head = self._tail = 0
+            self._origin = 0
+            self._resampler = self._resampler_format = None
+        else:
+            self.drop_before(keep_from)
+            self._origin = -self._head
+        self._overflow_logged = False
+
+    def _reserve(self, n: int) -> np.ndarray:
+        """Return a writable slice of n samples at the tail, making room as needed."""
+        overflow = len(self) + n - self._max_samples
+        if overflow > 0:
+            # Cap memory for very long utterances by dropping the oldest audio
+            self._head += min(overflow, len(self))
+            if not self._overflow_logged:
+                logger.warning(
+                    f"STT buffer exceeded {self._max_samples / self._sample_rate:.0f}s, dropping oldest audio"
+                )
+                self._overflow_logged = True
+
+        if self._tail + n > len(self._buffer):
+            live = len(self)
+            capacity = len(self._buffer)
+            if live + n > capacity // 2:
+                capacity = min(max(capacity * 2, live + n), 2 * self._max_samples + n)
+            if capacity != len(self._buffer) or self._readers:
+                new_buffer = np.zeros(capacity, dtype=np.float32)
+                new_buffer[:live] = self._buffer[self._head:self._tail]
+                self._buffer = new_buffer
+            else:
+                self._buffer[:live] = self._buffer[self._head:self._tail]
+            self._origin += self._head
+            self._head, self._tail = 0, live
+
+        return self._buffer[self._tail:self._tail + n]
@@ -0,0 +1,110 @@
+"""
+Chunk-parallel decoding of long utterances.
+
+Decoding time grows with audio length, so a long answer finalized in one call
+makes the turn latency grow with speaking time. Past a threshold the final
+window is instead cut at its quietest points into chunks of a few seconds,
+the chunks are decoded concurrently on a bounded pool, and the words are
+stitched back in order. Each chunk is decoded with a little overlap on both
+sides so no word is cut in half; every word is kept only by the chunk that
+owns its midpoint, and a word repeated right at a seam is dropped.
+"""
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Energy is measured over 20 ms frames when looking for a pause
+_FRAME = 320
+
+
+@dataclass
+class AudioChunk:
+    start: int  # first sample decoded
+    end: int  # one past the last sample decoded
+    keep_from: float  # seconds; words whose midpoint falls in [keep_from, keep_to)
+    keep_to: float  # belong to this chunk
+
+
+def find_pause(audio: np.ndarray, lo: int, hi: int) -> int:
+    """Sample index at the centre of the quietest frame in audio[lo:hi]."""
+    n = (hi - lo) // _FRAME
+    if n < 1:
+        return (lo + hi) // 2
+    frames = audio[lo:lo + n * _FRAME].reshape(n, _FRAME)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return lo + int(np.argmin(energy)) * _FRAME + _FRAME // 2
+
+
+def split_at_pauses(
+    audio: np.ndarray,
+    *,
+    chunk_seconds: float = 8.0,
+    overlap: float = 0.5,
+    search: float = 1.5,
+    sample_rate: int = 16000,
+) -> List[AudioChunk]:
+    """
+    Cut `audio` into roughly equal chunks of at most about `chunk_seconds`,
+    moving each cut to the quietest point within `search` seconds.
+    """
+    total = len(audio)
+    count = max(1, math.ceil(total / (chunk_seconds * sample_rate)))
+    cuts = [0]
+    reach = int(search * sample_rate)
+    for i in range(1, count):
+        target = i * total // count
+        lo = max(cuts[-1] + reach, target - reach)
+        hi = min(total - reach, target + reach)
+        cuts.append(find_pause(audio, lo, hi) if hi > lo else target)
+    cuts.append(total)
+
+    pad = int(overlap * sample_rate)
+    return [
+        AudioChunk(
+            start=max(0, begin - pad),
+            end=min(total, end + pad),
+            keep_from=begin / sample_rate if i else -math.inf,
+            keep_to=end / sample_rate if i < count - 1 else math.inf,
+        )
+        for i, (begin, end) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+def stitch(chunks: Sequence[AudioChunk], words: Sequence[list]) -> list:
+    """
+    Merge per-chunk word lists (times relative to the whole audio) into one
+    ordered list without the words decoded twice in the overlaps.
+    """
+    merged = []
+    for chunk, chunk_words in zip(chunks, words):
+        owned = [w for w in chunk_words if chunk.keep_from <= (w.start + w.end) / 2 < chunk.keep_to]
+        # A word straddling the cut can be placed on both sides of it
+        if merged and owned and _normalize(merged[-1].text) == _normalize(owned[0].text) \
+                and owned[0].start - merged[-1].start < 0.5:
+            owned = owned[1:]
+        merged.extend(owned)
+    return merged
+
+
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers: int) -> ThreadPoolExecutor:
+    """Process-wide pool that bounds how many chunks decode at once."""
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="whisper-chunk"
+            )
+        return executor
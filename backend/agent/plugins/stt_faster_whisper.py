@@ -1,28 +1,253 @@
 from faster_whisper import WhisperModel
-from livekit.agents.stt import STT, STTCapabilities, SpeechEvent, SpeechEventType
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.stt import RecognizeStream, STT, STTCapabilities, SpeechData, SpeechEvent, SpeechEventType
+from livekit.agents.types import NOT_GIVEN, NotGivenOr
 from livekit import rtc
-from typing import AsyncIterator
+from dataclasses import dataclass, replace
+from typing import List, Optional
+from concurrent.futures import Executor
 import asyncio
+import functools
+import logging
+import re
+import time
+import weakref
 import numpy as np
-import io
-import wave
 import soundfile as sf
 
+from plugins.stt_audio_buffer import AudioRingBuffer
+from plugins.stt_chunking import get_executor, split_at_pauses, stitch
+from plugins.stt_local_agreement import LocalAgreement, TimedWord, join_words
+from plugins.stt_segment_feed import SegmentFeed
+from plugins.stt_whisper_batcher import WhisperBatchScheduler, get_scheduler
+from plugins.stt_model_swap import control_file, read_control_file, watch_control_file
+from plugins.stt_whisper_models import (
+    ModelHandle, acquire, activate_default, active_models, release, remote_handle,
+)
+from plugins.stt_whisper_profile import WhisperProfile, calibrate, get_profile, resolve_profile
+from plugins.stt_whisper_server import WhisperServerPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+# Whisper always interprets its input as 16 kHz mono
+WHISPER_SAMPLE_RATE = 16000
+
 
 class FasterWhisperSTT(STT):
-    def __init__(self, model_size: str = "base", device: str = "cpu"):
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: str = "auto",
+        compute_type: Optional[str] = None,
+        *,
+        interim_interval: float = 0.5,
+        max_window: float = 15.0,
+        max_buffer: float = 120.0,
+        batching: bool = False,
+        batch_size: int = 8,
+        batch_wait: float = 0.03,
+        speech_pad: float = 0.2,
+        vad_start_lag: float = 0.1,
+        vad_end_lag: float = 0.55,
+        language: Optional[str] = None,
+        language_threshold: float = 0.8,
+        small_model_size: Optional[str] = None,
+        short_utterance: float = 1.5,
+        short_answer_max: float = 5.0,
+        server: Optional[List[str]] = None,
+        parallel_after: float = 12.0,
+        chunk_seconds: float = 8.0,
+        chunk_workers: Optional[int] = None,
+        no_speech_threshold: float = 0.6,
+        logprob_threshold: float = -1.0,
+        compression_threshold: float = 2.4,
+        min_confidence: float = 0.4,
+    ):
+        """
+        Args:
+            model_size: Whisper model size (tiny, base, small, medium, large)
+            device: Device to run on ('cuda', 'cpu' or 'auto' to pick from the
+                hardware, see stt_whisper_profile)
+            compute_type: CTranslate2 compute type (default: float16 on cuda, int8 on cpu)
+            interim_interval: Seconds of new audio between interim decodes
+            max_window: Longest audio window (seconds) re-decoded per interim pass
+            max_buffer: Cap (seconds) on audio buffered for a single utterance
+            batching: Decode final transcripts through the process-wide batch scheduler
+            batch_size: Most utterances per batch when batching
+            batch_wait: Seconds a batch waits for other sessions to join
+            speech_pad: Seconds of audio kept around each VAD speech region
+            vad_start_lag: How long after speech onset the VAD reports it
+            vad_end_lag: How long after speech ends the VAD reports it
+                (the VAD's min_silence_duration)
+            language: Decode language; None detects it on the first confident utterance
+            language_threshold: Detection probability needed to pin the language
+            small_model_size: Optional fast model for short utterances and
+                yes/no, enum or numeric answers (e.g. 'tiny'); None disables tiering
+            short_utterance: Utterances up to this many seconds use the small model
+            short_answer_max: Same limit while a short-answer question is pending
+            server: Socket addresses of STT server processes (see
+                stt_whisper_server); when set, models are not loaded in this
+                process and decoding goes to the least loaded server
+            parallel_after: Final windows longer than this (seconds) are split
+                at pauses and decoded chunk-parallel
+            chunk_seconds: Target chunk length for parallel decoding
+            chunk_workers: Chunks decoded at once per process (default: the
+                profile's num_workers). With an explicit device it also sets the
+                model's num_workers; with 'auto' it is capped by the profile's.
+                Below 2, finals are never split
+            no_speech_threshold: Segments above this no_speech_prob (and below
+                logprob_threshold) are treated as silence
+            logprob_threshold: See no_speech_threshold
+            compression_threshold: Segments more compressible than this are
+                treated as repetition hallucinations
+            min_confidence: Finals with a lower mean word probability are dropped
+        """
         super().__init__(
             capabilities=STTCapabilities(
-                streaming=False,  # Changed to False - buffer and process at end
-                interim_results=False
+                streaming=True,
+                interim_results=True
             )
         )
-        # use _whisper instead of self.model (conflicts with STT base class)
-        compute_type = "float16" if device == "cuda" else "int8"
-        self._whisper = WhisperModel(model_size, device=device, compute_type=compute_type)
+        # Models are shared by every job in this process (see stt_whisper_models)
+        pool = get_pool(server) if server else None
+        self.profile: Optional[WhisperProfile] = (
+            None if pool else resolve_profile(device, compute_type, num_workers=chunk_workers)
+        )
+
+        # A model swap earlier in this process's life takes precedence
+        def handle(size: str) -> ModelHandle:
+            return remote_handle(size) if pool is not None else self.profile.handle(size)
+
+        activate_default("large", lambda: handle(model_size))
+        if small_model_size:
+            activate_default("small", lambda: handle(small_model_size))
+
+        self._router = ModelRouter(
+            remote=pool,
+            batching=batching,
+            batch_size=batch_size,
+            batch_wait=batch_wait,
+            short_utterance=short_utterance,
+            short_answer_max=short_answer_max,
+        )
+        self._interim_interval = interim_interval
+        self._max_window = max_window
+        self._max_buffer = max_buffer
+        self._speech_pad = speech_pad
+        self._vad_start_lag = vad_start_lag
+        self._vad_end_lag = vad_end_lag
+        if self.profile is not None:
+            # CTranslate2 runs at most num_workers decodes of a model at once;
+            # extra chunk threads would only queue behind them
+            chunk_workers = min(chunk_workers or self.profile.num_workers, self.profile.num_workers)
+        elif chunk_workers is None:
+            chunk_workers = 2
+        if chunk_workers < 2:
+            # Chunks would decode one after another, slower than one decode of the window
+            logger.info("Whisper model has a single worker, chunk-parallel finals disabled")
+            parallel_after = float("inf")
+        self._parallel_after = parallel_after
+        self._chunk_seconds = chunk_seconds
+        self._chunk_executor = get_executor(chunk_workers)
+        # Shared by every stream of this STT, i.e. by the whole room
+        self._language = RoomLanguage(language, language_threshold)
+        self._quality = TranscriptFilter(
+            no_speech_threshold=no_speech_threshold,
+            logprob_threshold=logprob_threshold,
+            compression_threshold=compression_threshold,
+            min_confidence=min_confidence,
+        )
+        self._streams = weakref.WeakSet()
+        # Follows AgentSession's agent state, see on_agent_state_changed
+        self._agent_speaking = False
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "FasterWhisperStream":
+        stream = FasterWhisperStream(
+            self,
+            self._router,
+            conn_options=conn_options,
+            interim_interval=self._interim_interval,
+            max_window=self._max_window,
+            max_buffer=self._max_buffer,
+            speech_pad=self._speech_pad,
+            vad_start_lag=self._vad_start_lag,
+            vad_end_lag=self._vad_end_lag,
+            language=self._language,
+            quality=self._quality,
+            parallel_after=self._parallel_after,
+            chunk_seconds=self._chunk_seconds,
+            chunk_executor=self._chunk_executor,
+        )
+        self._streams.add(stream)
+        return stream
+
+    @property
+    def suppressed_turns(self) -> int:
+        """Finals dropped as silence or hallucination since this STT was created."""
+        return self._quality.suppressed_turns
+
+    @property
+    def detected_language(self) -> Optional[str]:
+        """Language pinned for this room, or None until a confident detection."""
+        return self._language.language
+
+    def set_expected_answer(self, answer_type: Optional[str]) -> None:
+        """
+        Tell the router what kind of answer the next utterance should be: the
+        `type` of the intake field being asked (None outside the intake flow).
+        """
+        self._router.expected_type = answer_type
 
-    def stream(self) -> "FasterWhisperStream":
-        return FasterWhisperStream(self._whisper)
+    def on_start_of_speech(self) -> None:
+        """Record a speech onset reported by the agent's VAD on every open stream."""
+        for stream in list(self._streams):
+            stream.mark_speech_start()
+
+    def on_barge_in(self) -> None:
+        """
+        The user started talking over the agent: abort interim decodes in
+        flight on every stream, their hypotheses are stale.
+        """
+        for stream in list(self._streams):
+            stream.abort_decodes()
+
+    def on_end_of_speech(self) -> None:
+        """
+        Finalize every open stream. Called when the agent's VAD reports that the
+        user stopped speaking; only the not-yet-committed tail is decoded, so the
+        final transcript follows end-of-speech closely.
+        """
+        for stream in list(self._streams):
+            stream.mark_speech_end()
+            try:
+                stream.flush()
+            except RuntimeError:
+                # Input already ended or stream closed
+                pass
+
+    def on_user_state_changed(self, old_state: str, new_state: str) -> None:
+        """
+        Follow AgentSession's `user_state_changed` event, which the session VAD
+        drives. Entering "speaking" opens a voiced region (so silence is
+        trimmed from decodes), and is a barge-in while the agent is speaking;
+        leaving it closes the region and ends the turn. The STT is streaming,
+        so livekit does not wrap it in a VAD StreamAdapter that would flush it.
+        """
+        if new_state == "speaking" and old_state != "speaking":
+            if self._agent_speaking:
+                self.on_barge_in()
+            self.on_start_of_speech()
+        elif old_state == "speaking" and new_state != "speaking":
+            self.on_end_of_speech()
+
+    def on_agent_state_changed(self, old_state: str, new_state: str) -> None:
+        """Follow AgentSession's `agent_state_changed` event to detect barge-in."""
+        self._agent_speaking = new_state == "speaking"
 
     async def _recognize_impl(self, audio_file, *, language: str = None, conn_options=None) -> SpeechEvent:
         """
@@ -30,10 +255,11 @@ class FasterWhisperSTT(STT):
         """
         # Handle different input types
         if isinstance(audio_file, rtc.AudioFrame):
-            # It's an AudioFrame object - extract raw audio data
-            audio_array = np.frombuffer(audio_file.data, dtype=np.int16)
-            # Convert to float32 and normalize
-            audio_data = audio_array.astype(np.float32) / 32768.0
+            # It's an AudioFrame object - downmix and resample to 16 kHz float32
+            buffer = AudioRingBuffer(WHISPER_SAMPLE_RATE, initial_seconds=audio_file.duration)
+            buffer.push(audio_file)
+            buffer.flush()
+            audio_data = buffer.view()
         elif hasattr(audio_file, 'read'):
             # It's a file-like object, read the audio data
             audio_data, sample_rate = sf.read(audio_file)
@@ -48,115 +274,710 @@ class FasterWhisperSTT(STT):
         else:
             raise ValueError(f"Unsupported audio_file type: {type(audio_file)}")
 
-        # Run transcription in executor to avoid blocking
-        loop = asyncio.get_event_loop()
+        # Decode entirely on a worker thread; segments are handed back one by one
         kwargs = {}
+        language = language or self._language.language
         if language:
             kwargs['language'] = language
 
-        segments, _ = await loop.run_in_executor(
-            None,
-            lambda: self._whisper.transcribe(audio_data, **kwargs)
-        )
-
-        # Combine all segments into final text
-        final_text = " ".join([seg.text for seg in segments]).strip()
+        tier = self._router.acquire(len(audio_data) / WHISPER_SAMPLE_RATE)
+        try:
+            # Word probabilities give the same confidence the streaming finals use
+            feed = tier.feed(audio_data, word_timestamps=True, **kwargs)
+            segments = await feed.collect()
+        finally:
+            tier.release()
+        self._language.observe(feed.info)
+        if not language and feed.info is not None:
+            language = feed.info.language
 
-        # Create a proper alternative object with required attributes
-        class Alternative:
-            def __init__(self, text, language):
-                self.text = text
-                self.language = language
-                self.confidence = 1.0  # Faster Whisper doesn't provide confidence
-                self.speaker_id = None  # No speaker diarization
+        # Combine the trustworthy segments into final text
+        segments = [seg for seg in segments if not self._quality.rejects(seg)]
+        final_text = " ".join([seg.text.strip() for seg in segments]).strip()
+        confidence = self._quality.confidence(_words_from_segments(segments, 0.0))
+        if final_text and self._quality.suppress(final_text, confidence):
+            final_text = ""
 
-        # Return a SpeechEvent object
         return SpeechEvent(
             type=SpeechEventType.FINAL_TRANSCRIPT,
-            alternatives=[Alternative(final_text, language or 'en')]
+            alternatives=[SpeechData(
+                language=language or self._language.language or 'en',
+                text=final_text,
+                confidence=confidence,
+            )]
         )
 
 
-class FasterWhisperStream:
+# Intake field types whose answers are a word or two
+SHORT_ANSWER_TYPES = {"boolean", "enum", "number"}
+
+
+@dataclass
+class ModelTier:
+    """The model one turn decodes with, pinned until release()."""
+    role: str  # "large" or "small"
+    name: str
+    model: Optional[WhisperModel] = None
+    scheduler: Optional[WhisperBatchScheduler] = None
+    remote: Optional[WhisperServerPool] = None  # decode on STT server processes instead
+    handle: Optional[ModelHandle] = None
+
+    def release(self) -> None:
+        """Let a swapped-out model unload once every turn using it is done."""
+        if self.handle is not None:
+            release(self.handle)
+            self.handle = None
+
+    def feed(self, audio: np.ndarray, *, executor: Optional[Executor] = None, **options):
+        """Start an off-loop decode; returns a SegmentFeed (or its remote equivalent)."""
+        if self.remote is not None:
+            return self.remote.feed(self.name, audio, **options)
+        return SegmentFeed(functools.partial(self.model.transcribe, audio, **options), executor=executor)
+
+
+class ModelRouter:
     """
-    Buffers audio frames and transcribes on end of speech.
+    Picks the Whisper model for an utterance. Short utterances, and answers to
+    yes/no, enum or numeric intake questions, go to the small model; longer
+    free-text answers go to the large one.
+
+    The models behind the roles come from the process registry and can be
+    swapped at runtime (see stt_model_swap).
     """
-    def __init__(self, whisper: WhisperModel):
-        self._whisper = whisper
-        self._queue = asyncio.Queue()
-        self._closed = False
-        self._sample_rate = 16000
-        self._num_channels = 1
-        self._audio_frames = []
 
-    def __aiter__(self):
-        return self
+    def __init__(
+        self,
+        *,
+        remote: Optional[WhisperServerPool] = None,
+        batching: bool = False,
+        batch_size: int = 8,
+        batch_wait: float = 0.03,
+        short_utterance: float = 1.5,
+        short_answer_max: float = 5.0,
+    ):
+        self.expected_type: Optional[str] = None
+        self._remote = remote
+        self._batching = batching
+        self._batch_size = batch_size
+        self._batch_wait = batch_wait
+        self._short_utterance = short_utterance
+        self._short_answer_max = short_answer_max
 
-    async def __anext__(self) -> SpeechEvent:
-        if self._closed and self._queue.empty():
-            raise StopAsyncIteration
+    def role(self, duration: float) -> str:
+        if "small" not in active_models():
+            return "large"
+        if self.expected_type in SHORT_ANSWER_TYPES:
+            limit = self._short_answer_max
+        else:
+            limit = self._short_utterance
+        return "small" if duration <= limit else "large"
+
+    def acquire(self, duration: float, role: Optional[str] = None) -> ModelTier:
+        """Pin the model for an utterance of `duration` seconds (or for `role`)."""
+        role = role or self.role(duration)
+        handle = acquire(role)
+        if handle is None and role != "large":
+            # The small model was switched off since role() looked
+            role, handle = "large", acquire("large")
+        if handle is None:
+            raise RuntimeError("No Whisper model is active")
+        if self._remote is not None:
+            return ModelTier(role, handle.name, remote=self._remote, handle=handle)
+        scheduler = (
+            get_scheduler(handle.model, max_batch_size=self._batch_size, max_wait=self._batch_wait)
+            if self._batching else None
+        )
+        return ModelTier(role, handle.name, handle.model, scheduler, handle=handle)
+
+
+class RoomLanguage:
+    """
+    Decode language for a room. Until pinned, faster-whisper detects the
+    language on every call; once a detection is confident enough it is pinned
+    and later decodes skip the detection pass.
+    """
+
+    def __init__(self, language: Optional[str] = None, threshold: float = 0.8):
+        self.language = language
+        self.probability = 1.0 if language else 0.0
+        self._threshold = threshold
+
+    def observe(self, info) -> None:
+        """Feed a TranscriptionInfo; pins the language on a confident detection."""
+        if self.language is not None or info is None:
+            return
+        if info.language_probability >= self._threshold:
+            self.language = info.language
+            self.probability = info.language_probability
+            logger.info(f"Pinned STT language '{self.language}' (p={self.probability:.2f})")
+
+    def current(self, info=None) -> str:
+        """Best known language code for an event, '' if unknown."""
+        if self.language:
+            return self.language
+        return info.language if info is not None else ""
+
+
+# Whisper's usual inventions on noise and silence (subtitle-corpus artifacts)
+KNOWN_HALLUCINATIONS = {
+    "thank you", "thanks for watching", "thank you for watching", "bye",
+    "you", "please subscribe", "subtitles by the amaraorg community",
+}
+
+
+class TranscriptFilter:
+    """
+    Rejects segments Whisper produced from noise, using the same signals as its
+    own fallback logic, and drops whole finals that are not trustworthy enough
+    to start an LLM turn. Shared by the streams of one STT.
+    """
+
+    def __init__(
+        self,
+        *,
+        no_speech_threshold: float = 0.6,
+        logprob_threshold: float = -1.0,
+        compression_threshold: float = 2.4,
+        min_confidence: float = 0.4,
+    ):
+        self._no_speech_threshold = no_speech_threshold
+        self._logprob_threshold = logprob_threshold
+        self._compression_threshold = compression_threshold
+        self._min_confidence = min_confidence
+        self.suppressed_turns = 0
+
+    def rejects(self, segment) -> bool:
+        """True for a segment that is silence or a repetition loop."""
+        if segment.no_speech_prob > self._no_speech_threshold and segment.avg_logprob < self._logprob_threshold:
+            return True
+        return segment.compression_ratio > self._compression_threshold
+
+    @staticmethod
+    def confidence(words: List[TimedWord]) -> float:
+        """
+        Mean word probability, 0.0 for no words. The one metric every final is
+        scored with, streamed or not, so min_confidence means the same on both.
+        """
+        return sum(w.probability for w in words) / len(words) if words else 0.0
+
+    def suppress(self, text: str, confidence: float) -> bool:
+        """Decide whether a final should be dropped; counts the dropped ones."""
+        normalized = re.sub(r"[^\w ]", "", text.lower()).strip()
+        # A stock phrase needs more evidence than an ordinary answer
+        threshold = 0.7 if normalized in KNOWN_HALLUCINATIONS else self._min_confidence
+        if confidence >= threshold:
+            return False
+        self.suppressed_turns += 1
+        logger.info(
+            f"Suppressed low-confidence final {text!r} (confidence={confidence:.2f}, "
+            f"suppressed_turns={self.suppressed_turns})"
+        )
+        return True
+
+
+def _words_from_segments(segments, offset: float, quality: Optional[TranscriptFilter] = None) -> List[TimedWord]:
+    words = []
+    for seg in segments:
+        if quality is not None and quality.rejects(seg):
+            continue
+        for w in seg.words or []:
+            words.append(TimedWord(w.start + offset, w.end + offset, w.word, w.probability))
+    return words
+
+
+class VoicedWindow:
+    """
+    Audio handed to Whisper plus the map from its timeline back to utterance
+    time. Voiced spans are laid back to back, so the silence between them is
+    never decoded.
+    """
+
+    def __init__(self, audio: np.ndarray, spans: List[tuple]):
+        self.audio = audio
+        # (absolute start sample, length) of each span, in order
+        self._spans = spans
+
+    @property
+    def offset(self) -> float:
+        return self._spans[0][0] / WHISPER_SAMPLE_RATE if self._spans else 0.0
+
+    def to_seconds(self, t: float) -> float:
+        """Map a time in the decoded audio to seconds since the utterance start."""
+        position = int(t * WHISPER_SAMPLE_RATE)
+        for start, length in self._spans:
+            if position < length:
+                return (start + position) / WHISPER_SAMPLE_RATE
+            position -= length
+        start, length = self._spans[-1]
+        return (start + length + position) / WHISPER_SAMPLE_RATE
+
+    def remap(self, words: List[TimedWord]) -> List[TimedWord]:
+        return [replace(w, start=self.to_seconds(w.start), end=self.to_seconds(w.end)) for w in words]
+
+
+class FasterWhisperStream(RecognizeStream):
+    """
+    Streaming recognizer: re-decodes a sliding window of the current utterance
+    while the user is talking and emits interim transcripts stabilized with
+    LocalAgreement. On flush only the uncommitted tail is decoded for the final.
 
+    Follows the RecognizeStream contract: frames and flush markers arrive on
+    `_input_ch` and are consumed by `_run`, events go out on `_event_ch`.
+    Nothing polls; the task sleeps until input arrives. Decodes run as
+    separate tasks so input keeps flowing into the ring buffer meanwhile.
+    """
+    def __init__(
+        self,
+        stt: STT,
+        router: ModelRouter,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        max_queued_frames: int = 500,
+        max_pending_events: int = 8,
+        interim_interval: float = 0.5,
+        max_window: float = 15.0,
+        max_buffer: float = 120.0,
+        speech_pad: float = 0.2,
+        vad_start_lag: float = 0.1,
+        vad_end_lag: float = 0.55,
+        language: Optional[RoomLanguage] = None,
+        quality: Optional[TranscriptFilter] = None,
+        parallel_after: float = 12.0,
+        chunk_seconds: float = 8.0,
+        chunk_executor: Optional[Executor] = None,
+    ):
+        # RecognizeStream resamples input to 16 kHz with livekit's high-quality resampler
+        super().__init__(stt=stt, conn_options=conn_options, sample_rate=WHISPER_SAMPLE_RATE)
+        self._router = router
+        # Model tier of the current utterance, picked on its first decode
+        self._tier: Optional[ModelTier] = None
+        self._language = language or RoomLanguage()
+        self._quality = quality or TranscriptFilter()
+        # Frames waiting in _input_ch beyond this are dropped (flushes never are)
+        self._max_queued_frames = max_queued_frames
+        self._dropped_frames = 0
+        # Interim events are dropped while this many events are unread. Counted
+        # from what the consumer actually took: RecognizeStream tees _event_ch,
+        # so its qsize() says nothing about the consumer
+        self._max_pending_events = max_pending_events
+        self._unread_events = 0
+        self._dropped_interims = 0
+        # 16 kHz float32, downmixed as frames arrive and reused across turns
+        self._buffer = AudioRingBuffer(WHISPER_SAMPLE_RATE, max_seconds=max(max_buffer, max_window))
+        self._interim_samples = int(interim_interval * WHISPER_SAMPLE_RATE)
+        self._max_window_samples = int(max_window * WHISPER_SAMPLE_RATE)
+        self._samples_since_decode = 0
+        # Bumped on every flush so stale interim results are discarded
+        self._turn = 0
+        self._agreement = LocalAgreement()
+        self._interim_task: Optional[asyncio.Task] = None
+        self._final_tasks = set()
+        self._flush_lock = asyncio.Lock()
+        # Speech regions from the agent's VAD as [start, end] absolute samples
+        # (end is None while the user is still talking)
+        self._regions: List[list] = []
+        self._vad_seen = False
+        self._pad = int(speech_pad * WHISPER_SAMPLE_RATE)
+        self._start_lag = int(vad_start_lag * WHISPER_SAMPLE_RATE)
+        self._end_lag = int(vad_end_lag * WHISPER_SAMPLE_RATE)
+        self._gather = np.zeros(0, dtype=np.float32)
+        self._parallel_samples = int(parallel_after * WHISPER_SAMPLE_RATE)
+        self._chunk_seconds = chunk_seconds
+        self._chunk_executor = chunk_executor
+
+    def push_frame(self, frame: rtc.AudioFrame) -> None:
+        """Queue a frame; it is dropped if the recognizer has fallen far behind."""
+        if self._input_ch.qsize() >= self._max_queued_frames:
+            self._dropped_frames += 1
+            if self._dropped_frames == 1 or self._dropped_frames % 500 == 0:
+                logger.warning(f"STT input queue full, dropped {self._dropped_frames} frames so far")
+            return
+        super().push_frame(frame)
+
+    async def _run(self) -> None:
         try:
-            event = await asyncio.wait_for(self._queue.get(), timeout=0.1)
-            return event
-        except asyncio.TimeoutError:
-            if self._closed:
-                raise StopAsyncIteration
-            # Return to waiting
-            return await self.__anext__()
-
-    async def __aenter__(self):
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.aclose()
-
-    def push_frame(self, frame: rtc.AudioFrame):
-        """Push audio frame to buffer."""
-        # Convert frame data to numpy array
-        audio_data = np.frombuffer(frame.data, dtype=np.int16)
-        self._audio_frames.append(audio_data)
-        self._sample_rate = frame.sample_rate
-        self._num_channels = frame.num_channels
-
-    async def flush(self):
-        """Process accumulated audio and return transcription."""
-        if not self._audio_frames:
+            async for item in self._input_ch:
+                if isinstance(item, self._FlushSentinel):
+                    self._start_final()
+                else:
+                    self._on_frame(item)
+            # End of input: finalize whatever is left before the stream ends
+            self._start_final()
+            while self._final_tasks:
+                await asyncio.wait(set(self._final_tasks))
+        finally:
+            self.abort_decodes(finals=True)
+            if self._tier is not None:
+                self._tier.release()
+                self._tier = None
+
+    async def __anext__(self) -> SpeechEvent:
+        event = await super().__anext__()
+        self._unread_events -= 1
+        return event
+
+    def _emit(self, event: SpeechEvent) -> None:
+        """Send an event; interim ones are dropped while the consumer lags."""
+        if (
+            event.type == SpeechEventType.INTERIM_TRANSCRIPT
+            and self._unread_events >= self._max_pending_events
+        ):
+            # Every interim carries the full text so far, the next one catches up
+            self._dropped_interims += 1
+            return
+        self._unread_events += 1
+        self._event_ch.send_nowait(event)
+
+    def _start_final(self) -> None:
+        task = asyncio.create_task(self._finalize())
+        self._final_tasks.add(task)
+        task.add_done_callback(self._final_tasks.discard)
+
+    def abort_decodes(self, *, finals: bool = False) -> None:
+        """
+        Cancel the interim decode in flight (and with `finals`, final decodes
+        too). The worker stops after the segment it is decoding.
+        """
+        if self._interim_task is not None and not self._interim_task.done():
+            self._interim_task.cancel()
+            # Its hypothesis was built on audio that is no longer relevant
+            self._agreement.discard_tentative()
+        if finals:
+            for task in list(self._final_tasks):
+                task.cancel()
+
+    def _on_frame(self, frame: rtc.AudioFrame) -> None:
+        """Buffer a frame and schedule an interim decode when due."""
+        self._samples_since_decode += self._buffer.push(frame)
+        if (
+            self._samples_since_decode >= self._interim_samples
+            and self._in_speech()
+            and not self._flush_lock.locked()
+            and (self._interim_task is None or self._interim_task.done())
+        ):
+            self._samples_since_decode = 0
+            self._interim_task = asyncio.create_task(self._decode_interim())
+
+    def mark_speech_start(self):
+        """VAD reported speech onset: open a new voiced region."""
+        self._vad_seen = True
+        if self._regions and self._regions[-1][1] is None:
             return
+        start = max(self._buffer.start, self._buffer.end - self._start_lag)
+        self._regions.append([start, None])
+        if len(self._regions) == 1 and not self._agreement.committed:
+            # Leading silence of the turn is never needed again
+            self._buffer.drop_before(start - self._pad)
+
+    def mark_speech_end(self):
+        """VAD reported end of speech: close the open voiced region."""
+        if self._regions and self._regions[-1][1] is None:
+            region = self._regions[-1]
+            region[1] = max(region[0], self._buffer.end - self._end_lag)
 
-        # Concatenate all audio frames
-        audio_array = np.concatenate(self._audio_frames)
+    def _in_speech(self) -> bool:
+        # Without VAD events, assume speech so nothing is ever skipped
+        return not self._vad_seen or bool(self._regions and self._regions[-1][1] is None)
 
-        # Convert to float32 and normalize
-        audio_float = audio_array.astype(np.float32) / 32768.0
+    def _window(self, start_time: float = 0.0) -> Optional[VoicedWindow]:
+        """
+        Voiced audio from start_time on: the VAD regions plus padding, or the
+        whole buffer when no VAD events were seen. A single span is a zero-copy
+        view; hold self._buffer.pinned() while it is in use.
+        """
+        start = max(self._buffer.start, int(start_time * WHISPER_SAMPLE_RATE))
+        end = self._buffer.end
+        if not self._regions:
+            if self._vad_seen or start >= end:
+                return None
+            return VoicedWindow(self._buffer.view(start), [(start, end - start)])
 
-        # Run transcription in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        segments, _ = await loop.run_in_executor(
-            None,
-            self._whisper.transcribe,
-            audio_float
+        spans = []
+        for region_start, region_end in self._regions:
+            span_start = max(start, region_start - self._pad)
+            span_end = min(end, (end if region_end is None else region_end) + self._pad)
+            if span_end <= span_start:
+                continue
+            if spans and span_start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], span_end)
+            else:
+                spans.append([span_start, span_end])
+        if not spans:
+            return None
+
+        if len(spans) == 1:
+            span_start, span_end = spans[0]
+            audio = self._buffer.view(span_start)[:span_end - span_start]
+            return VoicedWindow(audio, [(span_start, span_end - span_start)])
+
+        total = sum(e - s for s, e in spans)
+        if len(self._gather) < total:
+            self._gather = np.zeros(total, dtype=np.float32)
+        audio = self._gather[:total]
+        position = 0
+        for span_start, span_end in spans:
+            length = span_end - span_start
+            audio[position:position + length] = self._buffer.view(span_start)[:length]
+            position += length
+        return VoicedWindow(audio, [(s, e - s) for s, e in spans])
+
+    def _feed(self, audio: np.ndarray, prompt: str, beam_size: int, executor: Optional[Executor] = None) -> SegmentFeed:
+        """
+        Start a word-timestamped decode on the utterance's model tier that runs
+        entirely off the event loop.
+        """
+        return self._tier.feed(
+            audio,
+            executor=executor,
+            beam_size=beam_size,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt or None,
+            # Pinned after the first confident detection: skips language detection
+            language=self._language.language,
         )
 
-        # Collect all text
-        text_parts = [seg.text for seg in segments]
-        if text_parts:
-            final_text = " ".join(text_parts).strip()
-            if final_text:
-                # Send final transcription event
-                event = SpeechEvent(
-                    type=SpeechEventType.FINAL_TRANSCRIPT,
-                    alternatives=[type('obj', (), {'text': final_text})]
+    def _voiced_seconds(self) -> float:
+        """Speech duration of the current utterance so far."""
+        if not self._regions:
+            return len(self._buffer) / WHISPER_SAMPLE_RATE
+        end = self._buffer.end
+        return sum((end if e is None else e) - s for s, e in self._regions) / WHISPER_SAMPLE_RATE
+
+    def _select_tier(self) -> ModelTier:
+        """Model for the current turn; it stays pinned until the turn ends."""
+        role = self._router.role(self._voiced_seconds())
+        if self._tier is not None:
+            if role == self._tier.role or self._tier.role == "large":
+                # Never downgrade within an utterance
+                return self._tier
+            # Outgrew the small model: start over so the large one decodes it all
+            logger.debug(f"Utterance outgrew '{self._tier.name}', switching to the large model")
+            self._agreement.reset()
+            self._tier.release()
+        self._tier = self._router.acquire(0.0, role)
+        return self._tier
+
+    def _prompt(self, window: VoicedWindow) -> str:
+        """
+        Committed text that ends before the window, so the seam stays coherent.
+        Words whose audio is in the window are left out: prompted with them,
+        Whisper tends to skip that speech rather than transcribe it again.
+        """
+        before = [w for w in self._agreement.committed if w.end <= window.offset]
+        return join_words(before)[-200:]
+
+    async def _decode_interim(self):
+        if not len(self._buffer):
+            return
+        turn = self._turn
+        try:
+            self._select_tier()
+            with self._buffer.pinned():
+                window = self._window()
+                if window is None:
+                    return
+                feed = self._feed(window.audio, self._prompt(window), 1)
+                try:
+                    words = window.remap(_words_from_segments(await feed.collect(), 0.0, self._quality))
+                finally:
+                    feed.cancel()
+                self._language.observe(feed.info)
+        except Exception as e:
+            logger.warning(f"Interim decode failed: {e}")
+            return
+
+        # A flush may have finalized the utterance while we were decoding
+        if turn != self._turn:
+            return
+
+        self._agreement.insert(words)
+        text = join_words(self._agreement.committed + self._agreement.tentative)
+        if text:
+            self._emit(SpeechEvent(
+                type=SpeechEventType.INTERIM_TRANSCRIPT,
+                alternatives=[SpeechData(language=self._language.current(feed.info), text=text)],
+            ))
+        self._trim_committed_audio()
+
+    async def _decode_tail(self, window: VoicedWindow, committed: List[TimedWord]) -> tuple:
+        """
+        Decode the final tail off-loop, publishing each segment as an interim
+        transcript the moment it is decoded so downstream work can start early.
+        Returns (words, TranscriptionInfo).
+        """
+        tail: List[TimedWord] = []
+        feed = self._feed(window.audio, self._prompt(window), 5)
+        try:
+            async for segment in feed:
+                tail.extend(window.remap(_words_from_segments([segment], 0.0, self._quality)))
+                text = join_words(committed + self._agreement.strip_committed(tail))
+                if text:
+                    self._emit(SpeechEvent(
+                        type=SpeechEventType.INTERIM_TRANSCRIPT,
+                        alternatives=[SpeechData(language=self._language.current(feed.info), text=text)],
+                    ))
+        finally:
+            feed.cancel()
+        return tail, feed.info
+
+    async def _decode_chunked(self, window: VoicedWindow) -> tuple:
+        """
+        Decode a long final window as chunks split at pauses, concurrently, and
+        stitch the words back in order. Returns (words, TranscriptionInfo).
+        """
+        chunks = split_at_pauses(window.audio, chunk_seconds=self._chunk_seconds)
+        language = self._language.language
+
+        async def decode(index: int, chunk) -> tuple:
+            audio = window.audio[chunk.start:chunk.end]
+            offset = chunk.start / WHISPER_SAMPLE_RATE
+            if self._tier.scheduler is not None:
+                # Submitted together, so the scheduler batches the chunks
+                result = await self._tier.scheduler.transcribe(
+                    audio, beam_size=5, word_timestamps=True, language=language
                 )
-                await self._queue.put(event)
+                return _words_from_segments(result.segments, offset, self._quality), result.info
+            # Only the first chunk follows committed text; later ones cannot wait for it
+            feed = self._feed(audio, self._prompt(window) if index == 0 else "", 5, self._chunk_executor)
+            try:
+                return _words_from_segments(await feed.collect(), offset, self._quality), feed.info
+            finally:
+                feed.cancel()
 
-        # Clear buffer
-        self._audio_frames.clear()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(decode(i, chunk) for i, chunk in enumerate(chunks)))
+        logger.debug(
+            f"Decoded {len(window.audio) / WHISPER_SAMPLE_RATE:.1f}s as {len(chunks)} chunks "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        words = stitch(chunks, [chunk_words for chunk_words, _ in results])
+        info = next((i for _, i in results if i is not None), None)
+        return window.remap(words), info
 
-    async def aclose(self):
-        """Close the stream and process any remaining audio."""
-        await self.flush()
-        self._closed = True
+    def _trim_committed_audio(self):
+        """Drop committed audio from the front once the window grows too long."""
+        if len(self._buffer) > self._max_window_samples:
+            self._buffer.drop_before(int(self._agreement.committed_end * WHISPER_SAMPLE_RATE))
+
+    async def _finalize(self):
+        """Decode the uncommitted tail and emit the final transcription."""
+        async with self._flush_lock:
+            if self._interim_task is not None:
+                # Waits without raising, even if the decode failed or was aborted
+                await asyncio.wait([self._interim_task])
+                self._interim_task = None
+
+            if not len(self._buffer):
+                return
+
+            committed = list(self._agreement.committed)
+            # Audio pushed while decoding belongs to the next utterance
+            end = self._buffer.end
+            try:
+                self._select_tier()
+                with self._buffer.pinned():
+                    window = self._window(self._agreement.committed_end)
+
+                    info = None
+                    if window is None:
+                        tail = []
+                    elif len(window.audio) > self._parallel_samples:
+                        # Long uncommitted tail: keep latency flat by decoding chunks in parallel
+                        tail, info = await self._decode_chunked(window)
+                    elif self._tier.scheduler is not None:
+                        # Batched with the other sessions ending their turns right now
+                        result = await self._tier.scheduler.transcribe(
+                            window.audio, beam_size=5, word_timestamps=True, language=self._language.language
+                        )
+                        tail = window.remap(_words_from_segments(result.segments, 0.0, self._quality))
+                        info = result.info
+                    else:
+                        tail, info = await self._decode_tail(window, committed)
+                self._language.observe(info)
+
+                words = committed + self._agreement.strip_committed(tail)
+                final_text = join_words(words)
+                confidence = self._quality.confidence(words)
+                # Noise turned into "Thank you." must not start an LLM turn
+                if final_text and not self._quality.suppress(final_text, confidence):
+                    # Send final transcription event
+                    event = SpeechEvent(
+                        type=SpeechEventType.FINAL_TRANSCRIPT,
+                        alternatives=[SpeechData(
+                            language=self._language.current(info), text=final_text, confidence=confidence
+                        )]
+                    )
+                    self._emit(event)
+            except Exception as e:
+                # The turn is dropped: merging its audio and words into the
+                # next turn would corrupt that transcript too
+                logger.error(f"Final decode failed, dropping the turn: {e}", exc_info=True)
+            finally:
+                self._end_turn(end)
+
+    def _end_turn(self, end: int) -> None:
+        """Reset per-turn state, keeping only the audio pushed after `end`."""
+        # Reuse the buffer for the next turn
+        self._buffer.reset(keep_from=end)
+        self._samples_since_decode = len(self._buffer)
+        self._turn += 1
+        if self._tier is not None:
+            self._tier.release()
+            self._tier = None
+        self._agreement.reset()
+        self._regions = [
+            [max(0, r[0] - end), None if r[1] is None else max(0, r[1] - end)]
+            for r in self._regions
+            if r[1] is None or r[1] > end
+        ]
+
+
+def _config_from_env() -> dict:
+    import os
+    config = {
+        "model_size": os.getenv("FASTER_WHISPER_MODEL", "base"),
+        "small_model_size": os.getenv("FASTER_WHISPER_SMALL_MODEL") or None,
+        "device": os.getenv("FASTER_WHISPER_DEVICE", "auto"),
+        "compute_type": os.getenv("FASTER_WHISPER_COMPUTE_TYPE"),
+        "server": [a for a in os.getenv("FASTER_WHISPER_SERVER", "").split(",") if a] or None,
+        "chunk_workers": int(os.getenv("FASTER_WHISPER_CHUNK_WORKERS", "0")) or None,
+    }
+    # Workers started after a runtime swap come up with the swapped-in models
+    control = read_control_file(control_file())
+    if control and control.get("model"):
+        config["model_size"] = control["model"]
+        if "small_model" in control:
+            config["small_model_size"] = control["small_model"]
+    return config
+
+
+def prewarm():
+    """
+    Load and warm the configured Whisper model(s) for this worker process.
+
+    Call from the agent's prewarm() so jobs never pay model load time.
+    """
+    import os
+    config = _config_from_env()
+    if config["server"]:
+        # The STT server processes own the models
+        get_pool(config["server"])
+        activate_default("large", lambda: remote_handle(config["model_size"]))
+        if config["small_model_size"]:
+            activate_default("small", lambda: remote_handle(config["small_model_size"]))
+        watch_control_file()
+        return
+    if config["device"] == "auto" and get_profile() is None:
+        # Time candidate configurations on this machine; loads the winning model
+        calibrate(config["model_size"], float(os.getenv("FASTER_WHISPER_TARGET_RTF", "0.3")))
+    # Same num_workers as create() will ask for, so the preloaded model is the one used
+    profile = resolve_profile(config["device"], config["compute_type"], num_workers=config["chunk_workers"])
+    activate_default("large", lambda: profile.handle(config["model_size"]))
+    if config["small_model_size"]:
+        activate_default("small", lambda: profile.handle(config["small_model_size"]))
+    # Admin-triggered model swaps (scripts/swap_stt_model.py)
+    watch_control_file(profile=profile)
 
 
 # Entry point for LiveKit Agent
@@ -164,13 +985,90 @@ def create():
     """
     Create Faster Whisper STT with environment-based configuration.
 
+    The model itself comes from the process-level registry, so after prewarm()
+    this is cheap and every job shares the same weights.
+
     Environment variables:
-    - FASTER_WHISPER_DEVICE: cuda or cpu (default: cuda)
+    - FASTER_WHISPER_DEVICE: cuda, cpu or auto (default: auto; prewarm then
+      calibrates device, compute type and threads on this machine)
+    - FASTER_WHISPER_TARGET_RTF: real-time factor the auto profile aims for (default: 0.3)
+    - FASTER_WHISPER_PROFILE_CACHE: calibration results shared by the processes
+      on this host and across restarts (default: /tmp/faster-whisper-profile.json)
+    - FASTER_WHISPER_CALIBRATION_AUDIO: clip to calibrate on (default: synthetic)
     - FASTER_WHISPER_MODEL: tiny, base, small, medium, large (default: base)
     - FASTER_WHISPER_COMPUTE_TYPE: float16, int8, etc (default: auto)
+    - FASTER_WHISPER_INTERIM_INTERVAL: seconds between interim decodes (default: 0.5)
+    - FASTER_WHISPER_MAX_WINDOW: max seconds re-decoded per interim pass (default: 15)
+    - FASTER_WHISPER_MAX_BUFFER: max seconds buffered per utterance (default: 120)
+    - FASTER_WHISPER_BATCHING: batch final decodes across sessions (default: false)
+    - FASTER_WHISPER_BATCH_SIZE: max utterances per batch (default: 8)
+    - FASTER_WHISPER_BATCH_WAIT_MS: batching window in milliseconds (default: 30)
+    - FASTER_WHISPER_SPEECH_PAD_MS: padding kept around VAD speech regions (default: 200)
+    - FASTER_WHISPER_SMALL_MODEL: fast model for short answers, e.g. tiny (default: off)
+    - FASTER_WHISPER_SHORT_UTTERANCE: seconds routed to the small model (default: 1.5)
+    - FASTER_WHISPER_SHORT_ANSWER_MAX: same, during yes/no/enum/number questions (default: 5)
+    - FASTER_WHISPER_LANGUAGE: fixed decode language (default: detect, then pin)
+    - FASTER_WHISPER_LANGUAGE_THRESHOLD: detection probability that pins it (default: 0.8)
+    - FASTER_WHISPER_VAD_END_LAG_MS: VAD end-of-speech delay, i.e. its
+      min_silence_duration (default: 550, the Silero default)
+    - FASTER_WHISPER_PARALLEL_AFTER: final windows longer than this many
+      seconds are decoded as parallel chunks (default: 12)
+    - FASTER_WHISPER_CHUNK_SECONDS: target chunk length (default: 8)
+    - FASTER_WHISPER_CHUNK_WORKERS: chunks decoded at once, and the model's
+      num_workers with an explicit device (default: from profile; 2 otherwise)
+    - FASTER_WHISPER_NO_SPEECH_THRESHOLD / FASTER_WHISPER_LOGPROB_THRESHOLD:
+      segments above the first and below the second count as silence (default: 0.6 / -1.0)
+    - FASTER_WHISPER_COMPRESSION_THRESHOLD: segments above this compression
+      ratio count as hallucinated repetition (default: 2.4)
+    - FASTER_WHISPER_MIN_CONFIDENCE: finals with a lower mean word probability
+      are dropped (default: 0.4)
+    - FASTER_WHISPER_SERVER: comma-separated STT server socket paths, in a
+      directory private to this user; decode out of process instead of
+      loading models here (default: off)
+    - FASTER_WHISPER_SERVER_AUTHKEY: secret shared with the STT servers
+      (required with FASTER_WHISPER_SERVER, no default)
+    - FASTER_WHISPER_CONTROL_FILE: JSON file watched for runtime model swaps;
+      its models override the two above; its directory must be private to this
+      user (default: models.json in the STT runtime directory)
     """
     import os
-    device = os.getenv("FASTER_WHISPER_DEVICE", "cuda")
-    model_size = os.getenv("FASTER_WHISPER_MODEL", "base")
+    interim_interval = float(os.getenv("FASTER_WHISPER_INTERIM_INTERVAL", "0.5"))
+    max_window = float(os.getenv("FASTER_WHISPER_MAX_WINDOW", "15"))
+    max_buffer = float(os.getenv("FASTER_WHISPER_MAX_BUFFER", "120"))
+    batching = os.getenv("FASTER_WHISPER_BATCHING", "false").lower() in ("1", "true", "yes")
+    batch_size = int(os.getenv("FASTER_WHISPER_BATCH_SIZE", "8"))
+    batch_wait = float(os.getenv("FASTER_WHISPER_BATCH_WAIT_MS", "30")) / 1000
+    speech_pad = float(os.getenv("FASTER_WHISPER_SPEECH_PAD_MS", "200")) / 1000
+    vad_end_lag = float(os.getenv("FASTER_WHISPER_VAD_END_LAG_MS", "550")) / 1000
+    language = os.getenv("FASTER_WHISPER_LANGUAGE") or None
+    language_threshold = float(os.getenv("FASTER_WHISPER_LANGUAGE_THRESHOLD", "0.8"))
+    short_utterance = float(os.getenv("FASTER_WHISPER_SHORT_UTTERANCE", "1.5"))
+    short_answer_max = float(os.getenv("FASTER_WHISPER_SHORT_ANSWER_MAX", "5"))
+    parallel_after = float(os.getenv("FASTER_WHISPER_PARALLEL_AFTER", "12"))
+    chunk_seconds = float(os.getenv("FASTER_WHISPER_CHUNK_SECONDS", "8"))
+    no_speech_threshold = float(os.getenv("FASTER_WHISPER_NO_SPEECH_THRESHOLD", "0.6"))
+    logprob_threshold = float(os.getenv("FASTER_WHISPER_LOGPROB_THRESHOLD", "-1.0"))
+    compression_threshold = float(os.getenv("FASTER_WHISPER_COMPRESSION_THRESHOLD", "2.4"))
+    min_confidence = float(os.getenv("FASTER_WHISPER_MIN_CONFIDENCE", "0.4"))
 
-    return FasterWhisperSTT(model_size=model_size, device=device)
+    return FasterWhisperSTT(
+        **_config_from_env(),
+        interim_interval=interim_interval,
+        max_window=max_window,
+        max_buffer=max_buffer,
+        batching=batching,
+        batch_size=batch_size,
+        batch_wait=batch_wait,
+        speech_pad=speech_pad,
+        vad_end_lag=vad_end_lag,
+        language=language,
+        language_threshold=language_threshold,
+        short_utterance=short_utterance,
+        short_answer_max=short_answer_max,
+        parallel_after=parallel_after,
+        chunk_seconds=chunk_seconds,
+        no_speech_threshold=no_speech_threshold,
+        logprob_threshold=logprob_threshold,
+        compression_threshold=compression_threshold,
+        min_confidence=min_confidence,
+    )
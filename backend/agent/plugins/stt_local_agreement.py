@@ -0,0 +1,91 @@
+"""
+LocalAgreement stabilization of sliding-window Whisper hypotheses.
+
+The streaming recognizer re-decodes the current utterance every few hundred
+milliseconds. Each pass produces a hypothesis (timed words); a word is only
+committed - and never changes afterwards - once consecutive hypotheses agree
+on it, so interim transcripts do not flicker and only the unconfirmed tail
+has to be decoded again.
+"""
+import re
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class TimedWord:
+    start: float  # seconds from the start of the utterance
+    end: float
+    text: str
+    probability: float = 1.0
+
+
+def normalize_word(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+def join_words(words: List[TimedWord]) -> str:
+    return "".join(w.text for w in words).strip()
+
+
+class LocalAgreement:
+    """
+    LocalAgreement-n policy for sliding-window decoding.
+
+    A word is committed once `n` consecutive hypotheses agree on it. Committed
+    words never change, so only the unconfirmed tail has to be re-decoded.
+    """
+
+    def __init__(self, n: int = 2):
+        self._n = n
+        self._history: List[List[TimedWord]] = []
+        self.committed: List[TimedWord] = []
+
+    @property
+    def committed_end(self) -> float:
+        return self.committed[-1].end if self.committed else 0.0
+
+    @property
+    def tentative(self) -> List[TimedWord]:
+        return self._history[-1] if self._history else []
+
+    def insert(self, words: List[TimedWord]) -> List[TimedWord]:
+        """Add a new hypothesis and return the words it newly committed."""
+        words = self.strip_committed(words)
+        self._history.append(words)
+        self._history = self._history[-self._n:]
+        if len(self._history) < self._n:
+            return []
+
+        newly_committed = []
+        for candidates in zip(*self._history):
+            if len({normalize_word(w.text) for w in candidates}) != 1:
+                break
+            newly_committed.append(candidates[-1])
+
+        self.committed.extend(newly_committed)
+        # Keep only the unconfirmed tails for the next comparison
+        self._history = [h[len(newly_committed):] for h in self._history]
+        return newly_committed
+
+    def strip_committed(self, words: List[TimedWord]) -> List[TimedWord]:
+        """Drop words of a hypothesis that repeat already-committed audio."""
+        end = self.committed_end
+        words = [w for w in words if w.start >= end - 0.1]
+
+        # Whisper tends to repeat the last committed words at the window start
+        if self.committed and words and abs(words[0].start - end) < 1.0:
+            for n in range(min(5, len(self.committed), len(words)), 0, -1):
+                tail = [normalize_word(w.text) for w in self.committed[-n:]]
+                head = [normalize_word(w.text) for w in words[:n]]
+                if tail == head:
+                    return words[n:]
+        return words
+
+    def discard_tentative(self):
+        """Forget unconfirmed hypotheses; committed words stay."""
+        self._history.clear()
+
+    def reset(self):
+        self._history.clear()
+        self.committed.clear()
@@ -0,0 +1,145 @@
+"""
+Runtime Whisper model swaps.
+
+An operator writes the wanted models to a small JSON control file (see
+backend/scripts/swap_stt_model.py):
+
+    {"model": "small", "small_model": "tiny"}
+
+Every worker process watches that file from a daemon thread. On a change it
+loads the new models in the background, warms them on the calibration clip and
+then activates them in the registry: turns that start afterwards use the new
+models, turns already in progress finish on the old ones, and the old models
+are unloaded once released. No worker restart or drain is needed.
+
+"small_model" may be null to turn routing to a small model off; leaving the key
+out keeps the current small model.
+
+Whoever can write the file picks the models every worker loads, so it lives in
+the same private (0700) runtime directory as the STT server sockets, and a file
+in a directory other users can enter is ignored. A missing, unreadable or
+malformed file is logged and ignored too; it never stops a worker.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from plugins.stt_whisper_models import activate, active_models, remote_handle
+from plugins.stt_whisper_profile import WhisperProfile, calibration_audio
+from plugins.stt_whisper_server import ensure_private_dir, runtime_dir
+
+logger = logging.getLogger(__name__)
+
+_KEEP = object()
+_swap_lock = threading.Lock()
+
+
+def _warm(handle) -> None:
+    """Decode the calibration clip once so the first real turn is not slow."""
+    segments, _ = handle.model.transcribe(
+        calibration_audio(), beam_size=5, language="en", condition_on_previous_text=False
+    )
+    for _ in segments:
+        pass
+
+
+def swap_models(
+    model_size: str,
+    small_model_size=_KEEP,
+    *,
+    profile: Optional[WhisperProfile] = None,
+) -> None:
+    """
+    Load, warm and activate new models. Blocks until they are active, so call
+    it off the event loop. Without a profile (server mode) only the names the
+    STT server is asked for change.
+    """
+    with _swap_lock:
+        start = time.perf_counter()
+        plan = {"large": model_size}
+        if small_model_size is not _KEEP:
+            plan["small"] = small_model_size
+
+        handles = {}
+        for role, size in plan.items():
+            if size is None:
+                handles[role] = None
+            elif profile is None:
+                handles[role] = remote_handle(size)
+            else:
+                handles[role] = profile.handle(size)
+                _warm(handles[role])
+
+        # Everything is loaded: switch all roles together
+        for role, handle in handles.items():
+            activate(role, handle)
+        logger.info(
+            f"Whisper models now {active_models()} "
+            f"(swap took {(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
+
+
+def control_file() -> str:
+    """FASTER_WHISPER_CONTROL_FILE, by default models.json in the private runtime directory."""
+    return os.getenv("FASTER_WHISPER_CONTROL_FILE") or os.path.join(runtime_dir(), "models.json")
+
+
+def read_control_file(path: str) -> Optional[dict]:
+    """The requested models, or None if there is no usable control file."""
+    try:
+        ensure_private_dir(os.path.dirname(os.path.abspath(path)))
+        with open(path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError, RuntimeError) as e:
+        logger.error(f"Ignoring STT control file {path}: {e}")
+        return None
+    if not isinstance(config, dict):
+        logger.error(f"Ignoring STT control file {path}: expected a JSON object")
+        return None
+    return config
+
+
+def watch_control_file(
+    path: Optional[str] = None,
+    *,
+    profile: Optional[WhisperProfile] = None,
+    interval: float = 2.0,
+) -> threading.Thread:
+    """
+    Start a daemon thread that applies the control file whenever it changes.
+    The file's state at start-up counts as already applied.
+    """
+    path = path or control_file()
+
+    def mtime() -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def run():
+        seen = mtime()
+        while True:
+            time.sleep(interval)
+            current = mtime()
+            if current is None or current == seen:
+                continue
+            seen = current
+            try:
+                config = read_control_file(path)
+                if not config or not config.get("model"):
+                    logger.warning(f"Ignoring STT control file {path}: no 'model'")
+                    continue
+                logger.info(f"STT control file changed, swapping to {config}")
+                swap_models(config["model"], config.get("small_model", _KEEP), profile=profile)
+            except Exception as e:
+                logger.error(f"Whisper model swap failed: {e}", exc_info=True)
+
+    thread = threading.Thread(target=run, name="whisper-model-swap", daemon=True)
+    thread.start()
+    return thread
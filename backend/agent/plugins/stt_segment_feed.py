@@ -0,0 +1,91 @@
+"""
+Off-loop consumption of faster-whisper's lazy segment generator.
+
+WhisperModel.transcribe() returns immediately; the actual decoding happens as
+the returned generator is iterated. SegmentFeed iterates it entirely on a
+worker thread and hands each finished segment to the event loop with
+call_soon_threadsafe, so the loop never runs inference and callers can act on
+the first segment while later ones are still being decoded.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+_SEGMENT, _INFO, _ERROR, _DONE = range(4)
+
+
+class SegmentFeed:
+    """
+    Async iterator over the segments of one transcribe() call.
+
+    `info` (language, probability, duration...) is set as soon as the decoder
+    has produced it, before the first segment is yielded.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[], Tuple[Iterable[Any], Any]],
+        *,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            transcribe: Zero-arg callable returning (segments, info), e.g.
+                functools.partial(model.transcribe, audio, beam_size=1)
+            executor: Executor to decode on (default: the loop's default executor)
+        """
+        self.info: Any = None
+        self._transcribe = transcribe
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._cancelled = threading.Event()
+        self._future: Optional[asyncio.Future] = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._future is None:
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._future = loop.run_in_executor(self._executor, self._worker, loop)
+
+        while True:
+            kind, value = await self._queue.get()
+            if kind == _INFO:
+                self.info = value
+            elif kind == _SEGMENT:
+                return value
+            elif kind == _ERROR:
+                raise value
+            else:
+                raise StopAsyncIteration
+
+    def cancel(self):
+        """Stop decoding after the segment currently in progress."""
+        self._cancelled.set()
+
+    async def collect(self) -> list:
+        """Decode everything and return the list of segments."""
+        return [segment async for segment in self]
+
+    def _worker(self, loop: asyncio.AbstractEventLoop):
+        def emit(kind, value=None):
+            try:
+                loop.call_soon_threadsafe(self._queue.put_nowait, (kind, value))
+            except RuntimeError:
+                # Event loop already closed, nobody is listening anymore
+                self._cancelled.set()
+
+        try:
+            segments, info = self._transcribe()
+            emit(_INFO, info)
+            for segment in segments:
+                if self._cancelled.is_set():
+                    break
+                emit(_SEGMENT, segment)
+        except Exception as e:
+            emit(_ERROR, e)
+        finally:
+            emit(_DONE)
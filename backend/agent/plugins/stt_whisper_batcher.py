@@ -0,0 +1,284 @@
+"""
+Cross-session micro-batching for faster-whisper.
+
+Every FasterWhisperStream in a worker process submits its end-of-turn audio
+here instead of launching its own decode. A single scheduler thread gathers the
+requests that arrive within a short window, lays them out back to back and runs
+them as one call to faster-whisper's BatchedInferencePipeline, using
+clip_timestamps so each utterance becomes its own batch element. The segments
+are then routed back to the future of the request they belong to, with their
+times shifted to be relative to that request's audio.
+
+The scheduler is thread based (not asyncio) so it works whether jobs share an
+event loop or run in separate threads of the same process.
+"""
+import asyncio
+import concurrent.futures
+import dataclasses
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Whisper's receptive field; longer utterances are split into several clips
+MAX_CLIP_SECONDS = 30.0
+
+
+@dataclass
+class BatchedTranscript:
+    """Segments for one request; times are relative to the request's audio."""
+    segments: List[Any]
+    info: Any = None  # TranscriptionInfo of the batch
+
+
+@dataclass
+class _Request:
+    audio: np.ndarray
+    options_key: Tuple
+    options: Dict[str, Any]
+    future: concurrent.futures.Future
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    batches: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    last_batch_ms: float = 0.0
+    audio_seconds: float = 0.0
+    decode_seconds: float = 0.0
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def real_time_factor(self) -> float:
+        """Decode seconds spent per second of audio (lower is better)."""
+        return self.decode_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+
+class WhisperBatchScheduler:
+    """Gathers utterances from all sessions in a process into micro-batches."""
+
+    def __init__(self, model: WhisperModel, *, max_batch_size: int = 8, max_wait: float = 0.03):
+        """
+        Args:
+            model: Shared WhisperModel to run the batches on
+            max_batch_size: Most utterances decoded in one batch
+            max_wait: Seconds to wait for more requests after the first arrives
+        """
+        self._pipeline = BatchedInferencePipeline(model=model)
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._pending: Deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._stats = BatchStats()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: np.ndarray, **options) -> concurrent.futures.Future:
+        """
+        Queue 16 kHz float32 audio for transcription.
+
+        Requests are only batched with others that use identical options, and
+        requests without a language are decoded alone: the batched pipeline
+        detects one language for the whole batch.
+        """
+        request = _Request(
+            audio=audio,
+            options_key=tuple(sorted(options.items())),
+            options=options,
+            future=concurrent.futures.Future(),
+        )
+        with self._cond:
+            self._pending.append(request)
+            self._stats.queue_depth = len(self._pending)
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, len(self._pending))
+            self._cond.notify()
+        return request.future
+
+    async def transcribe(self, audio: np.ndarray, **options) -> BatchedTranscript:
+        return await asyncio.wrap_future(self.submit(audio, **options))
+
+    def close(self) -> None:
+        """Stop the scheduler thread once the requests already queued are decoded."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def stats(self) -> BatchStats:
+        with self._cond:
+            return BatchStats(**self._stats.__dict__)
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while True:
+                while not self._pending:
+                    if self._closed:
+                        return []
+                    self._cond.wait()
+
+                # Give other sessions a short window to join this batch
+                deadline = self._pending[0].submitted_at + self._max_wait
+                while len(self._pending) < self._max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # Requests the caller already cancelled are not decoded at all
+                self._pending = deque(r for r in self._pending if not r.future.cancelled())
+                if self._pending:
+                    break
+
+            key = self._pending[0].options_key
+            limit = self._max_batch_size if self._pending[0].options.get("language") else 1
+            batch, rest = [], deque()
+            while self._pending:
+                request = self._pending.popleft()
+                if request.options_key == key and len(batch) < limit:
+                    batch.append(request)
+                else:
+                    rest.append(request)
+            self._pending = rest
+            self._stats.queue_depth = len(self._pending)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                break
+            try:
+                self._decode(batch)
+            except Exception as e:
+                logger.error(f"Batched Whisper decode failed: {e}", exc_info=True)
+                for request in batch:
+                    _resolve(request.future, exception=e)
+
+    def _decode(self, batch: List[_Request]):
+        # Lay the utterances out back to back, one or more clips per request.
+        # collect_chunks slices the audio with the clip bounds, so they are
+        # sample indices, not seconds
+        clips, owners, starts = [], [], []
+        position = 0
+        max_clip = int(MAX_CLIP_SECONDS * SAMPLE_RATE)
+        for index, request in enumerate(batch):
+            starts.append(position)
+            length = len(request.audio)
+            for clip_start in range(0, length, max_clip):
+                clips.append({
+                    "start": position + clip_start,
+                    "end": position + min(length, clip_start + max_clip),
+                })
+                owners.append(index)
+            position += length
+
+        audio = np.concatenate([request.audio for request in batch])
+        started = time.perf_counter()
+        segments, info = self._pipeline.transcribe(
+            audio,
+            clip_timestamps=clips,
+            vad_filter=False,
+            batch_size=len(clips),
+            **batch[0].options,
+        )
+
+        # Segment times are seconds into the batched audio
+        results: List[List[Any]] = [[] for _ in batch]
+        for segment in segments:
+            owner = owners[-1]
+            for clip, clip_owner in zip(clips, owners):
+                if segment.start * SAMPLE_RATE < clip["end"]:
+                    owner = clip_owner
+                    break
+            results[owner].append(_shift(segment, -starts[owner] / SAMPLE_RATE))
+
+        elapsed = time.perf_counter() - started
+        for index, request in enumerate(batch):
+            _resolve(request.future, BatchedTranscript(results[index], info))
+
+        with self._cond:
+            self._stats.requests += len(batch)
+            self._stats.batches += 1
+            self._stats.last_batch_size = len(batch)
+            self._stats.max_batch_size = max(self._stats.max_batch_size, len(batch))
+            self._stats.last_batch_ms = elapsed * 1000
+            self._stats.audio_seconds += len(audio) / SAMPLE_RATE
+            self._stats.decode_seconds += elapsed
+            stats = self._stats
+
+        logger.debug(
+            f"Whisper batch: size={len(batch)} clips={len(clips)} "
+            f"audio={len(audio) / SAMPLE_RATE:.1f}s took={elapsed * 1000:.0f}ms "
+            f"queue_depth={stats.queue_depth} avg_batch={stats.avg_batch_size:.2f} "
+            f"rtf={stats.real_time_factor:.3f}"
+        )
+
+
+def _resolve(future: concurrent.futures.Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    """
+    Complete a request's future unless its caller gave up on it (turn aborted);
+    one cancelled request must not fail the rest of its batch.
+    """
+    if future.done():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        # Cancelled in the meantime
+        pass
+
+
+def _shift(segment, offset: float):
+    """A copy of a faster-whisper Segment with its (and its words') times moved by offset."""
+    words = segment.words
+    if words:
+        words = [dataclasses.replace(w, start=w.start + offset, end=w.end + offset) for w in words]
+    return dataclasses.replace(segment, start=segment.start + offset, end=segment.end + offset, words=words)
+
+
+_schedulers: Dict[int, WhisperBatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: WhisperModel, *, max_batch_size: int = 8, max_wait: float = 0.03) -> WhisperBatchScheduler:
+    """Return the process-wide scheduler for a shared model, starting it if needed."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(model))
+        if scheduler is None:
+            scheduler = WhisperBatchScheduler(model, max_batch_size=max_batch_size, max_wait=max_wait)
+            _schedulers[id(model)] = scheduler
+            logger.info(f"Started Whisper batch scheduler (max_batch_size={max_batch_size}, max_wait={max_wait * 1000:.0f}ms)")
+        return scheduler
+
+
+def drop_scheduler(model: WhisperModel) -> None:
+    """Stop and forget the scheduler of a model that is being unloaded."""
+    with _schedulers_lock:
+        scheduler = _schedulers.pop(id(model), None)
+    if scheduler is not None:
+        scheduler.close()
+
+
+def scheduler_stats() -> Dict[int, BatchStats]:
+    """Stats of every scheduler running in this process."""
+    with _schedulers_lock:
+        return {key: scheduler.stats() for key, scheduler in _schedulers.items()}
@@ -0,0 +1,194 @@
+"""
+Process-level registry of faster-whisper models.
+
+Loading a WhisperModel takes seconds and hundreds of MB of weights, so each
+worker process loads a given (model_size, device, compute_type) once - normally
+from prewarm() - and every job running in that process shares the instance.
+
+Streams do not hold models directly. They acquire the model *active* for a
+role ("large" or "small") at the start of a turn and release it at the end, so
+activate() can switch new turns to another model at any time; the replaced
+model is unloaded once the last turn using it has released it.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import WhisperModel
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+
+class ModelHandle:
+    """A loaded model plus the number of turns currently decoding with it."""
+
+    def __init__(self, key: ModelKey, model: Optional[WhisperModel]):
+        self.key = key
+        self.model = model  # None for models that live in an STT server
+        self.refs = 0
+        self.retired = False
+
+    @property
+    def name(self) -> str:
+        return self.key[0]
+
+
+_models: Dict[ModelKey, ModelHandle] = {}
+# role -> handle new turns should use
+_active: Dict[str, ModelHandle] = {}
+_lock = threading.RLock()
+# One lock per key being loaded, so loads never hold the registry lock
+_loading: Dict[ModelKey, threading.Lock] = {}
+
+
+def resolve_compute_type(device: str, compute_type: Optional[str] = None) -> str:
+    """Pick the default compute type for a device unless one is given."""
+    if compute_type and compute_type != "auto":
+        return compute_type
+    return "float16" if device == "cuda" else "int8"
+
+
+def _warm_up(model: WhisperModel) -> None:
+    """Run one short decode so kernels and allocators are initialized."""
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1, language="en")
+    for _ in segments:
+        pass
+
+
+def _live(key: ModelKey) -> Optional[ModelHandle]:
+    handle = _models.get(key)
+    return handle if handle is not None and not handle.retired else None
+
+
+def get_handle(
+    model_size: str,
+    device: str,
+    compute_type: Optional[str] = None,
+    *,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+) -> ModelHandle:
+    """
+    Return the shared handle for (model_size, device, compute_type), loading
+    and warming the model on first use. cpu_threads and num_workers only apply
+    to that first load.
+    """
+    key = (model_size, device, resolve_compute_type(device, compute_type))
+    with _lock:
+        handle = _live(key)
+        if handle is not None:
+            return handle
+        loading = _loading.setdefault(key, threading.Lock())
+
+    # A background swap loading here must not block turns using other models
+    with loading:
+        with _lock:
+            handle = _live(key)
+            if handle is not None:
+                return handle
+        start = time.perf_counter()
+        model = WhisperModel(
+            model_size, device=key[1], compute_type=key[2],
+            cpu_threads=cpu_threads, num_workers=num_workers,
+        )
+        _warm_up(model)
+        with _lock:
+            handle = _models[key] = ModelHandle(key, model)
+        logger.info(
+            f"Loaded Whisper model {key} in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return handle
+
+
+def get_model(model_size: str, device: str, compute_type: Optional[str] = None, **kwargs) -> WhisperModel:
+    """Shared model for (model_size, device, compute_type); see get_handle()."""
+    return get_handle(model_size, device, compute_type, **kwargs).model
+
+
+def register_model(model_size: str, device: str, compute_type: str, model: WhisperModel) -> ModelHandle:
+    """Adopt an already loaded and warmed model, e.g. the winner of calibration."""
+    key = (model_size, device, resolve_compute_type(device, compute_type))
+    with _lock:
+        handle = _live(key)
+        if handle is None:
+            handle = _models[key] = ModelHandle(key, model)
+        return handle
+
+
+def remote_handle(model_size: str) -> ModelHandle:
+    """Handle for a model that an STT server process loads by name."""
+    return ModelHandle((model_size, "remote", ""), None)
+
+
+def activate(role: str, handle: Optional[ModelHandle]) -> None:
+    """
+    Make `handle` the model new turns of `role` acquire (None disables the
+    role). The model it replaces is unloaded once no turn holds it.
+    """
+    with _lock:
+        old = _active.pop(role, None)
+        if handle is not None:
+            _active[role] = handle
+        if old is not None and old is not handle and old not in _active.values():
+            old.retired = True
+            if old.refs <= 0:
+                _unload(old)
+
+
+def activate_default(role: str, load: Callable[[], Optional[ModelHandle]]) -> None:
+    """
+    activate() the handle `load` returns unless the role is already set, e.g.
+    by an earlier swap. `load` is only called for an unset role, so a model a
+    swap replaced is never loaded. It runs outside the lock: loading can take
+    seconds and must not hold up turns acquiring models.
+    """
+    with _lock:
+        if role in _active:
+            return
+    handle = load()
+    with _lock:
+        if role not in _active and handle is not None:
+            activate(role, handle)
+
+
+def active_models() -> Dict[str, str]:
+    """role -> name of the model new turns use."""
+    with _lock:
+        return {role: handle.name for role, handle in _active.items()}
+
+
+def acquire(role: str) -> Optional[ModelHandle]:
+    """Pin the active model of `role` for one turn; pair with release()."""
+    with _lock:
+        handle = _active.get(role)
+        if handle is not None:
+            handle.refs += 1
+        return handle
+
+
+def release(handle: ModelHandle) -> None:
+    with _lock:
+        handle.refs -= 1
+        if handle.retired and handle.refs <= 0:
+            _unload(handle)
+
+
+def _unload(handle: ModelHandle) -> None:
+    if _models.get(handle.key) is handle:
+        del _models[handle.key]
+    if handle.model is not None:
+        from plugins.stt_whisper_batcher import drop_scheduler
+        drop_scheduler(handle.model)
+        logger.info(f"Unloaded Whisper model {handle.key}")
+    # The weights are freed once the last reference to the model goes away
+    handle.model = None
+
+
+def loaded_models() -> List[ModelKey]:
+    """Keys of every model currently held by this process."""
+    with _lock:
+        return list(_models)
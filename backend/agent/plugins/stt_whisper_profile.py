@@ -0,0 +1,288 @@
+"""
+Hardware-aware configuration of faster-whisper.
+
+With FASTER_WHISPER_DEVICE=auto the device, compute type and CTranslate2
+threading are chosen for the machine the worker runs on instead of coming from
+a hand-tuned env file. detect_profile() is a cheap heuristic based on the CUDA
+devices and the cores this process may use. calibrate() (run from prewarm)
+goes further: it times a short decode for each candidate configuration and
+keeps the first one that reaches the target real-time factor.
+
+Calibration loads every candidate model and takes tens of seconds, so its
+result is cached in FASTER_WHISPER_PROFILE_CACHE (default
+/tmp/faster-whisper-profile.json), keyed by model, target and hardware. The
+first process on a host calibrates under a file lock; the others, and every
+restart, read the cached profile.
+"""
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import WhisperModel
+
+from plugins.stt_whisper_models import ModelHandle, get_handle, register_model, resolve_compute_type
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_SECONDS = 5.0
+
+
+@dataclass
+class WhisperProfile:
+    device: str
+    compute_type: str
+    cpu_threads: int  # CTranslate2 intra-op threads per decode (0 = library default)
+    num_workers: int  # decodes the model can run concurrently
+    cores: int
+    cuda_devices: int
+    rtf: Optional[float] = None  # calibration decode seconds per audio second
+    calibrated: bool = False
+
+    def load(self, model_size: str) -> WhisperModel:
+        """Shared model for this profile (see stt_whisper_models)."""
+        return self.handle(model_size).model
+
+    def handle(self, model_size: str) -> ModelHandle:
+        return get_handle(
+            model_size, self.device, self.compute_type,
+            cpu_threads=self.cpu_threads, num_workers=self.num_workers,
+        )
+
+    def describe(self) -> str:
+        rtf = f" rtf={self.rtf:.3f}" if self.rtf is not None else ""
+        return (
+            f"device={self.device} compute_type={self.compute_type} "
+            f"cpu_threads={self.cpu_threads} num_workers={self.num_workers} "
+            f"(cores={self.cores} cuda_devices={self.cuda_devices}){rtf}"
+        )
+
+
+_profile: Optional[WhisperProfile] = None
+
+
+def get_profile() -> Optional[WhisperProfile]:
+    """The profile chosen in this process, or None before one is resolved."""
+    return _profile
+
+
+def _set_profile(profile: WhisperProfile) -> WhisperProfile:
+    global _profile
+    _profile = profile
+    logger.info(f"Whisper profile: {profile.describe()}")
+    return profile
+
+
+def detect_hardware() -> Tuple[int, int]:
+    """Return (usable CPU cores, CUDA devices)."""
+    try:
+        # Respects taskset / CPU pinning, unlike os.cpu_count()
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        import ctranslate2
+        cuda_devices = ctranslate2.get_cuda_device_count()
+    except Exception:
+        cuda_devices = 0
+    return cores, cuda_devices
+
+
+def _supported_compute_types(device: str) -> set:
+    try:
+        import ctranslate2
+        return set(ctranslate2.get_supported_compute_types(device))
+    except Exception:
+        return set()
+
+
+def _candidates(cores: int, cuda_devices: int) -> List[WhisperProfile]:
+    """Configurations to try, most preferred first."""
+    candidates = []
+    if cuda_devices:
+        supported = _supported_compute_types("cuda")
+        for compute_type in ("float16", "int8_float16", "float32"):
+            if not supported or compute_type in supported:
+                # The GPU does the work; a couple of workers let sessions overlap
+                candidates.append(WhisperProfile("cuda", compute_type, 0, 2, cores, cuda_devices))
+                break
+
+    supported = _supported_compute_types("cpu")
+    compute_type = "int8" if not supported or "int8" in supported else "float32"
+    # Fewest threads first: fewer threads per decode means more concurrent decodes
+    for threads in sorted({max(1, cores // 4), max(1, cores // 2), cores}):
+        candidates.append(WhisperProfile("cpu", compute_type, threads, max(1, cores // threads), cores, cuda_devices))
+    return candidates
+
+
+def detect_profile() -> WhisperProfile:
+    """Heuristic profile without running any decode."""
+    cores, cuda_devices = detect_hardware()
+    if cuda_devices:
+        return WhisperProfile("cuda", resolve_compute_type("cuda"), 0, 2, cores, cuda_devices)
+    threads = max(1, min(4, cores))
+    return WhisperProfile("cpu", resolve_compute_type("cpu"), threads, max(1, cores // threads), cores, cuda_devices)
+
+
+def calibration_audio() -> np.ndarray:
+    """A clip to time decodes on: FASTER_WHISPER_CALIBRATION_AUDIO or synthetic."""
+    path = os.getenv("FASTER_WHISPER_CALIBRATION_AUDIO")
+    if path:
+        from faster_whisper import decode_audio
+        return decode_audio(path, sampling_rate=16000)[:int(CALIBRATION_SECONDS * 16000)]
+    # Amplitude-modulated tones with noise: keeps the decoder busy, unlike silence
+    t = np.arange(int(CALIBRATION_SECONDS * 16000), dtype=np.float32) / 16000
+    rng = np.random.default_rng(0)
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return (audio + 0.02 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _measure(model: WhisperModel, audio: np.ndarray) -> float:
+    """Best-of-two real-time factor of a final-style decode."""
+    best = float("inf")
+    for _ in range(2):
+        start = time.perf_counter()
+        segments, _ = model.transcribe(
+            audio, beam_size=5, language="en", temperature=0.0,
+            condition_on_previous_text=False, max_new_tokens=64,
+        )
+        for _ in segments:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best / (len(audio) / 16000)
+
+
+def _cache_path() -> str:
+    return os.getenv("FASTER_WHISPER_PROFILE_CACHE", "/tmp/faster-whisper-profile.json")
+
+
+@contextmanager
+def _cache_lock(path: str):
+    """Exclusive lock shared by every process calibrating on this host."""
+    try:
+        lock = open(path + ".lock", "a")
+    except OSError as e:
+        logger.warning(f"Whisper profile cache not lockable, calibrating unlocked: {e}")
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable Whisper profile cache {path}: {e}")
+        return {}
+
+
+def _write_cache(path: str, cache: dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not store Whisper profile cache {path}: {e}")
+
+
+def calibrate(model_size: str, target_rtf: float = 0.3) -> WhisperProfile:
+    """
+    Time a decode of `model_size` for each candidate configuration and keep the
+    first that decodes at or below `target_rtf`, or else the fastest. The
+    winning model stays loaded in the registry.
+
+    A profile calibrated earlier on this host (by any process) for the same
+    model, target and hardware is reused without timing anything.
+    """
+    cores, cuda_devices = detect_hardware()
+    key = f"{model_size}|rtf={target_rtf}|cores={cores}|cuda={cuda_devices}"
+    path = _cache_path()
+    with _cache_lock(path):
+        cached = _read_cache(path).get(key)
+        if cached:
+            try:
+                profile = WhisperProfile(**cached)
+            except TypeError as e:
+                logger.warning(f"Ignoring stale Whisper profile cache entry: {e}")
+            else:
+                logger.info("Using cached Whisper calibration")
+                return _set_profile(profile)
+
+        profile = _calibrate(model_size, target_rtf, cores, cuda_devices)
+        if profile.calibrated:
+            cache = _read_cache(path)
+            cache[key] = asdict(profile)
+            _write_cache(path, cache)
+        return _set_profile(profile)
+
+
+def _calibrate(model_size: str, target_rtf: float, cores: int, cuda_devices: int) -> WhisperProfile:
+    audio = calibration_audio()
+    best: Optional[Tuple[WhisperProfile, WhisperModel]] = None
+
+    for candidate in _candidates(cores, cuda_devices):
+        try:
+            model = WhisperModel(
+                model_size, device=candidate.device, compute_type=candidate.compute_type,
+                cpu_threads=candidate.cpu_threads, num_workers=candidate.num_workers,
+            )
+            candidate.rtf = _measure(model, audio)
+        except Exception as e:
+            logger.warning(f"Whisper calibration skipped {candidate.device}/{candidate.compute_type}: {e}")
+            continue
+        candidate.calibrated = True
+        logger.debug(f"Whisper calibration: {candidate.describe()}")
+        if best is None or candidate.rtf < best[0].rtf:
+            best = (candidate, model)
+        if candidate.rtf <= target_rtf:
+            break
+
+    if best is None:
+        logger.warning("Whisper calibration failed for every candidate, using detected profile")
+        return detect_profile()
+
+    profile, model = best
+    if profile.rtf > target_rtf:
+        logger.warning(f"No Whisper configuration reached target RTF {target_rtf}; using the fastest")
+    register_model(model_size, profile.device, profile.compute_type, model)
+    return profile
+
+
+def resolve_profile(
+    device: str, compute_type: Optional[str] = None, *, num_workers: Optional[int] = None
+) -> WhisperProfile:
+    """
+    Profile for a configured device. 'auto' uses the calibrated profile when
+    prewarm ran one, otherwise the heuristic; an explicit device keeps the
+    library's threading defaults with `num_workers` concurrent decodes (default
+    2, so a chunk-parallel final is not serialized inside CTranslate2).
+    """
+    if device == "auto":
+        profile = _profile or _set_profile(detect_profile())
+        if compute_type and compute_type != "auto":
+            profile = replace(profile, compute_type=compute_type)
+        return profile
+    cores, cuda_devices = detect_hardware()
+    return WhisperProfile(
+        device, resolve_compute_type(device, compute_type), 0, num_workers or 2, cores, cuda_devices
+    )
+
+
+def profile_dict() -> Optional[dict]:
+    """get_profile() as a plain dict, e.g. for metrics or health endpoints."""
+    return asdict(_profile) if _profile is not None else None
@@ -0,0 +1,545 @@
+"""
+Out-of-process Whisper inference.
+
+Whisper decoding shares the GIL and the cores with LiveKit's audio plumbing
+when it runs inside the job process. In server mode the models live in one or
+more separate STT server processes instead, which can be pinned to dedicated
+cores:
+
+    FASTER_WHISPER_SERVER_AUTHKEY=... python -m plugins.stt_whisper_server --cpus 4-7
+
+Job processes connect with WhisperServerPool. Audio is not pickled: each client
+owns a shared-memory ring buffer, writes the 16 kHz float32 audio into it and
+only sends (offset, length) over the socket. The server decodes straight from
+that memory and streams every segment back as soon as it is decoded. Each reply
+carries the server's queue depth, which the pool uses to pick the least loaded
+server.
+
+multiprocessing.connection unpickles what it receives, so whoever can connect
+can run code in the server (and whoever binds the socket first can pose as the
+server). Both sides therefore require FASTER_WHISPER_SERVER_AUTHKEY, a shared
+secret with no default, and the socket lives in a directory only this user
+can enter (mode 0700): FASTER_WHISPER_RUNTIME_DIR, by default whisper-stt-<uid>
+under $XDG_RUNTIME_DIR (or the temp directory). A directory that exists but is
+owned by someone else or open to others is refused rather than used.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import stat
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.shared_memory import SharedMemory
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+
+def server_authkey() -> bytes:
+    """The shared secret of the server and its clients; there is deliberately no default."""
+    authkey = os.getenv("FASTER_WHISPER_SERVER_AUTHKEY")
+    if not authkey:
+        raise RuntimeError(
+            "FASTER_WHISPER_SERVER_AUTHKEY is not set; the STT server and its clients need a shared secret"
+        )
+    return authkey.encode()
+
+
+def runtime_dir() -> str:
+    """Private directory for the server sockets and the model control file (not created here)."""
+    configured = os.getenv("FASTER_WHISPER_RUNTIME_DIR")
+    if configured:
+        return configured
+    base = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"whisper-stt-{os.getuid()}")
+
+
+def default_address() -> str:
+    return os.path.join(runtime_dir(), "whisper-stt-0.sock")
+
+
+def ensure_private_dir(path: str, *, create: bool = False) -> None:
+    """
+    Check that `path` is a real directory owned by this user and closed to
+    everyone else (creating it with mode 0700 if asked). Raises otherwise.
+    """
+    if create:
+        try:
+            os.makedirs(path, mode=0o700)
+        except FileExistsError:
+            pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise RuntimeError(f"STT runtime path {path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise RuntimeError(f"STT runtime directory {path} is owned by another user")
+    if st.st_mode & 0o077:
+        raise RuntimeError(
+            f"STT runtime directory {path} is accessible to other users "
+            f"(mode {stat.S_IMODE(st.st_mode):o}); it must be 0700"
+        )
+
+
+def _segment_to_dict(segment) -> dict:
+    return {
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "avg_logprob": segment.avg_logprob,
+        "no_speech_prob": segment.no_speech_prob,
+        "compression_ratio": segment.compression_ratio,
+        "words": [(w.start, w.end, w.word, w.probability) for w in segment.words or []],
+    }
+
+
+def _segment_from_dict(data: dict) -> SimpleNamespace:
+    words = [SimpleNamespace(start=s, end=e, word=w, probability=p) for s, e, w, p in data.pop("words")]
+    return SimpleNamespace(words=words, **data)
+
+
+def _info_to_dict(info) -> dict:
+    return {
+        "language": info.language,
+        "language_probability": info.language_probability,
+        "duration": info.duration,
+    }
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to a client's segment without letting this process unlink it at exit."""
+    shm = SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Job:
+    def __init__(self, connection: "_ServerConnection", request_id: int, model: str,
+                 shm_name: str, offset: int, length: int, options: dict):
+        self.connection = connection
+        self.request_id = request_id
+        self.model = model
+        self.shm_name = shm_name
+        self.offset = offset
+        self.length = length
+        self.options = options
+        self.cancelled = threading.Event()
+
+
+class _ServerConnection:
+    """One connected job process."""
+
+    def __init__(self, server: "WhisperServer", conn: Connection):
+        self._server = server
+        self._conn = conn
+        self._send_lock = threading.Lock()
+        self._segments: Dict[str, SharedMemory] = {}
+        self._jobs: Dict[int, _Job] = {}
+
+    def send(self, message) -> None:
+        try:
+            with self._send_lock:
+                self._conn.send(message)
+        except (OSError, EOFError):
+            pass
+
+    def audio(self, job: _Job) -> np.ndarray:
+        shm = self._segments.get(job.shm_name)
+        if shm is None:
+            shm = self._segments[job.shm_name] = _attach(job.shm_name)
+        return np.ndarray((job.length,), dtype=np.float32, buffer=shm.buf, offset=job.offset * 4)
+
+    def finish(self, job: _Job) -> None:
+        self._jobs.pop(job.request_id, None)
+
+    def serve(self) -> None:
+        try:
+            while True:
+                message = self._conn.recv()
+                kind = message[0]
+                if kind == "transcribe":
+                    _, request_id, model, shm_name, offset, length, options = message
+                    job = _Job(self, request_id, model, shm_name, offset, length, options)
+                    self._jobs[request_id] = job
+                    self._server.enqueue(job)
+                elif kind == "cancel":
+                    job = self._jobs.get(message[1])
+                    if job is not None:
+                        job.cancelled.set()
+                elif kind == "stats":
+                    self.send(("stats", message[1], self._server.stats()))
+        except (EOFError, OSError):
+            pass
+        finally:
+            for job in list(self._jobs.values()):
+                job.cancelled.set()
+            for shm in self._segments.values():
+                try:
+                    shm.close()
+                except BufferError:
+                    # A worker still holds a view; the mapping goes away with it
+                    pass
+            self._conn.close()
+
+
+class WhisperServer:
+    """Owns the Whisper models and decodes requests from all connected jobs."""
+
+    def __init__(self, address: str, *, workers: int = 1, authkey: Optional[bytes] = None,
+                 device: str = "auto", compute_type: Optional[str] = None):
+        self._address = address
+        # Refuses to construct without a secret
+        self._authkey = authkey or server_authkey()
+        self._device = device
+        self._compute_type = compute_type
+        self._profile = None
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._workers = workers
+        self._completed = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: _Job) -> None:
+        self._queue.put(job)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() + self._busy
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue_depth, "busy": self._busy, "completed": self._completed}
+
+    def preload(self, models: List[str]) -> None:
+        from plugins.stt_whisper_profile import calibrate, resolve_profile
+        if self._device == "auto" and models:
+            calibrate(models[0], float(os.getenv("FASTER_WHISPER_TARGET_RTF", "0.3")))
+        self._profile = resolve_profile(self._device, self._compute_type)
+        for model in models:
+            self._profile.load(model)
+
+    def serve_forever(self) -> None:
+        for index in range(self._workers):
+            threading.Thread(target=self._work, name=f"whisper-server-{index}", daemon=True).start()
+
+        ensure_private_dir(os.path.dirname(os.path.abspath(self._address)), create=True)
+        if os.path.exists(self._address):
+            os.unlink(self._address)
+        with Listener(self._address, family="AF_UNIX", authkey=self._authkey) as listener:
+            os.chmod(self._address, 0o600)
+            logger.info(f"Whisper STT server listening on {self._address} ({self._workers} workers)")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected STT client: {e}")
+                    continue
+                connection = _ServerConnection(self, conn)
+                threading.Thread(target=connection.serve, daemon=True).start()
+
+    def _work(self) -> None:
+        from plugins.stt_whisper_profile import resolve_profile
+
+        profile = self._profile or resolve_profile(self._device, self._compute_type)
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._busy += 1
+            try:
+                self._decode(job, profile.load(job.model))
+            except Exception as e:
+                logger.error(f"STT server decode failed: {e}", exc_info=True)
+                job.connection.send(("error", job.request_id, str(e), self.queue_depth))
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._completed += 1
+                job.connection.finish(job)
+
+    def _decode(self, job: _Job, model) -> None:
+        if job.cancelled.is_set():
+            job.connection.send(("done", job.request_id, self.queue_depth - 1))
+            return
+        audio = job.connection.audio(job)
+        started = time.perf_counter()
+        segments, info = model.transcribe(audio, **job.options)
+        job.connection.send(("info", job.request_id, _info_to_dict(info), self.queue_depth))
+        for segment in segments:
+            if job.cancelled.is_set():
+                break
+            job.connection.send(("segment", job.request_id, _segment_to_dict(segment)))
+        del audio
+        # This job no longer counts towards the depth the client sees
+        job.connection.send(("done", job.request_id, self.queue_depth - 1))
+        logger.debug(
+            f"Decoded {job.length / 16000:.1f}s with '{job.model}' in "
+            f"{(time.perf_counter() - started) * 1000:.0f}ms (queue_depth={self.queue_depth})"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class RemoteSegmentFeed:
+    """Same interface as SegmentFeed, backed by a server request."""
+
+    def __init__(self, client: "WhisperServerClient", model: str, audio: np.ndarray, options: dict):
+        self.info = None
+        self._client = client
+        self._model = model
+        self._audio = audio
+        self._options = options
+        self._request_id: Optional[int] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._request_id is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._request_id = self._client.submit(self, self._model, self._audio, self._options)
+            self._audio = None
+
+        while True:
+            kind, value = await self._queue.get()
+            if kind == "info":
+                self.info = value
+            elif kind == "segment":
+                return value
+            elif kind == "error":
+                raise RuntimeError(f"STT server error: {value}")
+            else:
+                raise StopAsyncIteration
+
+    def deliver(self, kind: str, value=None) -> None:
+        """Called from the client's reader thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (kind, value))
+        except RuntimeError:
+            pass
+
+    def cancel(self) -> None:
+        if self._request_id is not None:
+            self._client.cancel(self._request_id)
+
+    async def collect(self) -> list:
+        return [segment async for segment in self]
+
+
+class WhisperServerClient:
+    """Connection from this process to one STT server, with its own audio ring."""
+
+    def __init__(self, address: str, *, authkey: Optional[bytes] = None, ring_seconds: float = 240.0):
+        self.address = address
+        self.queue_depth = 0
+        self._authkey = authkey or server_authkey()
+        self._size = int(ring_seconds * 16000)
+        self._shm = SharedMemory(create=True, size=self._size * 4)
+        self._ring = np.ndarray((self._size,), dtype=np.float32, buffer=self._shm.buf)
+        self._write = 0
+        # request_id -> (ring offset, length)
+        self._regions: Dict[int, Tuple[int, int]] = {}
+        self._feeds: Dict[int, RemoteSegmentFeed] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._conn: Optional[Connection] = None
+        self._connect()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._feeds)
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def _connect(self) -> None:
+        try:
+            # A socket somewhere others can write could be a stand-in for the server
+            ensure_private_dir(os.path.dirname(os.path.abspath(self.address)))
+            self._conn = Client(self.address, family="AF_UNIX", authkey=self._authkey)
+        except RuntimeError as e:
+            logger.error(f"Not connecting to STT server {self.address}: {e}")
+            self._conn = None
+            return
+        except OSError as e:
+            logger.warning(f"STT server {self.address} unavailable: {e}")
+            self._conn = None
+            return
+        threading.Thread(target=self._read, name=f"whisper-client-{self.address}", daemon=True).start()
+
+    def _allocate(self, length: int) -> int:
+        """Find a contiguous ring region not used by an in-flight request."""
+        if length > self._size:
+            raise ValueError(f"Utterance of {length / 16000:.0f}s exceeds the shared audio ring")
+        for start in (self._write, 0):
+            end = start + length
+            if end > self._size:
+                continue
+            if all(end <= s or start >= s + n for s, n in self._regions.values()):
+                self._write = end
+                return start
+        raise RuntimeError("Shared audio ring is full")
+
+    def submit(self, feed: RemoteSegmentFeed, model: str, audio: np.ndarray, options: dict) -> int:
+        with self._lock:
+            if self._conn is None:
+                self._connect()
+                if self._conn is None:
+                    raise RuntimeError(f"STT server {self.address} unavailable")
+            request_id = next(self._ids)
+            offset = self._allocate(len(audio))
+            self._ring[offset:offset + len(audio)] = audio
+            self._regions[request_id] = (offset, len(audio))
+            self._feeds[request_id] = feed
+            self._conn.send(("transcribe", request_id, model, self._shm.name, offset, len(audio), options))
+        return request_id
+
+    def cancel(self, request_id: int) -> None:
+        with self._lock:
+            if self._conn is not None and request_id in self._feeds:
+                try:
+                    self._conn.send(("cancel", request_id))
+                except OSError:
+                    pass
+
+    def _release(self, request_id: int) -> Optional[RemoteSegmentFeed]:
+        with self._lock:
+            self._regions.pop(request_id, None)
+            return self._feeds.pop(request_id, None)
+
+    def _read(self) -> None:
+        conn = self._conn
+        try:
+            while True:
+                message = conn.recv()
+                kind, request_id = message[0], message[1]
+                if kind == "info":
+                    self.queue_depth = message[3]
+                    feed = self._feeds.get(request_id)
+                    if feed is not None:
+                        feed.deliver("info", SimpleNamespace(**message[2]))
+                elif kind == "segment":
+                    feed = self._feeds.get(request_id)
+                    if feed is not None:
+                        feed.deliver("segment", _segment_from_dict(message[2]))
+                elif kind in ("done", "error"):
+                    self.queue_depth = message[-1]
+                    feed = self._release(request_id)
+                    if feed is not None:
+                        feed.deliver(kind, message[2] if kind == "error" else None)
+                elif kind == "stats":
+                    self.queue_depth = message[2]["queue_depth"]
+        except (EOFError, OSError):
+            logger.warning(f"Lost connection to STT server {self.address}")
+        finally:
+            with self._lock:
+                self._conn = None
+                feeds = list(self._feeds.values())
+                self._feeds.clear()
+                self._regions.clear()
+            for feed in feeds:
+                feed.deliver("error", "connection lost")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+        self._ring = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class WhisperServerPool:
+    """Spreads decodes over STT servers, preferring the shortest queue."""
+
+    def __init__(self, addresses: List[str], *, authkey: Optional[bytes] = None):
+        authkey = authkey or server_authkey()
+        self._clients = [WhisperServerClient(address, authkey=authkey) for address in addresses]
+
+    def _pick(self) -> WhisperServerClient:
+        candidates = [c for c in self._clients if c.connected] or self._clients
+        return min(candidates, key=lambda c: c.queue_depth + c.inflight)
+
+    def feed(self, model: str, audio: np.ndarray, **options) -> RemoteSegmentFeed:
+        return RemoteSegmentFeed(self._pick(), model, audio, options)
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {client.address: client.queue_depth for client in self._clients}
+
+
+_pools: Dict[Tuple[str, ...], WhisperServerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(addresses: List[str], *, authkey: Optional[bytes] = None) -> WhisperServerPool:
+    """Process-wide pool for a set of server addresses."""
+    key = tuple(addresses)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = WhisperServerPool(addresses, authkey=authkey)
+        return pool
+
+
+def _parse_cpus(spec: str) -> set:
+    cpus = set()
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper STT inference server")
+    parser.add_argument("--address", default=(os.getenv("FASTER_WHISPER_SERVER") or default_address()).split(",")[0],
+                        help="Socket path; its directory must be private to this user (mode 0700)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("FASTER_WHISPER_SERVER_WORKERS", "1")))
+    parser.add_argument("--cpus", default=os.getenv("FASTER_WHISPER_SERVER_CPUS", ""),
+                        help="CPU list to pin the server to, e.g. 4-7")
+    parser.add_argument("--models", default=",".join(
+        m for m in (os.getenv("FASTER_WHISPER_MODEL", "base"), os.getenv("FASTER_WHISPER_SMALL_MODEL")) if m
+    ), help="Comma-separated models to preload")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Fail before loading any model
+    server_authkey()
+    if args.cpus:
+        os.sched_setaffinity(0, _parse_cpus(args.cpus))
+        logger.info(f"Pinned STT server to CPUs {sorted(os.sched_getaffinity(0))}")
+
+    server = WhisperServer(
+        args.address,
+        workers=args.workers,
+        device=os.getenv("FASTER_WHISPER_DEVICE", "auto"),
+        compute_type=os.getenv("FASTER_WHISPER_COMPUTE_TYPE"),
+    )
+    server.preload([m for m in args.models.split(",") if m])
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+In-process decode and resample stage shared by the TTS providers.
+
+Providers that receive compressed audio (Edge TTS sends MP3) used to hand the
+whole clip to pydub, which forks ffmpeg per utterance and then copies the
+buffer again for every set_frame_rate / set_channels / set_sample_width call.
+StreamDecoder instead decodes with PyAV (installed with livekit-agents) inside
+the process, converts straight to 16-bit mono at the rate the provider
+advertises, and can be fed chunk by chunk so audio is available as soon as
+the first frame is complete.
+"""
+import io
+from typing import Iterable, Optional
+
+import av
+import numpy as np
+
+# Container formats PyAV has to demux before decoding; everything else is
+# treated as a raw elementary stream and parsed frame by frame
+_CONTAINERS = {"wav", "ogg", "webm", "mp4"}
+
+
+class PcmConverter:
+    """
+    Resamples decoded frames to 16-bit mono at `sample_rate` into a buffer
+    that is reused between take() calls.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        self._out = bytearray()
+
+    def append(self, frames: Iterable) -> None:
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                # Packed s16 mono: one plane, possibly padded past the samples
+                self._out += memoryview(resampled.planes[0])[:resampled.samples * 2]
+
+    def take(self, final: bool = False) -> bytes:
+        """PCM converted since the last call; `final` drains the resampler."""
+        if final:
+            self.append([None])
+        pcm = bytes(self._out)
+        self._out.clear()
+        return pcm
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for a raw compressed stream (mp3, aac, opus...).
+
+    Feed chunks with decode() as they arrive and call flush() once at the end;
+    both return 16-bit mono PCM at `sample_rate`. The only copies are PyAV's
+    resample and the bytes handed back.
+    """
+
+    def __init__(self, sample_rate: int, codec: str = "mp3"):
+        self.sample_rate = sample_rate
+        self._codec = av.CodecContext.create(codec, "r")
+        self._pcm = PcmConverter(sample_rate)
+
+    def decode(self, data: bytes) -> bytes:
+        """Decode a chunk; returns the PCM of every frame it completed."""
+        for packet in self._codec.parse(data):
+            self._pcm.append(self._codec.decode(packet))
+        return self._pcm.take()
+
+    def flush(self) -> bytes:
+        """Drain the parser, decoder and resampler at the end of the stream."""
+        for packet in self._codec.parse(None):
+            self._pcm.append(self._codec.decode(packet))
+        self._pcm.append(self._codec.decode(None))
+        return self._pcm.take(final=True)
+
+
+def decode_audio(data: bytes, sample_rate: int, fmt: Optional[str] = None) -> bytes:
+    """
+    Decode a complete clip to 16-bit mono PCM at `sample_rate`. `fmt` is a
+    container (wav, ogg...) or a raw codec name; by default the container is
+    probed.
+    """
+    if fmt is not None and fmt not in _CONTAINERS:
+        decoder = StreamDecoder(sample_rate, codec=fmt)
+        return decoder.decode(data) + decoder.flush()
+
+    pcm = PcmConverter(sample_rate)
+    with av.open(io.BytesIO(data), format=fmt) as container:
+        pcm.append(container.decode(audio=0))
+    return pcm.take(final=True)
+
+
+class PcmResampler:
+    """
+    Streaming resampler for 16-bit mono PCM. Keeps filter state between
+    push() calls, so audio produced in chunks has no seams at chunk edges.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int):
+        self.from_rate = from_rate
+        self._pcm = PcmConverter(to_rate)
+
+    def push(self, pcm: bytes) -> bytes:
+        if pcm:
+            samples = np.frombuffer(pcm, dtype=np.int16).reshape(1, -1)
+            frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+            frame.sample_rate = self.from_rate
+            self._pcm.append([frame])
+        return self._pcm.take()
+
+    def flush(self) -> bytes:
+        return self._pcm.take(final=True)
+
+
+def resample_pcm(pcm: bytes, from_rate: int, to_rate: int) -> bytes:
+    """Resample 16-bit mono PCM, e.g. a provider's native rate to the advertised one."""
+    if from_rate == to_rate or not pcm:
+        return pcm
+    resampler = PcmResampler(from_rate, to_rate)
+    return resampler.push(pcm) + resampler.flush()
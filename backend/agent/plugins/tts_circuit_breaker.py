@@ -0,0 +1,146 @@
+"""
+Per-provider circuit breaker for the TTS fallback chain.
+
+Each provider's recent requests are kept in a sliding window: whether the
+request failed and how long it took to produce its first audio. When enough of
+the window is unhealthy (errors plus requests slower than `slow_first_audio`),
+the breaker opens and the provider is skipped. After `cooldown` seconds it
+goes half-open and lets a single probe request through: if the probe is
+healthy the breaker closes and the provider is used again, otherwise it opens
+for twice as long (up to `max_cooldown`).
+"""
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = 20,
+        min_samples: int = 4,
+        max_unhealthy: float = 0.5,
+        slow_first_audio: float = 2.0,
+        cooldown: float = 15.0,
+        max_cooldown: float = 300.0,
+    ):
+        self.name = name
+        self.min_samples = min_samples
+        self.max_unhealthy = max_unhealthy
+        self.slow_first_audio = slow_first_audio
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        # (failed, seconds to first audio or None)
+        self._samples: Deque[Tuple[bool, Optional[float]]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() >= self._open_until:
+            self._state = HALF_OPEN
+            self._probing = False
+            logger.info(f"TTS circuit for {self.name} half-open, next request probes it")
+
+    def allow(self) -> bool:
+        """Whether a request may use this provider now (claims the probe when half-open)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """Give back a probe claimed by allow() that was never used."""
+        with self._lock:
+            self._probing = False
+
+    def retry_at(self) -> float:
+        """Monotonic time the breaker lets a request through again."""
+        with self._lock:
+            return self._open_until if self._state == OPEN else 0.0
+
+    def record_success(self, first_audio: float) -> None:
+        self._record(False, first_audio)
+
+    def record_failure(self) -> None:
+        self._record(True, None)
+
+    def record_abandoned(self, elapsed: float) -> None:
+        """
+        The request was cancelled before any audio (another provider won the
+        race, or the user interrupted). Only its waiting time is known; it
+        counts as slow when that already exceeds the threshold.
+        """
+        if elapsed >= self.slow_first_audio:
+            self._record(False, elapsed)
+        else:
+            self.release_probe()
+
+    def _record(self, failed: bool, first_audio: Optional[float]) -> None:
+        unhealthy = failed or first_audio > self.slow_first_audio
+        with self._lock:
+            self._samples.append((failed, first_audio))
+            if self._state == HALF_OPEN:
+                if unhealthy:
+                    self._trip("probe failed" if failed else f"probe took {first_audio:.2f}s")
+                else:
+                    self._state = CLOSED
+                    self._samples.clear()
+                    self._cooldown = self.base_cooldown
+                    logger.info(f"TTS circuit for {self.name} closed, provider healthy again")
+                self._probing = False
+                return
+            if self._state == CLOSED and len(self._samples) >= self.min_samples:
+                bad = sum(1 for f, t in self._samples if f or t > self.slow_first_audio)
+                if bad / len(self._samples) >= self.max_unhealthy:
+                    self._trip(f"{bad}/{len(self._samples)} recent requests failed or were slow")
+
+    def _trip(self, reason: str) -> None:
+        was_half_open = self._state == HALF_OPEN
+        self._state = OPEN
+        if was_half_open:
+            self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+        self._open_until = time.monotonic() + self._cooldown
+        logger.warning(f"TTS circuit for {self.name} open for {self._cooldown:.0f}s: {reason}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._state = CLOSED
+            self._cooldown = self.base_cooldown
+            self._probing = False
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._maybe_half_open()
+            n = len(self._samples)
+            latencies = [t for _, t in self._samples if t is not None]
+            return {
+                "state": self._state,
+                "samples": n,
+                "error_rate": round(sum(1 for f, _ in self._samples if f) / n, 3) if n else 0.0,
+                "p50_first_audio_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+            }
@@ -0,0 +1,184 @@
+"""
+Content-addressed on-disk cache of synthesized PCM, shared by every worker
+process on the host.
+
+Agents repeat the same phrases ("Thank you.", "Could you repeat that?") across
+thousands of sessions. Each synthesized utterance is stored as one raw 16-bit
+PCM file named by the sha256 of (provider, voice, rate, pitch, sample_rate,
+normalized text). A hit is memory-mapped and pushed straight from the page
+cache, so it costs neither a round trip to the TTS service nor a copy, and a
+phrase synthesized by one job process is a hit for all the others.
+
+The directory is bounded: files are touched on every hit, and once the total
+size passes the limit the least recently used are deleted. Writes go to a
+temporary file and are renamed into place, so concurrent processes never see
+a partial entry.
+
+Environment:
+    TTS_CACHE_DIR      directory (default /tmp/tts-cache)
+    TTS_CACHE_MAX_MB   size bound (default 512; 0 disables the cache)
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Iterator, Optional
+
+# Hits are pushed in 100 ms slices so a long phrase does not arrive as one block
+_SLICE_SECONDS = 0.1
+_STATS_EVERY = 100
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class PcmDiskCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_served = 0
+        self._size = 0
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Running estimate; other processes also write, so eviction re-scans
+            self._size = sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".pcm"))
+        except OSError as e:
+            print(f"[TTS Cache] Disk cache disabled, {directory} is not usable: {e}")
+            self.max_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, voice_key: tuple, text: str) -> str:
+        material = json.dumps([*voice_key, _normalize(text)], ensure_ascii=False)
+        return os.path.join(self.directory, hashlib.sha256(material.encode()).hexdigest() + ".pcm")
+
+    def get(self, voice_key: tuple, text: str) -> Optional[memoryview]:
+        """
+        Memory-mapped PCM for the utterance, or None. The view stays valid
+        after the entry is evicted, so it can be pushed at leisure.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(voice_key, text)
+        try:
+            with open(path, "rb") as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            os.utime(path)  # recency for LRU eviction
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file (mmap of length 0)
+            self._count(hit=False)
+            return None
+        self._count(hit=True, size=len(view))
+        return view
+
+    def put(self, voice_key: tuple, text: str, pcm: bytes) -> None:
+        if not self.enabled or not pcm:
+            return
+        path = self._path(voice_key, text)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        except OSError as e:
+            print(f"[TTS Cache] Could not store entry: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[TTS Cache] Could not store entry: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._size += len(pcm)
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until 90% of the bound is free."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+            self._evictions += evicted
+        print(f"[TTS Cache] Evicted {evicted} entries, {total / 1e6:.0f} MB left")
+
+    def _count(self, hit: bool, size: int = 0) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._bytes_served += size
+            else:
+                self._misses += 1
+            lookups = self._hits + self._misses
+        if lookups % _STATS_EVERY == 0:
+            print(f"[TTS Cache] {self.stats()}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "bytes_served": self._bytes_served,
+                "size_bytes": self._size,
+            }
+
+
+def slices(pcm: memoryview, sample_rate: int) -> Iterator[memoryview]:
+    """Zero-copy 100 ms slices of a cached utterance."""
+    step = int(sample_rate * _SLICE_SECONDS) * 2
+    for start in range(0, len(pcm), step):
+        yield pcm[start:start + step]
+
+
+_cache: Optional[PcmDiskCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> PcmDiskCache:
+    """The process-wide cache, configured from the environment on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PcmDiskCache(
+                os.getenv("TTS_CACHE_DIR", "/tmp/tts-cache"),
+                int(float(os.getenv("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024),
+            )
+        return _cache
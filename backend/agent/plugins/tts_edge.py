@@ -1,18 +1,71 @@
 # Text-to-Speech using edge-tts (Microsoft Edge TTS)
 import edge_tts
 import asyncio
-from livekit.agents.tts import TTS, SynthesizeStream, TTSCapabilities, SynthesizedAudio
-from livekit import rtc
-import numpy as np
-import io
+import time
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions, tokenize, utils
+from livekit.agents.tts import TTS, AudioEmitter, ChunkedStream, SynthesizeStream, TTSCapabilities
+from typing import Callable, Iterable
 import uuid
 
+from plugins import tts_prompt_cache
+from plugins.tts_audio import StreamDecoder
+from plugins.tts_disk_cache import get_cache, slices
+from plugins.tts_edge_pool import MAX_TEXT_BYTES, disable_pool, get_pool, pool_available
+
+
+async def _synthesize_pcm(text: str, voice: str, rate: str, pitch: str, sample_rate: int,
+                          push: Callable[[bytes], None]) -> None:
+    """Synthesize `text` and hand PCM to `push` while the MP3 is still arriving."""
+    start = time.perf_counter()
+    first_audio = None
+    received = False
+    decoder = StreamDecoder(sample_rate, codec="mp3")
+
+    def on_audio(data: bytes) -> None:
+        nonlocal first_audio, received
+        received = True
+        pcm = decoder.decode(data)
+        if pcm:
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+                print(f"[Edge TTS] First audio after {first_audio * 1000:.0f}ms")
+            push(pcm)
+
+    try:
+        handshake = None  # inside Communicate, not measurable
+        if pool_available() and len(text.encode()) <= MAX_TEXT_BYTES:
+            try:
+                handshake = await get_pool().synthesize(text, voice, rate, pitch, on_audio)
+            except (TypeError, AttributeError) as e:
+                # The private edge_tts helpers the pool uses changed shape
+                if received:
+                    raise
+                disable_pool(f"{type(e).__name__}: {e}")
+        if handshake is None:
+            communicate = edge_tts.Communicate(text=text, voice=voice, rate=rate, pitch=pitch)
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    on_audio(chunk["data"])
+    except Exception as e:
+        print(f"[Edge TTS ERROR] {e}")
+        # Surfaces to livekit's retry logic and to FallbackTTS
+        raise APIConnectionError(f"Edge TTS failed: {e}") from e
+    pcm = decoder.flush()
+    if pcm:
+        push(pcm)
+    total = time.perf_counter() - start
+    timing = (
+        f"handshake {handshake * 1000:.0f}ms, synthesis {(total - handshake) * 1000:.0f}ms"
+        if handshake is not None else "new connection"
+    )
+    print(f"[Edge TTS] Synthesized '{text[:40]}' in {total * 1000:.0f}ms ({timing})")
+
 
 class EdgeTTS(TTS):
     def __init__(self, voice: str = "en-US-AriaNeural", rate: str = "+0%", pitch: str = "+0Hz"):
         super().__init__(
             capabilities=TTSCapabilities(
-                streaming=False,
+                streaming=True,
             ),
             sample_rate=24000,
             num_channels=1,
@@ -20,179 +73,123 @@ class EdgeTTS(TTS):
         self._voice = voice
         self._rate = rate
         self._pitch = pitch
-
-    def synthesize(self, text: str, *, conn_options=None) -> "EdgeSynthesizeStream":
+        self._sentence_tokenizer = tokenize.basic.SentenceTokenizer()
+
+    def prewarm(self) -> None:
+        """Open warm websocket connections before the first utterance."""
+        if pool_available():
+            try:
+                get_pool().warm_up()
+            except RuntimeError:
+                pass  # no running event loop; the first request warms the pool
+
+    @property
+    def cache_key(self) -> tuple:
+        """Voice settings pre-rendered audio is only valid for."""
+        return ("edge", self._voice, self._rate, self._pitch, self.sample_rate)
+
+    async def synthesize_pcm(self, text: str) -> bytes:
+        """Synthesize `text` to one PCM buffer (used to pre-render prompts)."""
+        chunks = []
+        await _synthesize_pcm(text, self._voice, self._rate, self._pitch, self.sample_rate, chunks.append)
+        return b"".join(chunks)
+
+    async def _speak(self, text: str, push: Callable[[bytes], None]) -> None:
+        """
+        Push pre-rendered or cached audio for `text` if there is any, else
+        synthesize it and add it to the disk cache.
+        """
+        pcm = tts_prompt_cache.lookup(self.cache_key, text)
+        if pcm is not None:
+            print(f"[Edge TTS] Served '{text[:40]}' from the prompt cache")
+            push(pcm)
+            return
+
+        cache = get_cache()
+        cached = cache.get(self.cache_key, text)
+        if cached is not None:
+            print(f"[Edge TTS] Served '{text[:40]}' from the disk cache")
+            for piece in slices(cached, self.sample_rate):
+                push(piece)
+            return
+
+        chunks = []
+
+        def tee(data: bytes) -> None:
+            chunks.append(data)
+            push(data)
+
+        await _synthesize_pcm(text, self._voice, self._rate, self._pitch, self.sample_rate, tee)
+        await asyncio.get_running_loop().run_in_executor(None, cache.put, self.cache_key, text, b"".join(chunks))
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "EdgeChunkedStream":
         print(f"[Edge TTS] synthesize() called with text: '{text[:100]}'")
-        return EdgeSynthesizeStream(
-            text,
-            self._sample_rate,
-            self._voice,
-            self._rate,
-            self._pitch,
-            tts_instance=self,
-            conn_options=conn_options
-        )
+        return EdgeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
 
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "EdgeSynthesizeStream":
+        return EdgeSynthesizeStream(tts=self, conn_options=conn_options)
 
-class EdgeSynthesizeStream(SynthesizeStream):
-    def __init__(self, text: str, sample_rate: int, voice: str, rate: str, pitch: str, tts_instance, conn_options=None):
-        super().__init__(tts=tts_instance, conn_options=conn_options)
-        self._text = text
-        self._sample_rate = sample_rate
-        self._voice = voice
-        self._rate = rate
-        self._pitch = pitch
-        self._queue = asyncio.Queue()
-        self._task = None
-
-    async def _run(self, output_emitter) -> None:
-        """Required abstract method - runs the synthesis."""
-        try:
-            print(f"[Edge TTS] Synthesizing: {self._text[:50]}...")
-
-            # Initialize the output emitter
-            request_id = str(uuid.uuid4())
-            output_emitter.initialize(
-                request_id=request_id,
-                sample_rate=self._sample_rate,
-                num_channels=1,
-                mime_type="audio/mp3",  # Edge TTS returns MP3
-            )
-
-            # Create Edge TTS communicate instance
-            communicate = edge_tts.Communicate(
-                text=self._text,
-                voice=self._voice,
-                rate=self._rate,
-                pitch=self._pitch
-            )
-
-            # Collect audio chunks
-            audio_chunks = []
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_chunks.append(chunk["data"])
-
-            # Combine all audio data
-            if audio_chunks:
-                audio_data = b"".join(audio_chunks)
-
-                # Convert audio data to numpy array (edge-tts returns MP3, need to decode)
-                try:
-                    from pydub import AudioSegment
-
-                    audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
-
-                    # Convert to raw PCM
-                    audio_segment = audio_segment.set_frame_rate(self._sample_rate)
-                    audio_segment = audio_segment.set_channels(1)
-                    audio_segment = audio_segment.set_sample_width(2)  # 16-bit
-
-                    raw_data = audio_segment.raw_data
-                    audio_array = np.frombuffer(raw_data, dtype=np.int16)
-
-                    print(f"[Edge TTS] Generated {len(audio_array)} audio samples")
-
-                    # Create audio frame and push to output_emitter
-                    frame = rtc.AudioFrame(
-                        data=audio_array.tobytes(),
-                        sample_rate=self._sample_rate,
-                        num_channels=1,
-                        samples_per_channel=len(audio_array),
-                    )
-                    output_emitter.push(frame)
-
-                except ImportError as e:
-                    print(f"[Edge TTS ERROR] Missing dependency: {e}")
-                    print("[Edge TTS ERROR] Install with: pip install pydub")
-                    print("[Edge TTS ERROR] Also need ffmpeg: sudo apt install ffmpeg")
-
-        except Exception as e:
-            print(f"[Edge TTS ERROR] {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            output_emitter.end_input()
 
-    async def __anext__(self) -> SynthesizedAudio:
-        if self._task is None:
-            self._task = asyncio.create_task(self._run_synthesis())
+class EdgeChunkedStream(ChunkedStream):
+    """One-shot synthesis; audio is pushed while edge-tts is still sending."""
 
-        frame = await self._queue.get()
-        if frame is None:
-            raise StopAsyncIteration
+    def __init__(self, *, tts: EdgeTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: EdgeTTS = tts
 
-        return SynthesizedAudio(
-            frame=frame,
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
             request_id=str(uuid.uuid4()),
-            is_final=True,
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
         )
+        await self._tts._speak(self._input_text, output_emitter.push)
+        output_emitter.flush()
 
-    async def _run_synthesis(self):
+
+class EdgeSynthesizeStream(SynthesizeStream):
+    """
+    Streaming input: LLM text is split into sentences and each sentence is
+    synthesized as soon as it is complete, so speech starts after the first
+    sentence instead of after the whole reply.
+    """
+
+    def __init__(self, *, tts: EdgeTTS, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._tts: EdgeTTS = tts
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=str(uuid.uuid4()))
+        sentences = self._tts._sentence_tokenizer.stream()
+
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sentences.flush()
+                    continue
+                sentences.push_text(data)
+            sentences.end_input()
+
+        async def synthesize():
+            async for ev in sentences:
+                await self._tts._speak(ev.token, output_emitter.push)
+                output_emitter.flush()
+            output_emitter.end_segment()
+
+        tasks = [asyncio.create_task(forward_input()), asyncio.create_task(synthesize())]
         try:
-            print(f"[Edge TTS] Synthesizing: {self._text[:50]}...")
-
-            # Create Edge TTS communicate instance
-            communicate = edge_tts.Communicate(
-                text=self._text,
-                voice=self._voice,
-                rate=self._rate,
-                pitch=self._pitch
-            )
-
-            # Collect audio chunks
-            audio_chunks = []
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_chunks.append(chunk["data"])
-
-            # Combine all audio data
-            if audio_chunks:
-                audio_data = b"".join(audio_chunks)
-
-                # Convert audio data to numpy array (edge-tts returns MP3, need to decode)
-                try:
-                    from pydub import AudioSegment
-
-                    audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
-
-                    # Convert to raw PCM
-                    audio_segment = audio_segment.set_frame_rate(self._sample_rate)
-                    audio_segment = audio_segment.set_channels(1)
-                    audio_segment = audio_segment.set_sample_width(2)  # 16-bit
-
-                    raw_data = audio_segment.raw_data
-                    audio_array = np.frombuffer(raw_data, dtype=np.int16)
-
-                    print(f"[Edge TTS] Generated {len(audio_array)} audio samples")
-
-                    # Split into chunks and put into queue
-                    chunk_size = self._sample_rate // 10  # 100ms chunks
-                    for i in range(0, len(audio_array), chunk_size):
-                        chunk = audio_array[i:i + chunk_size]
-                        frame = rtc.AudioFrame(
-                            data=chunk.tobytes(),
-                            sample_rate=self._sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(chunk),
-                        )
-                        await self._queue.put(frame)
-
-                except ImportError as e:
-                    print(f"[Edge TTS ERROR] Missing dependency: {e}")
-                    print("[Edge TTS ERROR] Install with: pip install pydub")
-                    print("[Edge TTS ERROR] Also need ffmpeg: sudo apt install ffmpeg")
-
-        except Exception as e:
-            print(f"[Edge TTS ERROR] {e}")
-            import traceback
-            traceback.print_exc()
+            await asyncio.gather(*tasks)
         finally:
-            await self._queue.put(None)  # Signal end
-
-    async def aclose(self):
-        """Close the stream."""
-        await self._queue.put(None)
+            await sentences.aclose()
+            await utils.aio.cancel_and_wait(*tasks)
 
 
 def create():
@@ -219,3 +216,15 @@ def create():
         rate=rate,
         pitch=pitch
     )
+
+
+def prewarm(texts: Iterable[str]) -> None:
+    """Pre-render `texts` in the background for the voice create() would configure."""
+    tts = create()
+
+    async def close_pool():
+        # The render loop ends after prewarm; its connections go with it
+        if pool_available():
+            await get_pool().aclose()
+
+    tts_prompt_cache.prewarm(tts.cache_key, texts, tts.synthesize_pcm, finish=close_pool)
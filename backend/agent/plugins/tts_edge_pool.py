@@ -0,0 +1,317 @@
+"""
+Pool of warm Edge TTS websocket connections.
+
+edge_tts.Communicate opens a new websocket for every utterance, so each one
+paid DNS, TLS and the websocket handshake before the first byte of audio. The
+Edge service accepts any number of requests one after another on the same
+socket, so this module speaks its (small) protocol over pooled connections:
+
+- acquire() hands out an idle connection, or opens one if none is free. Each
+  connection carries one request at a time, and concurrent requests use
+  separate connections.
+- After a connection is handed out, a replacement is opened in the background
+  so the next request also finds a warm socket.
+- Connections are health-checked with websocket pings and closed after
+  `idle_timeout` seconds unused or when the service drops them. While requests
+  keep coming (`keep_warm`), closed connections are replaced.
+- A request that fails on a reused connection before any audio arrived is
+  retried once on a fresh one. A request that receives nothing for
+  `receive_timeout` seconds fails instead of hanging on a stalled socket.
+
+The URL, headers, DRM token and SSML (including edge_tts's validation of the
+voice, rate and pitch and its expansion of short voice names) still come from
+edge_tts, so they stay in step
+with whatever the installed edge-tts version sends. They are private, so
+requirements.txt pins the release this was written against
+(TESTED_EDGE_TTS_VERSION). If they cannot be imported, pool_available() is
+False; if they turn out to have changed shape at runtime, callers call
+disable_pool() and use Communicate from then on.
+"""
+import asyncio
+import os
+import time
+import weakref
+from typing import Callable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import aiohttp
+
+try:
+    from edge_tts.communicate import (
+        _SSL_CTX,
+        connect_id,
+        date_to_string,
+        get_headers_and_data,
+        mkssml,
+        remove_incompatible_characters,
+        ssml_headers_plus_data,
+    )
+    from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+    from edge_tts.data_classes import TTSConfig
+    from edge_tts.drm import DRM
+    _PROTOCOL_AVAILABLE = True
+except ImportError:
+    _PROTOCOL_AVAILABLE = False
+
+# The edge-tts release whose private protocol helpers this module uses
+TESTED_EDGE_TTS_VERSION = "7.2.8"
+
+OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+# edge_tts splits longer texts into several requests; such texts use Communicate
+MAX_TEXT_BYTES = 4096
+
+
+def pool_available() -> bool:
+    return _PROTOCOL_AVAILABLE
+
+
+def disable_pool(reason: str) -> None:
+    """Use Communicate for the rest of this process, e.g. after edge_tts internals changed."""
+    global _PROTOCOL_AVAILABLE
+    if _PROTOCOL_AVAILABLE:
+        _PROTOCOL_AVAILABLE = False
+        print(
+            f"[Edge TTS] Connection pool disabled, falling back to Communicate "
+            f"(pool written against edge-tts {TESTED_EDGE_TTS_VERSION}): {reason}"
+        )
+
+
+def build_ssml(text: str, voice: str, rate: str, pitch: str) -> str:
+    """
+    The request body Communicate would send. TTSConfig raises ValueError for
+    a malformed voice, rate or pitch and expands "en-US-AriaNeural" to the
+    full name the service expects.
+    """
+    config = TTSConfig(voice=voice, rate=rate, volume="+0%", pitch=pitch, boundary="SentenceBoundary")
+    return mkssml(config, escape(remove_incompatible_characters(text)))
+
+
+class EdgeConnection:
+    """One websocket to the Edge service, configured for MP3 output."""
+
+    def __init__(self, session: aiohttp.ClientSession, ws: aiohttp.ClientWebSocketResponse, handshake: float):
+        self._session = session
+        self._ws = ws
+        self.handshake = handshake
+        self.requests = 0
+        self.last_used = time.monotonic()
+
+    @classmethod
+    async def open(cls, session: aiohttp.ClientSession) -> "EdgeConnection":
+        start = time.perf_counter()
+        headers = DRM.headers_with_muid(WSS_HEADERS) if hasattr(DRM, "headers_with_muid") else WSS_HEADERS
+        try:
+            ws = await cls._connect(session, headers)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 403 or not hasattr(DRM, "handle_client_response_error"):
+                raise
+            # Local clock too far from the service's for the DRM token
+            DRM.handle_client_response_error(e)
+            ws = await cls._connect(session, headers)
+        await ws.send_str(
+            f"X-Timestamp:{date_to_string()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+            '"sentenceBoundaryEnabled":"false","wordBoundaryEnabled":"false"},'
+            f'"outputFormat":"{OUTPUT_FORMAT}"'
+            "}}}}\r\n"
+        )
+        return cls(session, ws, time.perf_counter() - start)
+
+    @staticmethod
+    async def _connect(session: aiohttp.ClientSession, headers: dict) -> aiohttp.ClientWebSocketResponse:
+        return await session.ws_connect(
+            f"{WSS_URL}&ConnectionId={connect_id()}"
+            f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+            f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}",
+            compress=15,
+            headers=headers,
+            ssl=_SSL_CTX,
+            heartbeat=10.0,  # pings double as the health check
+        )
+
+    @property
+    def healthy(self) -> bool:
+        return not self._ws.closed
+
+    async def synthesize(self, ssml: str, on_audio: Callable[[bytes], None], receive_timeout: float) -> int:
+        """
+        Run one request; MP3 chunks go to `on_audio`. Returns bytes received.
+        Raises TimeoutError when no message arrives for `receive_timeout` seconds.
+        """
+        self.requests += 1
+        await self._ws.send_str(ssml_headers_plus_data(connect_id(), date_to_string(), ssml))
+
+        received = 0
+        loop = asyncio.get_running_loop()
+        async with asyncio.timeout(receive_timeout) as deadline:
+            async for msg in self._ws:
+                # The timeout is for a stalled socket, not for long texts
+                deadline.reschedule(loop.time() + receive_timeout)
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    if "Path:turn.end" in msg.data:
+                        self.last_used = time.monotonic()
+                        return received
+                elif msg.type == aiohttp.WSMsgType.BINARY:
+                    if len(msg.data) < 2:
+                        continue
+                    headers, data = get_headers_and_data(msg.data, int.from_bytes(msg.data[:2], "big"))
+                    if headers.get(b"Path") == b"audio" and data:
+                        received += len(data)
+                        on_audio(data)
+                else:
+                    break
+        raise ConnectionError(f"Edge websocket closed mid-request ({self._ws.close_code})")
+
+    async def close(self) -> None:
+        await self._ws.close()
+
+
+class EdgeConnectionPool:
+    def __init__(self, *, warm: int = 2, idle_timeout: float = 30.0, keep_warm: float = 300.0,
+                 receive_timeout: float = 10.0):
+        self._warm = warm
+        self._idle_timeout = idle_timeout
+        self._receive_timeout = receive_timeout
+        # While requests keep coming, connections closed as idle are replaced
+        self._keep_warm = keep_warm
+        self._last_request = time.monotonic()
+        self._idle: List[EdgeConnection] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._opening = 0
+        # Background opens, referenced so they are not collected mid-handshake
+        self._opens = set()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(trust_env=True)
+        return self._session
+
+    async def _open(self) -> EdgeConnection:
+        conn = await EdgeConnection.open(self._get_session())
+        print(f"[Edge TTS] Opened pooled connection, handshake {conn.handshake * 1000:.0f}ms")
+        return conn
+
+    def _refill(self) -> None:
+        """Open connections in the background until `warm` are idle or opening."""
+        if not _PROTOCOL_AVAILABLE:
+            return  # disabled since; requests use Communicate
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        for _ in range(self._warm - len(self._idle) - self._opening):
+            self._opening += 1
+            task = asyncio.create_task(self._open_idle())
+            self._opens.add(task)
+            task.add_done_callback(self._opens.discard)
+
+    async def _open_idle(self) -> None:
+        try:
+            self._idle.append(await self._open())
+        except Exception as e:
+            print(f"[Edge TTS] Could not open pooled connection: {e}")
+        finally:
+            self._opening -= 1
+
+    async def _reap(self) -> None:
+        """Close connections idle for longer than the timeout or found dead."""
+        while True:
+            await asyncio.sleep(self._idle_timeout / 2)
+            now = time.monotonic()
+            stale = [c for c in self._idle if not c.healthy or now - c.last_used > self._idle_timeout]
+            for conn in stale:
+                self._idle.remove(conn)
+                await conn.close()
+            if now - self._last_request < self._keep_warm:
+                self._refill()
+            elif not self._idle and not self._opening:
+                # Quiet for a while: stay cold, the next acquire() warms up again
+                return
+
+    def warm_up(self) -> None:
+        """Start opening the warm connections now instead of on first use."""
+        self._refill()
+
+    async def aclose(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+        opens = list(self._opens)
+        for task in opens:
+            task.cancel()
+        # Let them finish unwinding so no socket is left half-open
+        await asyncio.gather(*opens, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+        if self._session is not None:
+            await self._session.close()
+
+    async def acquire(self) -> Tuple[EdgeConnection, bool]:
+        """
+        A connection for one request, and whether it had to be opened now:
+        the request only waits on a handshake if no warm connection is idle.
+        """
+        self._last_request = time.monotonic()
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.healthy:
+                self._refill()
+                return conn, False
+            await conn.close()
+        conn = await self._open()
+        self._refill()
+        return conn, True
+
+    async def release(self, conn: EdgeConnection, *, reusable: bool) -> None:
+        if reusable and conn.healthy and len(self._idle) < self._warm:
+            self._idle.append(conn)
+        else:
+            await conn.close()
+
+    async def synthesize(self, text: str, voice: str, rate: str, pitch: str,
+                         on_audio: Callable[[bytes], None]) -> float:
+        """
+        Synthesize over a pooled connection. Returns the handshake time paid
+        by this request (0 when a warm connection was used).
+        """
+        # Before any connection is taken: a bad voice is not worth a retry
+        ssml = build_ssml(text, voice, rate, pitch)
+        for attempt in range(2):
+            conn, opened = await self.acquire()
+            handshake = conn.handshake if opened else 0.0
+            received = 0
+
+            def count(data: bytes) -> None:
+                nonlocal received
+                received += len(data)
+                on_audio(data)
+
+            try:
+                await conn.synthesize(ssml, count, self._receive_timeout)
+            except BaseException as e:
+                # Unknown state (half-delivered turn): never reuse it
+                await asyncio.shield(self.release(conn, reusable=False))
+                # A warm socket the service had already dropped; retry fresh
+                if isinstance(e, Exception) and attempt == 0 and received == 0 and not opened:
+                    continue
+                raise
+            await self.release(conn, reusable=True)
+            return handshake
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EdgeConnectionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_pool() -> EdgeConnectionPool:
+    """The pool of the running event loop (connections cannot cross loops)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = EdgeConnectionPool(
+            warm=int(os.getenv("EDGE_TTS_POOL_SIZE", "2")),
+            idle_timeout=float(os.getenv("EDGE_TTS_IDLE_TIMEOUT", "30")),
+            keep_warm=float(os.getenv("EDGE_TTS_KEEP_WARM", "300")),
+            receive_timeout=float(os.getenv("EDGE_TTS_RECEIVE_TIMEOUT", "10")),
+        )
+    return pool
@@ -2,21 +2,72 @@
 TTS Fallback Wrapper - Automatically falls back to alternative TTS on failure
 
 This wrapper provides a robust TTS system with multiple fallback levels:
-1. Primary: Zyphra Zonos TTS (high quality, GPU-accelerated)
-2. Fallback: Edge TTS (cloud-based, reliable)
+1. Primary: Edge TTS (cloud-based, fast)
+2. Fallback: Zyphra Zonos TTS (local, optional via ZONOS_FALLBACK=1)
 3. Final fallback: Flite TTS (local, lightweight)
 """
+import asyncio
 import logging
-from livekit.agents.tts import TTS, SynthesizeStream
-from typing import List, Optional
+import os
+import time
+import uuid
+from dataclasses import replace
+from livekit import rtc
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions, tokenize, utils
+from livekit.agents.tts import TTS, AudioEmitter, ChunkedStream, StreamAdapter, SynthesizeStream
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from plugins.tts_circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 
+class OutputResampler:
+    """
+    Brings any provider's audio to the one output rate, so which provider
+    answered does not change the stream's format. Frames already at that rate
+    pass through untouched; cutting them into `frame_ms` frames is left to the
+    AudioEmitter (frame_size_ms).
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._resampler: Optional[rtc.AudioResampler] = None
+        self._source_rate: Optional[int] = None
+
+    def push(self, frame: rtc.AudioFrame) -> Iterator[memoryview]:
+        if frame.sample_rate == self.sample_rate:
+            yield frame.data.cast("B")
+            return
+        if self._resampler is None or self._source_rate != frame.sample_rate:
+            self._resampler = rtc.AudioResampler(frame.sample_rate, self.sample_rate, num_channels=1)
+            self._source_rate = frame.sample_rate
+        for resampled in self._resampler.push(frame):
+            yield resampled.data.cast("B")
+
+    def flush(self) -> Iterator[memoryview]:
+        """End of an utterance: drain the resampler."""
+        if self._resampler is not None:
+            for resampled in self._resampler.flush():
+                yield resampled.data.cast("B")
+            self._resampler = None
+
+
 class FallbackTTS(TTS):
     """TTS wrapper that falls back to alternative providers on failure"""
 
-    def __init__(self, primary: TTS, fallback: TTS, final_fallback: Optional[TTS] = None):
+    def __init__(
+        self,
+        primary: TTS,
+        fallback: TTS,
+        final_fallback: Optional[TTS] = None,
+        *,
+        sample_rate: Optional[int] = None,
+        frame_ms: int = 20,
+        hedge_after: float = 0.7,
+        slow_first_audio: float = 2.0,
+        breaker_cooldown: float = 15.0,
+    ):
         """
         Initialize fallback TTS system.
 
@@ -24,21 +75,30 @@ class FallbackTTS(TTS):
             primary: Primary TTS provider (e.g., Zonos)
             fallback: Secondary TTS provider (e.g., Edge TTS)
             final_fallback: Tertiary TTS provider (e.g., Flite) - optional
+            sample_rate: Output rate every provider is resampled to (default: primary's)
+            frame_ms: Duration of each emitted audio frame (framed by the AudioEmitter)
+            hedge_after: Seconds without first audio before the next provider is started too
+            slow_first_audio: First-audio time above which a request counts as unhealthy
+            breaker_cooldown: Seconds an unhealthy provider is skipped before it is probed
         """
         # Inherit capabilities from primary
         super().__init__(
             capabilities=primary._capabilities,
-            sample_rate=primary._sample_rate,
-            num_channels=primary._num_channels,
+            sample_rate=sample_rate or primary._sample_rate,
+            num_channels=1,
         )
+        self.frame_ms = frame_ms
         self.primary = primary
         self.fallback = fallback
         self.final_fallback = final_fallback
 
-        self._primary_failure_count = 0
-        self._fallback_failure_count = 0
-        self._max_failures_before_switch = 3
-        self._permanently_switched = False
+        self.hedge_after = hedge_after
+        self._breakers: Dict[TTS, CircuitBreaker] = {
+            provider: CircuitBreaker(
+                provider.__class__.__name__, slow_first_audio=slow_first_audio, cooldown=breaker_cooldown
+            )
+            for provider in self.providers
+        }
 
         logger.info(
             f"Fallback TTS initialized: "
@@ -47,113 +107,260 @@ class FallbackTTS(TTS):
             + (f", final={self.final_fallback.__class__.__name__}" if self.final_fallback else "")
         )
 
-    def synthesize(self, text: str, *, conn_options=None) -> SynthesizeStream:
-        """
-        Try primary TTS, fall back on failure.
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "FallbackChunkedStream":
+        """Synthesize with the first working provider, resampled to the output rate."""
+        return FallbackChunkedStream(tts=self, input_text=text, conn_options=conn_options)
 
-        Args:
-            text: Text to synthesize
-            conn_options: Connection options
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "FallbackSynthesizeStream":
+        """Streaming synthesis with the first working provider, resampled to the output rate."""
+        return FallbackSynthesizeStream(tts=self, conn_options=conn_options)
 
-        Returns:
-            SynthesizeStream from successful provider
-        """
-        # If permanently switched, use fallback as primary
-        if self._permanently_switched:
-            return self._try_fallback_chain(text, conn_options, skip_primary=True)
+    @property
+    def providers(self) -> List[TTS]:
+        return [p for p in (self.primary, self.fallback, self.final_fallback) if p is not None]
 
-        # Try primary first
+    def _available(self) -> List[TTS]:
+        """
+        Providers whose circuit lets a request through, in preference order.
+        If every circuit is open, all providers are tried anyway, the one that
+        reopens soonest first, rather than failing the utterance outright.
+        """
+        available = [p for p in self.providers if self._breakers[p].allow()]
+        if available:
+            return available
+        logger.warning("Every TTS circuit is open, trying all providers")
+        return sorted(self.providers, key=lambda p: self._breakers[p].retry_at())
+
+    async def _attempt(self, provider: TTS, text: str, conn_options: APIConnectOptions,
+                       frames: asyncio.Queue, events: asyncio.Queue, index: int) -> None:
+        """
+        Run one provider into `frames`, reporting first audio and failure on
+        `events`, and record the outcome with the provider's breaker.
+        """
+        breaker = self._breakers[provider]
+        start = time.monotonic()
+        first_audio = None
         try:
-            logger.debug(f"Using primary TTS: {self.primary.__class__.__name__}")
-            stream = self.primary.synthesize(text, conn_options=conn_options)
-            # Reset failure count on success
-            self._primary_failure_count = 0
-            return stream
-
+            async with provider.synthesize(text, conn_options=conn_options) as stream:
+                async for ev in stream:
+                    if first_audio is None:
+                        first_audio = time.monotonic() - start
+                        events.put_nowait((index, None))
+                    frames.put_nowait(ev.frame)
+            if first_audio is None:
+                raise APIConnectionError(f"{provider.__class__.__name__} returned no audio")
+        except asyncio.CancelledError:
+            if first_audio is None:
+                breaker.record_abandoned(time.monotonic() - start)
+            raise
         except Exception as e:
-            self._primary_failure_count += 1
-            logger.warning(
-                f"Primary TTS failed ({self._primary_failure_count}/{self._max_failures_before_switch}): {e}"
-            )
-
-            # Check if we should permanently switch
-            if self._primary_failure_count >= self._max_failures_before_switch:
-                logger.error(
-                    f"Primary TTS has failed {self._primary_failure_count} times, "
-                    f"permanently switching to fallback"
-                )
-                self._permanently_switched = True
-
-            # Try fallback chain
-            return self._try_fallback_chain(text, conn_options, skip_primary=True)
-
-    def _try_fallback_chain(self, text: str, conn_options, skip_primary: bool = False) -> SynthesizeStream:
+            breaker.record_failure()
+            logger.warning(f"{provider.__class__.__name__} failed: {e}")
+            events.put_nowait((index, e))
+            frames.put_nowait(e)
+            return
+        breaker.record_success(first_audio)
+        frames.put_nowait(None)
+
+    async def _hedged(self, text: str, conn_options: APIConnectOptions) -> AsyncIterator[rtc.AudioFrame]:
         """
-        Try fallback providers in sequence.
-
-        Args:
-            text: Text to synthesize
-            conn_options: Connection options
-            skip_primary: Whether to skip primary (already failed)
-
-        Returns:
-            SynthesizeStream from successful provider
+        Frames of the first provider to produce audio. A provider that fails
+        before its first audio hands over to the next at once; one that is
+        merely slow gets `hedge_after` seconds before the next is started
+        alongside it. The losers are cancelled as soon as a winner emerges.
+        """
+        loop = asyncio.get_running_loop()
+        waiting = self._available()
+        events: asyncio.Queue = asyncio.Queue()
+        attempts: List[Tuple[TTS, asyncio.Task, asyncio.Queue]] = []
+        running = 0
+        deadline = 0.0
+        last_error: Optional[Exception] = None
+
+        def launch() -> None:
+            nonlocal running, deadline
+            provider = waiting.pop(0)
+            frames: asyncio.Queue = asyncio.Queue()
+            task = asyncio.create_task(self._attempt(provider, text, conn_options, frames, events, len(attempts)))
+            attempts.append((provider, task, frames))
+            running += 1
+            deadline = loop.time() + self.hedge_after
 
-        Raises:
-            RuntimeError: If all providers fail
+        try:
+            launch()
+            while True:
+                timeout = max(0.0, deadline - loop.time()) if waiting else None
+                try:
+                    index, error = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    logger.info(
+                        f"No TTS audio after {self.hedge_after * 1000:.0f}ms, "
+                        f"hedging with {waiting[0].__class__.__name__}"
+                    )
+                    launch()
+                    continue
+                if error is None:
+                    break
+                running -= 1
+                last_error = error
+                if waiting:
+                    launch()
+                elif running == 0:
+                    raise APIConnectionError(f"All TTS providers failed. Last error: {last_error}") from last_error
+
+            winner, _, frames = attempts[index]
+            if index:
+                logger.info(f"TTS served by {winner.__class__.__name__}")
+            for provider, task, _ in attempts:
+                if provider is not winner:
+                    task.cancel()
+            while (frame := await frames.get()) is not None:
+                if isinstance(frame, Exception):
+                    # Audio already played; switching providers mid-sentence would repeat it
+                    raise APIConnectionError(f"{winner.__class__.__name__} failed mid-utterance: {frame}") from frame
+                yield frame
+        finally:
+            await utils.aio.cancel_and_wait(*(task for _, task, _ in attempts))
+            for provider in waiting:
+                self._breakers[provider].release_probe()
+
+    def _open_stream(self, conn_options: APIConnectOptions) -> SynthesizeStream:
+        """
+        Streaming synthesis from the first provider that can start one whose
+        circuit is not open. No hedging here: with PipelinedTTS in front,
+        replies go through synthesize() one sentence at a time instead.
+        Providers without streaming support are wrapped in a StreamAdapter.
         """
         last_error = None
-
-        # Try secondary fallback
+        candidates = self._available()
         try:
-            logger.info(f"Falling back to {self.fallback.__class__.__name__}")
-            stream = self.fallback.synthesize(text, conn_options=conn_options)
-            self._fallback_failure_count = 0
-            return stream
-
-        except Exception as e:
-            self._fallback_failure_count += 1
-            last_error = e
-            logger.error(
-                f"Fallback TTS failed ({self._fallback_failure_count}): {e}"
-            )
+            for provider in candidates:
+                try:
+                    if provider.capabilities.streaming:
+                        return provider.stream(conn_options=conn_options)
+                    adapter = StreamAdapter(tts=provider, sentence_tokenizer=tokenize.basic.SentenceTokenizer())
+                    return adapter.stream(conn_options=conn_options)
+                except Exception as e:
+                    logger.warning(f"{provider.__class__.__name__} could not start a stream: {e}")
+                    last_error = e
+        finally:
+            # Whole streams are not measured, so they never settle a probe
+            for provider in candidates:
+                self._breakers[provider].release_probe()
 
-        # Try final fallback if available
-        if self.final_fallback:
-            try:
-                logger.warning(f"Using final fallback: {self.final_fallback.__class__.__name__}")
-                return self.final_fallback.synthesize(text, conn_options=conn_options)
-            except Exception as e:
-                logger.error(f"Final fallback TTS also failed: {e}")
-                last_error = e
-
-        # All providers failed
         raise RuntimeError(
             f"All TTS providers failed. Last error: {last_error}"
         ) from last_error
 
+    def prewarm(self) -> None:
+        """Let every provider open its connections before the first utterance."""
+        for provider in filter(None, [self.primary, self.fallback, self.final_fallback]):
+            provider.prewarm()
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the PCM disk cache the providers share."""
+        from plugins.tts_disk_cache import get_cache
+        return get_cache().stats()
+
+    def circuit_stats(self) -> Dict[str, dict]:
+        """Breaker state, error rate and median first-audio time per provider."""
+        return {breaker.name: breaker.stats() for breaker in self._breakers.values()}
+
     def reset_failure_counts(self):
-        """Reset failure counts (useful for testing or recovery)"""
-        self._primary_failure_count = 0
-        self._fallback_failure_count = 0
-        self._permanently_switched = False
-        logger.info("TTS failure counts reset")
+        """Close every circuit (useful for testing or recovery)"""
+        for breaker in self._breakers.values():
+            breaker.reset()
+        logger.info("TTS circuits reset")
+
+
+class FallbackChunkedStream(ChunkedStream):
+    def __init__(self, *, tts: FallbackTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: FallbackTTS = tts
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+            frame_size_ms=self._tts.frame_ms,
+        )
+        resampler = OutputResampler(self._tts.sample_rate)
+        # This stream retries the whole hedged selection; providers do not also retry
+        async for audio in self._tts._hedged(self._input_text, replace(self._conn_options, max_retry=0)):
+            for pcm in resampler.push(audio):
+                output_emitter.push(pcm)
+        for pcm in resampler.flush():
+            output_emitter.push(pcm)
+        output_emitter.flush()
+
+
+class FallbackSynthesizeStream(SynthesizeStream):
+    def __init__(self, *, tts: FallbackTTS, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._tts: FallbackTTS = tts
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+            frame_size_ms=self._tts.frame_ms,
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=str(uuid.uuid4()))
+        resampler = OutputResampler(self._tts.sample_rate)
+        source = self._tts._open_stream(self._conn_options)
+
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    source.flush()
+                    continue
+                source.push_text(data)
+            source.end_input()
+
+        async def relay():
+            async for ev in source:
+                for pcm in resampler.push(ev.frame):
+                    output_emitter.push(pcm)
+                if ev.is_final:
+                    for pcm in resampler.flush():
+                        output_emitter.push(pcm)
+                    output_emitter.flush()
+            for pcm in resampler.flush():
+                output_emitter.push(pcm)
+            output_emitter.end_segment()
+
+        tasks = [asyncio.create_task(forward_input()), asyncio.create_task(relay())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            await source.aclose()
 
 
-def create() -> FallbackTTS:
+def create() -> TTS:
     """
     Create TTS with automatic fallback chain:
     Edge TTS (primary, fast) → Flite (fallback, local)
+    With ZONOS_FALLBACK=1: Edge TTS → Zonos (local, see plugins/tts_zonos.py) → Flite
 
-    Zonos TTS removed for speed - Edge TTS is ~5x faster
+    The chain is wrapped in a PipelinedTTS (see plugins/tts_pipeline.py) so the
+    sentences of a reply are synthesized concurrently and played in order.
+
+    Zonos is off by default - Edge TTS is ~5x faster
 
     Returns:
-        Configured FallbackTTS instance
+        Configured TTS instance
     """
     try:
         # Import TTS providers
         from plugins.tts_edge import create as create_edge
         from plugins.tts_flite import create as create_flite
+        from plugins.tts_pipeline import wrap as pipeline_tts
 
         # Create primary (Edge TTS) - fast cloud-based TTS
         try:
@@ -176,18 +383,67 @@ def create() -> FallbackTTS:
             logger.warning(f"Failed to initialize Flite TTS: {e}")
             fallback = None
 
+        # Optional local neural voice between Edge and Flite (ZONOS_FALLBACK=1)
+        final_fallback = None
+        if fallback and zonos_fallback_enabled():
+            try:
+                from plugins.tts_zonos import create as create_zonos
+
+                fallback, final_fallback = create_zonos(), fallback
+                logger.info("✅ Fallback TTS: Zonos (local), then Flite")
+            except Exception as e:
+                logger.warning(f"Failed to initialize Zonos TTS: {e}")
+
         # Return fallback TTS if we have both providers
         if fallback:
-            return FallbackTTS(
+            tts = FallbackTTS(
                 primary=primary,
                 fallback=fallback,
-                final_fallback=None  # Only 2-tier now: Edge → Flite
+                final_fallback=final_fallback,  # Edge → Flite, or Edge → Zonos → Flite
+                # Every provider is resampled to the same rate and framed alike
+                sample_rate=int(os.getenv("TTS_OUTPUT_SAMPLE_RATE", "24000")),
+                frame_ms=int(os.getenv("TTS_FRAME_MS", "20")),
+                # Start Flite too when Edge has not spoken within this deadline
+                hedge_after=float(os.getenv("TTS_HEDGE_AFTER_MS", "700")) / 1000,
+                slow_first_audio=float(os.getenv("TTS_SLOW_FIRST_AUDIO_MS", "2000")) / 1000,
+                breaker_cooldown=float(os.getenv("TTS_BREAKER_COOLDOWN", "15")),
             )
         else:
-            # Only Edge available, return it directly
+            # Only Edge available, use it directly
             logger.warning("Only Edge TTS available, no fallback configured")
-            return primary
+            tts = primary
+
+        # Render the sentences of a reply concurrently, played in order
+        return pipeline_tts(tts)
 
     except Exception as e:
         logger.error(f"Failed to create fallback TTS: {e}", exc_info=True)
         raise RuntimeError(f"TTS initialization failed: {e}") from e
+
+
+def prewarm(texts: Iterable[str]) -> None:
+    """
+    Pre-render fixed utterances (greeting, intake prompts) for the primary
+    provider in the background, reusing the disk cache; see
+    plugins/tts_prompt_cache.py.
+    """
+    from plugins.tts_edge import prewarm as prewarm_edge
+
+    try:
+        prewarm_edge(texts)
+    except Exception as e:
+        # Not fatal: the prompts are synthesized live instead
+        logger.warning(f"TTS prompt prewarm failed: {e}")
+
+    if zonos_fallback_enabled():
+        try:
+            from plugins.tts_zonos import prewarm as prewarm_zonos
+
+            # Loads and warms the model in the background
+            prewarm_zonos()
+        except Exception as e:
+            logger.warning(f"Zonos prewarm failed: {e}")
+
+
+def zonos_fallback_enabled() -> bool:
+    return os.getenv("ZONOS_FALLBACK", "0").lower() in ("1", "true", "yes")
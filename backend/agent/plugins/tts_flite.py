@@ -1,13 +1,11 @@
 # Text-to-Speech using Flite (lightweight and stable)
-import subprocess
 import asyncio
-from livekit.agents.tts import TTS, SynthesizeStream, TTSCapabilities, SynthesizedAudio
-from livekit import rtc
-import numpy as np
-import tempfile
-import wave
 import uuid
-import os
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions
+from livekit.agents.tts import TTS, AudioEmitter, ChunkedStream, TTSCapabilities
+
+from plugins.tts_disk_cache import get_cache, slices
+from plugins.tts_flite_engine import get_engine
 
 
 class FliteTTS(TTS):
@@ -21,118 +19,60 @@ class FliteTTS(TTS):
             - awb (male, Scottish)   → expressive & friendly ✅
             - rms (male, American)   → deep & formal
         """
+        # Shared per process: libflite is loaded once, on its own thread
+        engine = get_engine(voice)
+        # The voice's native rate (8 or 16 kHz); FallbackTTS resamples it once
         super().__init__(
             capabilities=TTSCapabilities(streaming=False),
-            sample_rate=22050,
+            sample_rate=engine.sample_rate,
             num_channels=1,
         )
         self._voice = voice
+        self._engine = engine
 
-    def synthesize(self, text: str, *, conn_options=None) -> "FliteSynthesizeStream":
-        print(f"[Flite TTS] synthesize() called with text: '{text[:100]}' (voice: {self._voice})")
-        return FliteSynthesizeStream(
-            text=text,
-            sample_rate=self._sample_rate,
-            voice=self._voice,
-            tts_instance=self,
-            conn_options=conn_options,
-        )
-
-
-class FliteSynthesizeStream(SynthesizeStream):
-    def __init__(self, text: str, sample_rate: int, voice: str, tts_instance, conn_options=None):
-        super().__init__(tts=tts_instance, conn_options=conn_options)
-        self._text = text
-        self._sample_rate = sample_rate
-        self._voice = voice
-        self._queue = asyncio.Queue()
-        self._task = None
+    @property
+    def cache_key(self) -> tuple:
+        """Voice settings cached audio is only valid for."""
+        return ("flite", self._voice, "", "", self._sample_rate)
 
-    async def _run(self, output_emitter) -> None:
-        """Runs the synthesis asynchronously."""
-        await self._run_synthesis()
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "FliteChunkedStream":
+        print(f"[Flite TTS] synthesize() called with text: '{text[:100]}' (voice: {self._voice})")
+        return FliteChunkedStream(tts=self, input_text=text, conn_options=conn_options)
 
-    async def __anext__(self) -> SynthesizedAudio:
-        if self._task is None:
-            self._task = asyncio.create_task(self._run_synthesis())
 
-        frame = await self._queue.get()
-        if frame is None:
-            raise StopAsyncIteration
+class FliteChunkedStream(ChunkedStream):
+    def __init__(self, *, tts: FliteTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: FliteTTS = tts
 
-        return SynthesizedAudio(
-            frame=frame,
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
             request_id=str(uuid.uuid4()),
-            is_final=True,
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
         )
-
-    async def _run_synthesis(self):
+        cache = get_cache()
+        cached = cache.get(self._tts.cache_key, self._input_text)
+        if cached is not None:
+            print("[Flite TTS] Served from the disk cache")
+            for piece in slices(cached, self._tts.sample_rate):
+                output_emitter.push(piece)
+            output_emitter.flush()
+            return
+
+        print(f"[Flite TTS] Synthesizing text: {self._input_text[:60]}...")
         try:
-            print(f"[Flite TTS] Synthesizing text: {self._text[:60]}...")
-            loop = asyncio.get_event_loop()
-            audio_data = await loop.run_in_executor(None, self._synthesize_sync)
-
-            if audio_data is not None and len(audio_data) > 0:
-                chunk_size = self._sample_rate // 10  # 100ms chunks
-                for i in range(0, len(audio_data), chunk_size):
-                    chunk = audio_data[i:i + chunk_size]
-                    frame = rtc.AudioFrame(
-                        data=chunk.tobytes(),
-                        sample_rate=self._sample_rate,
-                        num_channels=1,
-                        samples_per_channel=len(chunk),
-                    )
-                    await self._queue.put(frame)
-
-                print(f"[Flite TTS] Generated {len(audio_data)} audio samples successfully.")
-
+            pcm = await self._tts._engine.synthesize(self._input_text)
         except Exception as e:
             print(f"[Flite TTS ERROR] {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            await self._queue.put(None)  # signal end
-
-    def _synthesize_sync(self) -> np.ndarray:
-        """Run flite synchronously and return audio data."""
-        try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                temp_path = tmp_file.name
-
-            subprocess.run(
-                [
-                    "flite",
-                    "-voice", self._voice,
-                    "-t", self._text,
-                    "-o", temp_path
-                ],
-                check=True,
-                capture_output=True,
-            )
-
-            with wave.open(temp_path, 'rb') as wav_file:
-                sample_rate = wav_file.getframerate()
-                n_frames = wav_file.getnframes()
-                audio_bytes = wav_file.readframes(n_frames)
-                audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
-
-            os.unlink(temp_path)
-            return audio_data
-
-        except subprocess.CalledProcessError as e:
-            print(f"[Flite TTS ERROR] Command failed: {e}")
-            print(f"[Flite TTS ERROR] stderr: {e.stderr.decode() if e.stderr else 'none'}")
-            return np.zeros(self._sample_rate, dtype=np.int16)
-
-        except Exception as e:
-            print(f"[Flite TTS ERROR] Exception: {e}")
-            import traceback
-            traceback.print_exc()
-            return np.zeros(self._sample_rate, dtype=np.int16)
+            raise APIConnectionError(f"Flite TTS failed: {e}") from e
 
-    async def aclose(self):
-        """Close the synthesis stream cleanly."""
-        await self._queue.put(None)
+        for piece in slices(memoryview(pcm), self._tts.sample_rate):
+            output_emitter.push(piece)
+        output_emitter.flush()
+        print(f"[Flite TTS] Generated {len(pcm) // 2} audio samples successfully.")
+        await asyncio.get_running_loop().run_in_executor(None, cache.put, self._tts.cache_key, self._input_text, pcm)
 
 
 def create():
@@ -0,0 +1,137 @@
+"""
+Flite synthesis without a process or temp file per utterance.
+
+The Flite fallback used to fork the `flite` binary for every utterance, have it
+write a WAV to a temporary file, read that back and unlink it, all on the
+shared default executor. FliteEngine instead loads libflite and the voice
+library with ctypes once per process and synthesizes straight into memory.
+
+libflite is not thread-safe, so every engine runs its calls on one dedicated
+thread; that also keeps Flite off the default executor other work shares.
+Where libflite cannot be loaded (e.g. only the binary is installed) the
+engine still runs the binary, but it writes the WAV to stdout, so nothing
+touches the filesystem.
+
+Audio comes out at the voice's native rate (FliteEngine.sample_rate), which
+FliteTTS advertises: resampling happens once, where the output rate is known
+(FallbackTTS), not here and then again there.
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import io
+import subprocess
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from plugins.tts_audio import resample_pcm
+
+
+class _CstWave(ctypes.Structure):
+    # cst_wave from flite's cst_wave.h
+    _fields_ = [
+        ("type", ctypes.c_char_p),
+        ("sample_rate", ctypes.c_int),
+        ("num_samples", ctypes.c_int),
+        ("num_channels", ctypes.c_int),
+        ("samples", ctypes.POINTER(ctypes.c_short)),
+    ]
+
+
+def _load_library(name: str, global_symbols: bool = False) -> ctypes.CDLL:
+    path = ctypes.util.find_library(name) or f"lib{name}.so.1"
+    return ctypes.CDLL(path, mode=ctypes.RTLD_GLOBAL if global_symbols else ctypes.DEFAULT_MODE)
+
+
+# Native rates of the cmu_us voices; the others are 16 kHz
+VOICE_SAMPLE_RATES = {"kal": 8000}
+
+
+class FliteEngine:
+    def __init__(self, voice: str):
+        self.voice = voice
+        self.sample_rate = VOICE_SAMPLE_RATES.get(voice, 16000)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"flite-{voice}")
+        self._lib: Optional[ctypes.CDLL] = None
+        self._voice_ptr: Optional[int] = None
+        # Load the libraries now, off the caller's thread
+        self._loaded = self._executor.submit(self._load)
+
+    def _load(self) -> bool:
+        try:
+            # The voice libraries resolve lexicon and language symbols globally
+            lib = _load_library("flite", global_symbols=True)
+            _load_library("flite_cmulex", global_symbols=True)
+            _load_library("flite_usenglish", global_symbols=True)
+            voice_lib = _load_library(f"flite_cmu_us_{self.voice}")
+
+            lib.flite_init.restype = ctypes.c_int
+            lib.flite_text_to_wave.argtypes = [ctypes.c_char_p, ctypes.c_void_p]
+            lib.flite_text_to_wave.restype = ctypes.POINTER(_CstWave)
+            lib.delete_wave.argtypes = [ctypes.POINTER(_CstWave)]
+            lib.delete_wave.restype = None
+            register = getattr(voice_lib, f"register_cmu_us_{self.voice}")
+            register.argtypes = [ctypes.c_char_p]
+            register.restype = ctypes.c_void_p
+
+            lib.flite_init()
+            voice_ptr = register(None)
+            if not voice_ptr:
+                raise OSError(f"register_cmu_us_{self.voice} returned NULL")
+        except (OSError, AttributeError) as e:
+            print(f"[Flite TTS] libflite unavailable ({e}), using the flite binary")
+            return False
+        self._lib, self._voice_ptr = lib, voice_ptr
+        print(f"[Flite TTS] Loaded libflite in-process (voice: {self.voice})")
+        return True
+
+    def _synthesize_in_process(self, text: str) -> Tuple[bytes, int]:
+        wav = self._lib.flite_text_to_wave(text.encode("utf-8"), self._voice_ptr)
+        if not wav:
+            raise RuntimeError("flite_text_to_wave returned NULL")
+        try:
+            w = wav.contents
+            pcm = ctypes.string_at(w.samples, w.num_samples * w.num_channels * 2)
+            return pcm, w.sample_rate
+        finally:
+            self._lib.delete_wave(wav)
+
+    def _synthesize_binary(self, text: str) -> Tuple[bytes, int]:
+        result = subprocess.run(
+            ["flite", "-voice", self.voice, "-t", text, "-o", "/dev/stdout"],
+            check=True,
+            capture_output=True,
+        )
+        with wave.open(io.BytesIO(result.stdout), "rb") as wav_file:
+            return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+
+    def _synthesize_sync(self, text: str) -> bytes:
+        if self._loaded.result():
+            pcm, rate = self._synthesize_in_process(text)
+        else:
+            pcm, rate = self._synthesize_binary(text)
+        if rate != self.sample_rate:
+            # Only for a voice missing from VOICE_SAMPLE_RATES
+            print(f"[Flite TTS] Voice {self.voice} is {rate} Hz, not {self.sample_rate} Hz; resampling")
+            pcm = resample_pcm(pcm, rate, self.sample_rate)
+        return pcm
+
+    async def synthesize(self, text: str) -> bytes:
+        """16-bit mono PCM of `text` at the voice's native `sample_rate`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._synthesize_sync, text)
+
+
+_engines: Dict[str, FliteEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(voice: str) -> FliteEngine:
+    """Process-wide engine per voice; libflite is loaded once."""
+    with _engines_lock:
+        engine = _engines.get(voice)
+        if engine is None:
+            engine = _engines[voice] = FliteEngine(voice)
+        return engine
@@ -0,0 +1,141 @@
+"""
+Sentence-pipelined TTS.
+
+A multi-sentence LLM reply used to be synthesized sentence after sentence (or
+as one request for providers without streaming), so the second sentence only
+started rendering once the first had finished. PipelinedTTS wraps any TTS:
+incoming text is split at sentence boundaries and up to `max_concurrent`
+sentences are synthesized at once through the wrapped TTS (for FallbackTTS
+that means across its providers). Audio is still emitted strictly in order -
+the first sentence plays as soon as its audio arrives while later ones render
+in the background.
+
+When the stream is interrupted every pending sentence is cancelled with it.
+
+The wrapped TTS already emits at its advertised rate (FallbackTTS resamples
+its providers), so audio is passed through without resampling; framing is left
+to the AudioEmitter.
+"""
+import asyncio
+import os
+import uuid
+
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, tokenize, utils
+from livekit.agents.tts import TTS, AudioEmitter, ChunkedStream, SynthesizeStream, TTSCapabilities
+
+
+class PipelinedTTS(TTS):
+    def __init__(self, tts: TTS, *, max_concurrent: int = 3, frame_ms: int = 20):
+        super().__init__(
+            capabilities=TTSCapabilities(streaming=True),
+            sample_rate=tts.sample_rate,
+            num_channels=1,
+        )
+        self._inner = tts
+        self._max_concurrent = max(1, max_concurrent)
+        self._frame_ms = frame_ms
+        self._sentence_tokenizer = tokenize.basic.SentenceTokenizer()
+
+    @property
+    def inner(self) -> TTS:
+        return self._inner
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> ChunkedStream:
+        return self._inner.synthesize(text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "PipelinedSynthesizeStream":
+        return PipelinedSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self._inner.prewarm()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class PipelinedSynthesizeStream(SynthesizeStream):
+    def __init__(self, *, tts: PipelinedTTS, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._tts: PipelinedTTS = tts
+
+    async def _render(self, text: str, out: asyncio.Queue, limit: asyncio.Semaphore) -> None:
+        """Synthesize one sentence into `out`: PCM chunks, then None (or the error)."""
+        rate = self._tts.sample_rate
+        try:
+            async with limit:
+                async with self._tts._inner.synthesize(text, conn_options=self._conn_options) as stream:
+                    async for ev in stream:
+                        if ev.frame.sample_rate != rate:
+                            raise RuntimeError(
+                                f"{self._tts._inner.__class__.__name__} emitted {ev.frame.sample_rate} Hz "
+                                f"audio but advertises {rate} Hz"
+                            )
+                        out.put_nowait(ev.frame.data.cast("B"))
+        except Exception as e:
+            out.put_nowait(e)
+        finally:
+            out.put_nowait(None)
+
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+            frame_size_ms=self._tts._frame_ms,
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=str(uuid.uuid4()))
+        sentences = self._tts._sentence_tokenizer.stream()
+        limit = asyncio.Semaphore(self._tts._max_concurrent)
+        # One queue per sentence, in the order they must be played
+        order: asyncio.Queue = asyncio.Queue()
+        renders = []
+
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sentences.flush()
+                    continue
+                sentences.push_text(data)
+            sentences.end_input()
+
+        async def schedule():
+            async for ev in sentences:
+                out: asyncio.Queue = asyncio.Queue()
+                # The semaphore is FIFO, so earlier sentences start first
+                renders.append(asyncio.create_task(self._render(ev.token, out, limit)))
+                order.put_nowait(out)
+            order.put_nowait(None)
+
+        async def play():
+            while (out := await order.get()) is not None:
+                while (item := await out.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    output_emitter.push(item)
+                output_emitter.flush()
+            output_emitter.end_segment()
+
+        tasks = [
+            asyncio.create_task(forward_input()),
+            asyncio.create_task(schedule()),
+            asyncio.create_task(play()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Interruption or failure: drop every sentence still rendering
+            await sentences.aclose()
+            await utils.aio.cancel_and_wait(*tasks, *renders)
+
+
+def wrap(tts: TTS) -> TTS:
+    """
+    Pipeline `tts` unless disabled. TTS_PIPELINE_SENTENCES sets how many
+    sentences render at once (default 3; 0 returns `tts` unchanged).
+    """
+    max_concurrent = int(os.getenv("TTS_PIPELINE_SENTENCES", "3"))
+    if max_concurrent <= 0:
+        return tts
+    return PipelinedTTS(tts, max_concurrent=max_concurrent, frame_ms=int(os.getenv("TTS_FRAME_MS", "20")))
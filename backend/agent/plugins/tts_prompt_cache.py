@@ -0,0 +1,146 @@
+"""
+Pre-rendered audio for the agent's fixed utterances.
+
+The greeting and the intake prompts are the same in every session, yet they
+were synthesized again each time one was spoken. prewarm() renders them once
+per worker process for the configured voice, and the TTS providers look text
+up here before synthesizing: a hit is pushed as PCM with no synthesis latency,
+anything else (LLM replies, the confirmation with the caller's answers) goes
+to live synthesis as before.
+
+Entries are keyed by the provider's voice settings and the normalized text.
+Each prompt is stored whole and sentence by sentence, because the streaming
+path asks for one sentence at a time.
+
+Rendering reads from and fills the PCM disk cache (tts_disk_cache), so only
+the first process on a host synthesizes the prompts; the others, and every
+restart, load them from disk. prewarm() renders in the background: until it
+is done, prompts are simply synthesized (or served from disk) on demand.
+"""
+import asyncio
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from livekit.agents import tokenize
+
+from plugins.tts_disk_cache import get_cache
+
+_cache: Dict[Tuple[Hashable, str], bytes] = {}
+_lock = threading.Lock()
+_sentences = tokenize.basic.SentenceTokenizer()
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def lookup(voice_key: Hashable, text: str) -> Optional[bytes]:
+    """PCM for `text` if it, or every one of its sentences, was pre-rendered."""
+    text = _normalize(text)
+    if not text:
+        return None
+    with _lock:
+        pcm = _cache.get((voice_key, text))
+        if pcm is not None:
+            return pcm
+        parts = [_cache.get((voice_key, _normalize(s))) for s in _sentences.tokenize(text)]
+    if parts and all(p is not None for p in parts):
+        return b"".join(parts)
+    return None
+
+
+def store(voice_key: Hashable, text: str, pcm: bytes) -> None:
+    with _lock:
+        _cache[(voice_key, _normalize(text))] = pcm
+
+
+async def render(
+    voice_key: tuple,
+    texts: Iterable[str],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    concurrency: int = 4,
+) -> Tuple[int, int]:
+    """
+    Cache every text and sentence not cached yet, from the disk cache where
+    possible. Returns how many were (synthesized, loaded from disk).
+    """
+    pending = []
+    for text in texts:
+        for piece in [text, *_sentences.tokenize(text)]:
+            piece = _normalize(piece)
+            with _lock:
+                cached = (voice_key, piece) in _cache
+            if piece and piece not in pending and not cached:
+                pending.append(piece)
+
+    disk = get_cache()
+    loop = asyncio.get_running_loop()
+    # Bounded so start-up does not open dozens of connections at once
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(piece: str) -> bool:
+        """Cache `piece`; True if it had to be synthesized."""
+        view = await loop.run_in_executor(None, disk.get, voice_key, piece)
+        if view is not None:
+            store(voice_key, piece, bytes(view))
+            return False
+        async with limit:
+            pcm = await synthesize(piece)
+        store(voice_key, piece, pcm)
+        await loop.run_in_executor(None, disk.put, voice_key, piece, pcm)
+        return True
+
+    results = await asyncio.gather(*(one(p) for p in pending), return_exceptions=True)
+    synthesized = loaded = 0
+    for piece, result in zip(pending, results):
+        if isinstance(result, BaseException):
+            print(f"[TTS Cache] Could not render '{piece[:40]}': {result}")
+        elif result:
+            synthesized += 1
+        else:
+            loaded += 1
+    return synthesized, loaded
+
+
+def prewarm(
+    voice_key: tuple,
+    texts: Iterable[str],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    finish: Optional[Callable[[], Awaitable[None]]] = None,
+) -> threading.Thread:
+    """
+    Start render() in the background for process start-up and return its
+    thread without waiting for it. It runs on its own daemon thread and event
+    loop so it works whether or not the caller already has a loop running;
+    `finish` runs on that loop afterwards, e.g. to close connections.
+    A failure only means those utterances are synthesized live later.
+    """
+    texts = list(texts)
+
+    async def render_all() -> Tuple[int, int]:
+        try:
+            return await render(voice_key, texts, synthesize)
+        finally:
+            if finish is not None:
+                await finish()
+
+    def run():
+        start = time.perf_counter()
+        try:
+            synthesized, loaded = asyncio.run(render_all())
+        except Exception as e:
+            print(f"[TTS Cache] Prewarm failed: {e}")
+            return
+        with _lock:
+            total = sum(len(pcm) for pcm in _cache.values())
+        print(
+            f"[TTS Cache] Cached {len(texts)} prompts ({synthesized} utterances synthesized, "
+            f"{loaded} loaded from disk) in {(time.perf_counter() - start) * 1000:.0f}ms "
+            f"({total / 1e6:.1f} MB cached)"
+        )
+
+    thread = threading.Thread(target=run, name="tts-prompt-cache", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,114 @@
+"""
+On-disk cache of Zonos speaker embeddings, shared by every worker process on
+the host.
+
+make_speaker_embedding runs a speaker model over the reference audio (and
+loads that model on first use), which took seconds per process and per voice.
+Embeddings are stored as .npy files named by the sha256 of (model name,
+sha256 of the reference audio bytes), so a renamed or re-uploaded file with
+the same audio is still a hit and an edited one is not. Hits are loaded
+memory-mapped, so every process reads the same pages.
+
+Writes go to a temporary file and are renamed into place, so concurrent
+processes never see a partial entry. Embeddings are a few hundred bytes each;
+the directory is not bounded.
+
+Environment:
+    ZONOS_SPEAKER_CACHE_DIR   directory (default /tmp/zonos-speakers; empty disables)
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def audio_digest(path: str) -> str:
+    """sha256 of a reference audio file, remembered while the file is unchanged."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with _digests_lock:
+            _digests[key] = digest
+    return digest
+
+
+class SpeakerEmbeddingCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Speaker embedding cache disabled, {directory} is not usable: {e}")
+            self.directory = ""
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, model_name: str, digest: str) -> str:
+        material = json.dumps([model_name, digest])
+        return os.path.join(self.directory, hashlib.sha256(material.encode()).hexdigest() + ".npy")
+
+    def get(self, model_name: str, digest: str) -> Optional[np.ndarray]:
+        """The cached embedding, memory-mapped copy-on-write, or None."""
+        if not self.enabled:
+            return None
+        try:
+            return np.load(self._path(model_name, digest), mmap_mode="c")
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            # Unreadable entry; it is recomputed and overwritten
+            logger.warning(f"Ignoring corrupt speaker embedding cache entry: {e}")
+            return None
+
+    def put(self, model_name: str, digest: str, embedding: np.ndarray) -> None:
+        if not self.enabled:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        except OSError as e:
+            logger.warning(f"Could not store speaker embedding: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, self._path(model_name, digest))
+        except OSError as e:
+            logger.warning(f"Could not store speaker embedding: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+_cache: Optional[SpeakerEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SpeakerEmbeddingCache:
+    """The process-wide cache, configured from the environment on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SpeakerEmbeddingCache(os.getenv("ZONOS_SPEAKER_CACHE_DIR", "/tmp/zonos-speakers"))
+        return _cache
@@ -4,12 +4,29 @@ https://github.com/Zyphra/Zonos
 
 Zonos-v0.1 is a leading open-weight text-to-speech model trained on 200k+ hours
 of multilingual speech, delivering high-quality expressiveness.
+
+The model is loaded once per process by a ZonosRuntime (see get_runtime()),
+started from prewarm() so no turn waits for it. Each runtime generates on its
+own thread, never on the event loop. Audio codes are decoded in chunks while
+generation is still running, so the first audio is pushed after a fraction of
+a second of speech has been generated rather than after all of it.
+
+Voice-cloning speaker embeddings are per request, so every cloned voice
+shares the one loaded model. They are computed once per host and model and
+then come from plugins/tts_speaker_cache.py.
+
+On CPU the transformer model is used (the hybrid one needs CUDA), its Linear
+layers are dynamically quantized to int8 and torch's thread pools are sized
+from ZONOS_CPU_THREADS / ZONOS_INTEROP_THREADS.
 """
+import asyncio
 import logging
-import io
 import os
-import numpy as np
-from typing import Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:
     import torch
@@ -22,11 +39,346 @@ except ImportError as e:
         f"Install with: pip install torch torchaudio zonos"
     ) from e
 
-from livekit import rtc
-from livekit.agents.tts import TTS, SynthesizeStream, TTSCapabilities, SynthesizedAudio
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions
+from livekit.agents.tts import TTS, AudioEmitter, ChunkedStream, TTSCapabilities
+
+from plugins.tts_audio import PcmResampler
+from plugins.tts_speaker_cache import audio_digest, get_cache as get_speaker_cache
 
 logger = logging.getLogger(__name__)
 
+# Zonos predicts 9 codebooks per audio frame (~86 frames per second). They are
+# generated with a delay pattern: codebook k of frame t is sampled k + 1 steps
+# after the start, so frame t is complete once codebook 8 has been sampled.
+N_CODEBOOKS = 9
+FRAMES_PER_SECOND = 86
+# Codes at or above this are EOS / mask tokens, not audio
+SPECIAL_TOKEN = 1024
+
+# Zonos takes espeak language codes
+LANGUAGE_CODES = {"en": "en-us", "fr": "fr-fr"}
+
+TRANSFORMER_MODEL = "Zyphra/Zonos-v0.1-transformer"
+# make_speaker_embedding returns bfloat16; the cache stores float32 (lossless)
+SPEAKER_EMBEDDING_DTYPE = torch.bfloat16
+
+
+# Cleared once streamed codes disagree with generate()'s result (a Zonos
+# release with another delay layout); generations then decode at the end
+_stream_decoding = True
+
+
+class _ChunkDecoder:
+    """
+    Decodes one generation in chunks from the generate() callback.
+
+    Each chunk is decoded with `context` frames before it and `lookahead`
+    frames after it that are not emitted yet, so the codec sees the same
+    neighbourhood at chunk edges as it would decoding everything at once.
+
+    The delayed columns are copied from the frames generate() hands to the
+    callback (its buffer is not touched) and undelayed with the pattern
+    described at N_CODEBOOKS. A frame of another shape stops streaming for the
+    generation, and finish() checks the streamed codes against generate()'s
+    result: on a mismatch streaming is turned off for the process, so an
+    incompatible Zonos release degrades to decoding the whole utterance.
+    """
+
+    def __init__(
+        self,
+        autoencoder,
+        emit: Callable[[bytes], None],
+        resampler: PcmResampler,
+        cancelled: threading.Event,
+        *,
+        first_chunk: int = 12,
+        chunk: int = 40,
+        context: int = 4,
+        lookahead: int = 4,
+    ):
+        self._autoencoder = autoencoder
+        self._emit = emit
+        self._resampler = resampler
+        self._cancelled = cancelled
+        self._next_chunk = first_chunk
+        self._chunk = chunk
+        self._context = context
+        self._lookahead = lookahead
+        self._emitted = 0  # frames already pushed
+        self._columns: List["torch.Tensor"] = []  # delayed code columns so far
+        self._streaming = _stream_decoding
+        self.first_audio: Optional[float] = None
+        self._start = time.perf_counter()
+
+    def on_step(self, frame: "torch.Tensor", step: int, max_steps: int) -> bool:
+        """generate() callback; returning False stops generation."""
+        if self._cancelled.is_set():
+            return False
+        if not self._streaming:
+            return True
+        if frame.dim() != 3 or frame.shape[1] != N_CODEBOOKS or frame.shape[-1] != 1:
+            logger.warning(f"Unexpected Zonos frame shape {tuple(frame.shape)}, decoding at the end")
+            self._streaming = False
+            return True
+        # A view into generate()'s buffer, which it keeps writing to
+        self._columns.append(frame.clone())
+        complete = len(self._columns) - N_CODEBOOKS + 1
+        if complete - self._lookahead - self._emitted < self._next_chunk:
+            return True
+
+        delayed = torch.cat(self._columns, dim=-1)
+        # Stop streaming at EOS; finish() decodes the exact tail
+        eos = (delayed[0, 0] >= SPECIAL_TOKEN).nonzero()
+        if len(eos):
+            complete = min(complete, int(eos[0]))
+        if complete - self._lookahead - self._emitted >= self._next_chunk:
+            self._decode(_undelay(delayed, complete), complete - self._lookahead)
+            self._next_chunk = self._chunk
+        return True
+
+    def finish(self, codes: "torch.Tensor") -> None:
+        """Decode what the chunks have not covered from generate()'s result."""
+        if self._cancelled.is_set():
+            return
+        if self._emitted:
+            self._check_streamed(codes)
+        if codes.shape[-1] > self._emitted:
+            self._decode(codes, codes.shape[-1])
+        self._push(self._resampler.flush())
+
+    def _check_streamed(self, codes: "torch.Tensor") -> None:
+        """Turn streaming off for the process if the chunks decoded other codes than generate() returned."""
+        global _stream_decoding
+        streamed = _undelay(torch.cat(self._columns, dim=-1), self._emitted)
+        final = codes[..., :self._emitted]
+        if final.shape == streamed.shape and torch.equal(
+            final.masked_fill(final >= SPECIAL_TOKEN, 0), streamed.masked_fill(streamed >= SPECIAL_TOKEN, 0)
+        ):
+            return
+        if _stream_decoding:
+            logger.warning(
+                "Streamed Zonos codes do not match the generated ones (unexpected delay layout); "
+                "decoding whole utterances from now on"
+            )
+            _stream_decoding = False
+
+    def _decode(self, codes: "torch.Tensor", until: int) -> None:
+        """Decode frames [emitted, until) of `codes` (undelayed, all frames so far)."""
+        start = max(0, self._emitted - self._context)
+        window = codes[..., start:].masked_fill(codes[..., start:] >= SPECIAL_TOKEN, 0)
+        wav = self._autoencoder.decode(window).reshape(-1)
+        hop = wav.shape[-1] // window.shape[-1]
+        wav = wav[(self._emitted - start) * hop:(until - start) * hop]
+        pcm = (wav.clamp(-1.0, 1.0) * 32767).to(torch.int16).cpu().numpy().tobytes()
+        self._emitted = until
+        self._push(self._resampler.push(pcm))
+
+    def _push(self, pcm: bytes) -> None:
+        if not pcm:
+            return
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter() - self._start
+        self._emit(pcm)
+
+
+def _undelay(delayed: "torch.Tensor", frames: int) -> "torch.Tensor":
+    """The first `frames` complete frames of delayed columns: codebook k lags k columns."""
+    return torch.stack([delayed[:, k, k:frames + k] for k in range(N_CODEBOOKS)], dim=1)
+
+
+class ZonosRuntime:
+    """
+    One loaded Zonos model, the speaker embeddings used with it and the thread
+    it runs on.
+
+    Loading starts on that thread as soon as the runtime is created; requests
+    queue behind it instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str,
+        *,
+        quantize: bool = True,
+        cpu_threads: Optional[int] = None,
+        interop_threads: int = 1,
+    ):
+        if device == "cuda" and not torch.cuda.is_available():
+            logger.warning("CUDA requested but not available, falling back to CPU")
+            device = "cpu"
+        if device == "cpu" and "hybrid" in model_name:
+            # The hybrid backbone's Mamba kernels only run on CUDA
+            logger.warning(f"{model_name} needs CUDA, using {TRANSFORMER_MODEL} on CPU")
+            model_name = TRANSFORMER_MODEL
+        self.model_name = model_name
+        self.device = device
+        self._quantize = quantize and device == "cpu"
+        self._cpu_threads = cpu_threads
+        self._interop_threads = interop_threads
+        self._model: Optional[Zonos] = None
+        # Reference audio sha256 -> embedding on the device; only touched on the runtime's thread
+        self._speakers: Dict[str, "torch.Tensor"] = {}
+        # Generation is not re-entrant; one thread also keeps torch's thread settings
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zonos")
+        self._loaded = self._executor.submit(self._load)
+
+    def _configure_threads(self) -> None:
+        if self.device != "cpu":
+            return
+        threads = self._cpu_threads or len(os.sched_getaffinity(0))
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(self._interop_threads)
+        except RuntimeError:
+            # Only settable before torch's first parallel work in this process
+            logger.debug("torch inter-op threads already initialized")
+        logger.info(f"Zonos CPU threads: {threads} intra-op, {torch.get_num_interop_threads()} inter-op")
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        self._configure_threads()
+        try:
+            logger.info(f"Loading Zonos model {self.model_name} on {self.device}...")
+            model = Zonos.from_pretrained(self.model_name, device=self.device)
+            model.eval()
+            if self._quantize:
+                self._quantize_linear(model)
+            self._model = model
+        except Exception as e:
+            logger.error(f"Failed to initialize Zonos TTS: {e}", exc_info=True)
+            raise RuntimeError(f"Zonos TTS initialization failed: {e}") from e
+        logger.info(f"Zonos model loaded in {time.perf_counter() - start:.1f}s")
+
+        # One short generation pays for allocator growth, compilation and
+        # CUDA graph capture before a user is waiting on it
+        start = time.perf_counter()
+        try:
+            self._generate("Hello.", "en-us", None, lambda pcm: None, threading.Event(), 24000)
+            logger.info(f"Zonos warm-up generation took {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.warning(f"Zonos warm-up generation failed: {e}")
+
+    @staticmethod
+    def _quantize_linear(model: "Zonos") -> None:
+        """int8 dynamic quantization of the backbone and output heads."""
+        for name in ("backbone", "heads"):
+            module = getattr(model, name, None)
+            if module is not None:
+                setattr(model, name, torch.ao.quantization.quantize_dynamic(
+                    module, {torch.nn.Linear}, dtype=torch.qint8,
+                ))
+        logger.info("Zonos Linear layers quantized to int8")
+
+    def _speaker(self, speaker_audio_path: Optional[str]) -> Optional["torch.Tensor"]:
+        """Embedding of the reference audio, or None for the default voice."""
+        if not speaker_audio_path:
+            return None
+        if not os.path.exists(speaker_audio_path):
+            logger.warning(f"Speaker reference {speaker_audio_path} not found, using the default voice")
+            return None
+        digest = audio_digest(speaker_audio_path)
+        embedding = self._speakers.get(digest)
+        if embedding is not None:
+            return embedding
+
+        cache = get_speaker_cache()
+        cached = cache.get(self.model_name, digest)
+        if cached is not None:
+            embedding = torch.from_numpy(cached).to(self.device, SPEAKER_EMBEDDING_DTYPE)
+            logger.info(f"Speaker embedding for {speaker_audio_path} loaded from cache")
+        else:
+            start = time.perf_counter()
+            audio, sr = torchaudio.load(speaker_audio_path)
+            embedding = self._model.make_speaker_embedding(audio.to(self.device), sr)
+            cache.put(self.model_name, digest, embedding.float().cpu().numpy())
+            logger.info(
+                f"Speaker embedding for {speaker_audio_path} created in {time.perf_counter() - start:.1f}s"
+            )
+        self._speakers[digest] = embedding
+        return embedding
+
+    def _generate(self, text: str, language: str, speaker_audio_path: Optional[str],
+                  emit: Callable[[bytes], None], cancelled: threading.Event,
+                  sample_rate: int) -> Optional[float]:
+        model = self._model
+        cond_dict = make_cond_dict(
+            text=text,
+            speaker=self._speaker(speaker_audio_path),
+            language=language,
+            device=self.device,
+        )
+        decoder = _ChunkDecoder(
+            model.autoencoder,
+            emit,
+            PcmResampler(model.autoencoder.sampling_rate, sample_rate),
+            cancelled,
+        )
+        with torch.inference_mode():
+            conditioning = model.prepare_conditioning(cond_dict)
+            codes = model.generate(
+                conditioning,
+                # Generous bound for the text; generation stops at EOS
+                max_new_tokens=min(FRAMES_PER_SECOND * 30, FRAMES_PER_SECOND * (2 + len(text) // 8)),
+                progress_bar=False,
+                # torch.compile takes minutes on CPU and gains little there
+                disable_torch_compile=self.device == "cpu",
+                callback=decoder.on_step,
+            )
+            decoder.finish(codes)
+        return decoder.first_audio
+
+    def _generate_when_loaded(self, *args) -> Optional[float]:
+        self._loaded.result()
+        return self._generate(*args)
+
+    def _speaker_when_loaded(self, speaker_audio_path: str) -> None:
+        try:
+            self._loaded.result()
+            self._speaker(speaker_audio_path)
+        except Exception as e:
+            # Retried, and reported, by the first request using it
+            logger.warning(f"Could not prepare speaker {speaker_audio_path}: {e}")
+
+    def ensure_loaded(self) -> None:
+        """Raise if loading failed (blocks while it is still running)."""
+        self._loaded.result()
+
+    def prepare_speaker(self, speaker_audio_path: Optional[str]) -> None:
+        """Resolve a speaker embedding on the runtime's thread ahead of its first request."""
+        if speaker_audio_path:
+            self._executor.submit(self._speaker_when_loaded, speaker_audio_path)
+
+    async def synthesize(self, text: str, language: str, speaker_audio_path: Optional[str],
+                         sample_rate: int, emit: Callable[[bytes], None],
+                         cancelled: threading.Event) -> Optional[float]:
+        """
+        Generate `text` in the voice of `speaker_audio_path` (None: the
+        default voice) on the runtime's thread. 16-bit mono PCM at
+        `sample_rate` is passed to `emit` (from that thread) as it is decoded.
+        Setting `cancelled` stops generation at the next step. Returns the
+        seconds until the first audio.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._generate_when_loaded,
+            text, language, speaker_audio_path, emit, cancelled, sample_rate,
+        )
+
+
+_runtimes: Dict[Tuple, ZonosRuntime] = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(model_name: str, device: str, **options) -> ZonosRuntime:
+    """Process-wide runtime per model and device; each is loaded once."""
+    key = (model_name, device, tuple(sorted(options.items())))
+    with _runtimes_lock:
+        runtime = _runtimes.get(key)
+        if runtime is None:
+            runtime = _runtimes[key] = ZonosRuntime(model_name, device, **options)
+        return runtime
+
 
 class ZonosTTS(TTS):
     """Zyphra Zonos TTS implementation for LiveKit"""
@@ -38,6 +390,7 @@ class ZonosTTS(TTS):
         language: str = "en",
         speaker_audio_path: Optional[str] = None,
         sample_rate: int = 24000,
+        **runtime_options,
     ):
         """
         Initialize Zonos TTS.
@@ -47,158 +400,93 @@ class ZonosTTS(TTS):
             device: Device to run on ('cuda' or 'cpu')
             language: Language code (e.g., 'en', 'es', 'ur')
             speaker_audio_path: Path to reference audio for voice cloning (optional)
-            sample_rate: Output sample rate (default: 24000 Hz)
+            sample_rate: Output sample rate (default: 24000 Hz); Zonos
+                generates 44.1 kHz, which is resampled to it
+            runtime_options: quantize / cpu_threads / interop_threads, see ZonosRuntime
         """
         super().__init__(
             capabilities=TTSCapabilities(streaming=False),
             sample_rate=sample_rate,
             num_channels=1,
         )
-
-        self._model_name = model_name
-        self._device = device
-        self._language = language
+        self._language = LANGUAGE_CODES.get(language, language)
         self._speaker_audio_path = speaker_audio_path
-        self._model = None
-        self._speaker_embedding = None
-
-        # Check if CUDA is available
-        if device == "cuda" and not torch.cuda.is_available():
-            logger.warning("CUDA requested but not available, falling back to CPU")
-            self._device = "cpu"
+        # Shared per process; already loading if prewarm() ran
+        self._runtime = get_runtime(model_name, device, **runtime_options)
+        self._runtime.prepare_speaker(speaker_audio_path)
+        logger.info(
+            f"Initializing Zonos TTS: model={self._runtime.model_name}, "
+            f"device={self._runtime.device}, language={self._language}"
+        )
 
-        logger.info(f"Initializing Zonos TTS: model={model_name}, device={self._device}, language={language}")
+    @property
+    def runtime(self) -> ZonosRuntime:
+        return self._runtime
 
-        # Lazy load model on first use
-        self._initialized = False
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "ZonosChunkedStream":
+        return ZonosChunkedStream(tts=self, input_text=text, conn_options=conn_options)
 
-    def _ensure_initialized(self):
-        """Lazy load the model on first use"""
-        if self._initialized:
-            return
 
-        try:
-            logger.info("Loading Zonos model (this may take a moment)...")
-            self._model = Zonos.from_pretrained(self._model_name, device=self._device)
-            logger.info("Zonos model loaded successfully")
-
-            # Load speaker embedding if provided
-            if self._speaker_audio_path and os.path.exists(self._speaker_audio_path):
-                logger.info(f"Loading speaker reference from {self._speaker_audio_path}")
-                audio, sr = torchaudio.load(self._speaker_audio_path)
-                audio = audio.to(self._device)
-                self._speaker_embedding = self._model.make_speaker_embedding(audio, sr)
-                logger.info("Speaker embedding created")
-            else:
-                # Use default speaker (model will use internal default)
-                self._speaker_embedding = None
-                logger.debug("Using default speaker voice")
-
-            self._initialized = True
-
-        except Exception as e:
-            logger.error(f"Failed to initialize Zonos TTS: {e}", exc_info=True)
-            raise RuntimeError(f"Zonos TTS initialization failed: {e}") from e
-
-    def synthesize(self, text: str, *, conn_options=None) -> SynthesizeStream:
-        """
-        Synthesize speech from text.
+class ZonosChunkedStream(ChunkedStream):
+    """Synthesis stream for Zonos TTS"""
 
-        Args:
-            text: Text to synthesize
-            conn_options: Connection options (unused)
+    def __init__(self, *, tts: ZonosTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: ZonosTTS = tts
 
-        Returns:
-            SynthesizeStream for audio output
-        """
-        self._ensure_initialized()
-        return ZonosSynthesizeStream(
-            text=text,
-            model=self._model,
-            speaker_embedding=self._speaker_embedding,
-            language=self._language,
-            device=self._device,
-            sample_rate=self._sample_rate,
-            tts_instance=self,
-            conn_options=conn_options,
+    async def _run(self, output_emitter: AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
         )
+        text_preview = self._input_text[:50] + "..." if len(self._input_text) > 50 else self._input_text
+        logger.debug(f"Synthesizing with Zonos TTS: {text_preview}")
 
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
 
-class ZonosSynthesizeStream(SynthesizeStream):
-    """Synthesis stream for Zonos TTS"""
+        def push(pcm: bytes) -> None:
+            if not cancelled.is_set():
+                output_emitter.push(pcm)
 
-    def __init__(
-        self,
-        text: str,
-        model: Zonos,
-        speaker_embedding: Optional[torch.Tensor],
-        language: str,
-        device: str,
-        sample_rate: int,
-        tts_instance,
-        conn_options=None,
-    ):
-        super().__init__(tts=tts_instance, conn_options=conn_options)
-        self._text = text
-        self._model = model
-        self._speaker_embedding = speaker_embedding
-        self._language = language
-        self._device = device
-        self._sample_rate = sample_rate
-
-    async def _run(self, output_emitter) -> None:
-        """
-        Run synthesis and emit audio frames.
+        def emit(pcm: bytes) -> None:
+            # Called on the runtime's thread. These callbacks are queued before
+            # the executor future completes, so they all run before _run returns
+            loop.call_soon_threadsafe(push, pcm)
 
-        Args:
-            output_emitter: Output emitter for audio frames
-        """
+        start = time.perf_counter()
         try:
-            text_preview = self._text[:50] + "..." if len(self._text) > 50 else self._text
-            logger.debug(f"Synthesizing with Zonos TTS: {text_preview}")
-
-            # Prepare conditioning
-            cond_dict = make_cond_dict(
-                text=self._text,
-                speaker=self._speaker_embedding,
-                lang=self._language
-            )
-
-            # Generate audio codes
-            with torch.no_grad():
-                codes = self._model.generate(cond_dict)
-
-                # Decode to audio waveform
-                audio_tensor = self._model.autoencoder.decode(codes)
-
-            # Convert to numpy array
-            if audio_tensor.dim() > 1:
-                audio_tensor = audio_tensor.squeeze()
-
-            audio_array = audio_tensor.cpu().numpy()
-
-            # Normalize to int16
-            if audio_array.dtype == np.float32 or audio_array.dtype == np.float64:
-                audio_array = (audio_array * 32767).astype(np.int16)
-            elif audio_array.dtype != np.int16:
-                audio_array = audio_array.astype(np.int16)
-
-            logger.debug(f"Generated {len(audio_array)} audio samples")
-
-            # Create audio frame and push to output_emitter
-            frame = rtc.AudioFrame(
-                data=audio_array.tobytes(),
-                sample_rate=self._sample_rate,
-                num_channels=1,
-                samples_per_channel=len(audio_array),
+            first_audio = await self._tts._runtime.synthesize(
+                self._input_text, self._tts._language, self._tts._speaker_audio_path,
+                self._tts.sample_rate, emit, cancelled,
             )
-            output_emitter.push(frame)
-
         except Exception as e:
             logger.error(f"Zonos TTS synthesis failed: {e}", exc_info=True)
-            raise RuntimeError(f"TTS synthesis failed: {str(e)}") from e
+            raise APIConnectionError(f"Zonos TTS synthesis failed: {e}") from e
         finally:
-            output_emitter.aclose()
+            # Interrupted: stop generating at the next step
+            cancelled.set()
+        output_emitter.flush()
+        if first_audio is not None:
+            logger.debug(
+                f"Zonos first audio after {first_audio * 1000:.0f}ms, "
+                f"done in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+
+
+def _config_from_env() -> dict:
+    """Runtime settings (model, device, CPU tuning) from the environment."""
+    device = os.getenv("ZONOS_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
+    cpu_threads = os.getenv("ZONOS_CPU_THREADS")
+    return {
+        "model_name": os.getenv("ZONOS_MODEL", "Zyphra/Zonos-v0.1-hybrid"),
+        "device": device,
+        "quantize": os.getenv("ZONOS_QUANTIZE", "int8").lower() == "int8",
+        "cpu_threads": int(cpu_threads) if cpu_threads else None,
+        "interop_threads": int(os.getenv("ZONOS_INTEROP_THREADS", "1")),
+    }
 
 
 def create(
@@ -215,6 +503,10 @@ def create(
         ZONOS_DEVICE: Device (default: cuda if available, else cpu)
         ZONOS_LANGUAGE: Language code (default: en)
         ZONOS_SPEAKER_AUDIO: Path to speaker reference audio (optional)
+        ZONOS_SPEAKER_CACHE_DIR: Speaker embedding cache (default: /tmp/zonos-speakers)
+        ZONOS_QUANTIZE: 'int8' (default) quantizes Linear layers on CPU; 'none' disables
+        ZONOS_CPU_THREADS: torch intra-op threads on CPU (default: all available cores)
+        ZONOS_INTEROP_THREADS: torch inter-op threads on CPU (default: 1)
 
     Args:
         model_name: Override model name
@@ -226,14 +518,21 @@ def create(
         Configured ZonosTTS instance
     """
     # Get configuration from environment or parameters
-    model_name = model_name or os.getenv("ZONOS_MODEL", "Zyphra/Zonos-v0.1-hybrid")
-    device = device or os.getenv("ZONOS_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
-    language = language or os.getenv("ZONOS_LANGUAGE", "en")
-    speaker_audio_path = speaker_audio_path or os.getenv("ZONOS_SPEAKER_AUDIO")
+    config = _config_from_env()
+    config["model_name"] = model_name or config["model_name"]
+    config["device"] = device or config["device"]
 
     return ZonosTTS(
-        model_name=model_name,
-        device=device,
-        language=language,
-        speaker_audio_path=speaker_audio_path,
+        language=language or os.getenv("ZONOS_LANGUAGE", "en"),
+        speaker_audio_path=speaker_audio_path or os.getenv("ZONOS_SPEAKER_AUDIO"),
+        **config,
     )
+
+
+def prewarm() -> None:
+    """
+    Start loading and warming the model configured by the environment, and
+    resolving the ZONOS_SPEAKER_AUDIO embedding, once per process. Returns
+    immediately; sessions created meanwhile share them.
+    """
+    get_runtime(**_config_from_env()).prepare_speaker(os.getenv("ZONOS_SPEAKER_AUDIO"))
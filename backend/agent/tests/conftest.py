@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Plugins are imported as `plugins.<module>`, relative to backend/agent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("livekit.rtc")
+
+from livekit import rtc
+
+from plugins.stt_audio_buffer import AudioRingBuffer
+
+SAMPLE_RATE = 16000
+
+
+def frame(values) -> rtc.AudioFrame:
+    pcm = np.asarray(values, dtype=np.int16)
+    return rtc.AudioFrame(data=pcm.tobytes(), sample_rate=SAMPLE_RATE, num_channels=1, samples_per_channel=len(pcm))
+
+
+def ramp(start: int, n: int) -> np.ndarray:
+    """Samples whose value is their own index, so positions can be checked."""
+    return np.arange(start, start + n)
+
+
+def as_ints(audio: np.ndarray) -> list:
+    return list(np.rint(audio * 32768).astype(int))
+
+
+def test_positions_survive_compaction():
+    buffer = AudioRingBuffer(SAMPLE_RATE, initial_seconds=0.01, max_seconds=10)  # 160 samples
+    buffer.push(frame(ramp(0, 100)))
+    buffer.drop_before(80)
+    # Does not fit behind the tail: the live audio is moved to the front
+    buffer.push(frame(ramp(100, 100)))
+
+    assert (buffer.start, buffer.end) == (80, 200)
+    assert as_ints(buffer.view(150)[:3]) == [150, 151, 152]
+
+
+def test_pinned_view_outlives_compaction():
+    buffer = AudioRingBuffer(SAMPLE_RATE, initial_seconds=0.01, max_seconds=10)
+    buffer.push(frame(ramp(0, 100)))
+    buffer.drop_before(80)
+    with buffer.pinned():
+        view = buffer.view()
+        buffer.push(frame(ramp(100, 100)))
+        assert as_ints(view) == list(range(80, 100))
+
+
+def test_reset_keeps_audio_pushed_during_the_final_renumbered():
+    buffer = AudioRingBuffer(SAMPLE_RATE, initial_seconds=0.01, max_seconds=10)
+    buffer.push(frame(ramp(0, 120)))
+    end = buffer.end
+    # Next turn's audio arrives while the final decodes
+    buffer.push(frame(ramp(120, 30)))
+
+    buffer.reset(keep_from=end)
+
+    assert (buffer.start, buffer.end) == (0, 30)
+    assert as_ints(buffer.view()) == list(range(120, 150))
+    buffer.push(frame(ramp(150, 10)))
+    assert as_ints(buffer.view(30)) == list(range(150, 160))
+
+
+def test_reset_without_keep_from_empties_the_buffer():
+    buffer = AudioRingBuffer(SAMPLE_RATE, initial_seconds=0.01, max_seconds=10)
+    buffer.push(frame(ramp(0, 50)))
+    buffer.reset()
+    assert (buffer.start, buffer.end, len(buffer)) == (0, 0, 0)
+
+
+def test_oldest_audio_is_dropped_past_the_cap():
+    buffer = AudioRingBuffer(SAMPLE_RATE, initial_seconds=0.01, max_seconds=0.01)  # 160 samples
+    buffer.push(frame(ramp(0, 100)))
+    buffer.push(frame(ramp(100, 100)))
+
+    assert len(buffer) == 160
+    assert (buffer.start, buffer.end) == (40, 200)
+    assert as_ints(buffer.view()[:2]) == [40, 41]
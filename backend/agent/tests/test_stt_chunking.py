@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from plugins.stt_chunking import split_at_pauses, stitch
+from plugins.stt_local_agreement import TimedWord
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def words(*items):
+    """TimedWords from (text, start, end) tuples."""
+    return [TimedWord(start, end, text) for text, start, end in items]
+
+
+def test_cut_lands_in_the_pause():
+    audio = np.concatenate([tone(7.0), silence(0.4), tone(7.0)])
+    first, second = split_at_pauses(audio, chunk_seconds=8.0)
+
+    assert 7.0 <= first.keep_to <= 7.4
+    assert second.keep_from == first.keep_to
+    # Decoded with overlap on both sides of the cut
+    assert first.end > first.keep_to * SAMPLE_RATE
+    assert second.start < second.keep_from * SAMPLE_RATE
+
+
+def test_audio_without_pauses_is_still_covered():
+    audio = tone(20.0)
+    chunks = split_at_pauses(audio, chunk_seconds=8.0)
+
+    assert len(chunks) == 3
+    assert chunks[0].start == 0 and chunks[-1].end == len(audio)
+    assert chunks[0].keep_from == -np.inf and chunks[-1].keep_to == np.inf
+    for before, after in zip(chunks, chunks[1:]):
+        assert before.keep_to == after.keep_from
+        assert after.start < before.end
+
+
+def test_short_audio_is_one_chunk():
+    (chunk,) = split_at_pauses(tone(3.0), chunk_seconds=8.0)
+    assert (chunk.start, chunk.end) == (0, 3 * SAMPLE_RATE)
+
+
+@pytest.fixture
+def seam():
+    """Two chunks that meet at 8.0 s."""
+    audio = np.concatenate([tone(7.8), silence(0.4), tone(7.8)])
+    chunks = split_at_pauses(audio, chunk_seconds=8.0)
+    assert chunks[0].keep_to == pytest.approx(8.0, abs=0.2)
+    return chunks
+
+
+def test_word_straddling_the_seam_is_kept_once(seam):
+    cut = seam[0].keep_to
+    # Both chunks decode the word; only the one holding its midpoint keeps it
+    left = words((" I", cut - 1.0, cut - 0.6), (" wanted", cut - 0.3, cut + 0.1))
+    right = words((" wanted", cut - 0.3, cut + 0.1), (" that", cut + 0.2, cut + 0.5))
+
+    merged = stitch(seam, [left, right])
+
+    assert [w.text for w in merged] == [" I", " wanted", " that"]
+
+
+def test_word_duplicated_across_the_seam_is_dropped(seam):
+    cut = seam[0].keep_to
+    # Timed slightly differently by each chunk, so each side owns one copy
+    left = words((" book", cut - 0.8, cut - 0.5), (" Tuesday", cut - 0.4, cut - 0.05))
+    right = words((" Tuesday,", cut + 0.0, cut + 0.3), (" please", cut + 0.4, cut + 0.7))
+
+    merged = stitch(seam, [left, right])
+
+    assert [w.text for w in merged] == [" book", " Tuesday", " please"]
+
+
+def test_repeated_word_away_from_the_seam_is_kept(seam):
+    cut = seam[0].keep_to
+    left = words((" no", cut - 1.5, cut - 1.2))
+    right = words((" no", cut + 0.2, cut + 0.5))
+
+    assert [w.text for w in stitch(seam, [left, right])] == [" no", " no"]
@@ -0,0 +1,230 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+pytest.importorskip("livekit.agents")
+pytest.importorskip("soundfile")
+
+from livekit import rtc
+from livekit.agents.stt import SpeechEventType
+
+from plugins import stt_faster_whisper, stt_whisper_models
+from plugins.stt_whisper_models import ModelHandle
+
+
+class FakeWhisperModel:
+    """Transcribes any audio as "hello there"."""
+
+    def __init__(self):
+        self.calls = 0
+        self.audio_seconds = []
+        # Calls with beam_size 5 (finals) that raise before one succeeds
+        self.failing_finals = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        self.audio_seconds.append(len(audio) / 16000)
+        if options.get("beam_size") == 5 and self.failing_finals:
+            self.failing_finals -= 1
+            raise RuntimeError("decoder crashed")
+        words = [
+            SimpleNamespace(start=0.1, end=0.4, word=" hello", probability=0.9),
+            SimpleNamespace(start=0.4, end=0.8, word=" there", probability=0.9),
+        ]
+        segment = SimpleNamespace(
+            start=0.0, end=0.8, text=" hello there", words=words,
+            no_speech_prob=0.01, avg_logprob=-0.2, compression_ratio=1.1,
+        )
+        return iter([segment]), SimpleNamespace(language="en", language_probability=0.99)
+
+
+@pytest.fixture
+def model():
+    return FakeWhisperModel()
+
+
+@pytest.fixture
+def stt(monkeypatch, model):
+    profile = SimpleNamespace(
+        num_workers=2,
+        handle=lambda size: ModelHandle((size, "cpu", "int8"), model),
+    )
+    # A registry of its own, so no real model is activated or loaded
+    monkeypatch.setattr(stt_whisper_models, "_active", {})
+    monkeypatch.setattr(stt_faster_whisper, "resolve_profile", lambda *args, **kwargs: profile)
+    return stt_faster_whisper.FasterWhisperSTT(model_size="fake", device="cpu")
+
+
+def speech_frames(seconds: float, sample_rate: int = 16000, amplitude: float = 0.3):
+    """100 ms frames of a tone standing in for speech."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (amplitude * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+    step = sample_rate // 10
+    for start in range(0, len(pcm), step):
+        chunk = pcm[start:start + step]
+        yield rtc.AudioFrame(
+            data=chunk.tobytes(), sample_rate=sample_rate, num_channels=1, samples_per_channel=len(chunk),
+        )
+
+
+def test_final_transcript_after_end_of_speech(stt):
+    async def run():
+        stream = stt.stream()
+
+        async def first_final():
+            async for ev in stream:
+                if ev.type == SpeechEventType.FINAL_TRANSCRIPT:
+                    return ev
+
+        final = asyncio.create_task(first_final())
+        stt.on_user_state_changed("listening", "speaking")
+        for frame in speech_frames(1.0):
+            stream.push_frame(frame)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        # Nothing ends the turn while the user is still speaking
+        assert not final.done()
+
+        # What AgentSession emits when its VAD detects end of speech
+        stt.on_user_state_changed("speaking", "listening")
+        try:
+            return await asyncio.wait_for(final, 5)
+        finally:
+            await stream.aclose()
+
+    event = asyncio.run(run())
+    assert event.alternatives[0].text == "hello there"
+
+
+def test_no_final_without_a_speaking_turn(stt):
+    async def run():
+        stream = stt.stream()
+        received = []
+
+        async def consume():
+            async for ev in stream:
+                received.append(ev.type)
+
+        consumer = asyncio.create_task(consume())
+        for frame in speech_frames(0.3):
+            stream.push_frame(frame)
+        # "listening" -> "away" is not the end of a turn
+        stt.on_user_state_changed("listening", "away")
+        await asyncio.sleep(0.3)
+        consumer.cancel()
+        await stream.aclose()
+        return received
+
+    assert SpeechEventType.FINAL_TRANSCRIPT not in asyncio.run(run())
+
+
+def test_final_decodes_only_the_voiced_region(stt, model):
+    async def run():
+        stream = stt.stream()
+
+        async def first_final():
+            async for ev in stream:
+                if ev.type == SpeechEventType.FINAL_TRANSCRIPT:
+                    return ev
+
+        final = asyncio.create_task(first_final())
+        # Leading silence the VAD has not reported as speech
+        for frame in speech_frames(3.0, amplitude=0.0):
+            stream.push_frame(frame)
+        await asyncio.sleep(0.1)
+        stt.on_user_state_changed("listening", "speaking")
+        for frame in speech_frames(1.0):
+            stream.push_frame(frame)
+        await asyncio.sleep(0.1)
+        stt.on_user_state_changed("speaking", "listening")
+        try:
+            return await asyncio.wait_for(final, 5)
+        finally:
+            await stream.aclose()
+
+    asyncio.run(run())
+    # The final decode covers the speech plus padding, not the 3 s of silence
+    assert model.audio_seconds[-1] < 2.0
+
+
+def test_failed_final_drops_only_its_turn(stt, model):
+    model.failing_finals = 1
+
+    async def run():
+        stream = stt.stream()
+        finals = []
+
+        async def consume():
+            async for ev in stream:
+                if ev.type == SpeechEventType.FINAL_TRANSCRIPT:
+                    finals.append(ev)
+
+        consumer = asyncio.create_task(consume())
+        for _ in range(2):
+            stt.on_user_state_changed("listening", "speaking")
+            for frame in speech_frames(1.0):
+                stream.push_frame(frame)
+            await asyncio.sleep(0.1)
+            stt.on_user_state_changed("speaking", "listening")
+            await asyncio.sleep(0.5)
+        await stream.aclose()
+        consumer.cancel()
+        return finals, model.audio_seconds[-1]
+
+    finals, last_decode = asyncio.run(run())
+    # The first turn is dropped, the second is transcribed on its own
+    assert [ev.alternatives[0].text for ev in finals] == ["hello there"]
+    assert last_decode < 1.5
+
+
+def test_end_turn_renumbers_the_next_turns_audio_and_regions(stt):
+    async def run():
+        stream = stt.stream()
+        try:
+            frames = list(speech_frames(1.0))
+            for frame in frames[:8]:
+                stream._buffer.push(frame)
+            end = stream._buffer.end
+            # 0.2 s of the next turn pushed while the final was decoding
+            for frame in frames[8:]:
+                stream._buffer.push(frame)
+            stream._regions = [[1600, 9600], [11200, None]]
+
+            stream._end_turn(end)
+            return end, stream._buffer, stream._regions
+        finally:
+            await stream.aclose()
+
+    end, buffer, regions = asyncio.run(run())
+    assert end == 12800
+    assert (buffer.start, buffer.end) == (0, 3200)
+    # The finished region is gone, the open one now starts at the new turn's 0
+    assert regions == [[0, None]]
+
+
+def test_barge_in_only_while_agent_speaks(stt, monkeypatch):
+    barge_ins = []
+    monkeypatch.setattr(stt, "on_barge_in", lambda: barge_ins.append(True))
+
+    stt.on_user_state_changed("listening", "speaking")
+    stt.on_user_state_changed("speaking", "listening")
+    assert barge_ins == []
+
+    stt.on_agent_state_changed("thinking", "speaking")
+    stt.on_user_state_changed("listening", "speaking")
+    assert barge_ins == [True]
+
+    stt.on_agent_state_changed("speaking", "listening")
+    stt.on_user_state_changed("speaking", "listening")
+    stt.on_user_state_changed("listening", "speaking")
+    assert barge_ins == [True]
+
+
+def test_one_shot_and_stream_share_the_confidence_metric(stt):
+    frame = rtc.combine_audio_frames(list(speech_frames(1.0)))
+    event = asyncio.run(stt._recognize_impl(frame))
+    # Mean word probability, as for streamed finals; not exp(avg_logprob) = 0.82
+    assert event.alternatives[0].confidence == pytest.approx(0.9)
@@ -0,0 +1,49 @@
+from plugins.stt_local_agreement import LocalAgreement, TimedWord, join_words
+
+
+def words(*items):
+    """TimedWords from (text, start, end) tuples."""
+    return [TimedWord(start, end, text) for text, start, end in items]
+
+
+def test_first_hypothesis_commits_nothing():
+    agreement = LocalAgreement()
+    assert agreement.insert(words((" hello", 0.0, 0.4))) == []
+    assert agreement.committed == []
+    assert join_words(agreement.tentative) == "hello"
+
+
+def test_agreeing_prefix_is_committed():
+    agreement = LocalAgreement()
+    agreement.insert(words((" I", 0.0, 0.2), (" need", 0.2, 0.5), (" a", 0.5, 0.6)))
+    committed = agreement.insert(words((" I", 0.0, 0.2), (" need", 0.2, 0.5), (" an", 0.5, 0.6), (" appointment", 0.6, 1.2)))
+    assert join_words(committed) == "I need"
+    assert agreement.committed_end == 0.5
+    # Only the unconfirmed tail is compared next time
+    assert join_words(agreement.tentative) == "an appointment"
+
+
+def test_agreement_ignores_case_and_punctuation():
+    agreement = LocalAgreement()
+    agreement.insert(words((" Hello,", 0.0, 0.4)))
+    assert join_words(agreement.insert(words((" hello", 0.0, 0.4)))) == "hello"
+
+
+def test_committed_words_repeated_at_window_start_are_stripped():
+    agreement = LocalAgreement()
+    agreement.insert(words((" my", 0.0, 0.3), (" tooth", 0.3, 0.7)))
+    agreement.insert(words((" my", 0.0, 0.3), (" tooth", 0.3, 0.7)))
+    # Whisper re-emits the committed words with slightly shifted times
+    tail = agreement.strip_committed(words((" my", 0.65, 0.8), (" tooth", 0.8, 1.0), (" hurts", 1.0, 1.4)))
+    assert join_words(tail) == "hurts"
+
+
+def test_discard_tentative_keeps_committed_words():
+    agreement = LocalAgreement()
+    agreement.insert(words((" yes", 0.0, 0.3), (" please", 0.3, 0.7)))
+    agreement.insert(words((" yes", 0.0, 0.3), (" sure", 0.3, 0.7)))
+    agreement.discard_tentative()
+    assert join_words(agreement.committed) == "yes"
+    assert agreement.tentative == []
+    agreement.reset()
+    assert agreement.committed == []
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from plugins import stt_whisper_models
+from plugins.stt_model_swap import control_file, read_control_file
+from plugins.stt_whisper_models import ModelHandle, activate_default, active_models
+
+
+@pytest.fixture
+def private_dir(tmp_path):
+    path = tmp_path / "run"
+    path.mkdir(mode=0o700)
+    return path
+
+
+def test_reads_the_requested_models(private_dir):
+    path = private_dir / "models.json"
+    path.write_text('{"model": "small", "small_model": null}')
+    assert read_control_file(str(path)) == {"model": "small", "small_model": None}
+
+
+@pytest.mark.parametrize("content", ['{"model": "sm', '["small"]'])
+def test_malformed_file_is_ignored(private_dir, content):
+    path = private_dir / "models.json"
+    path.write_text(content)
+    assert read_control_file(str(path)) is None
+
+
+def test_file_others_can_write_is_ignored(private_dir):
+    path = private_dir / "models.json"
+    path.write_text('{"model": "small"}')
+    os.chmod(private_dir, 0o777)
+    assert read_control_file(str(path)) is None
+
+
+def test_default_lives_in_the_runtime_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("FASTER_WHISPER_CONTROL_FILE", raising=False)
+    monkeypatch.setenv("FASTER_WHISPER_RUNTIME_DIR", str(tmp_path))
+    assert control_file() == str(tmp_path / "models.json")
+
+
+def test_default_model_is_not_loaded_once_a_swap_set_the_role(monkeypatch):
+    monkeypatch.setattr(stt_whisper_models, "_active", {})
+    activate_default("large", lambda: ModelHandle(("small", "cpu", "int8"), object()))
+
+    def load():
+        raise AssertionError("loaded a model the swap replaced")
+
+    activate_default("large", load)
+    assert active_models() == {"large": "small"}
@@ -0,0 +1,131 @@
+import concurrent.futures
+import importlib
+import sys
+import types
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class Word:
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+@dataclass
+class Segment:
+    start: float
+    end: float
+    text: str
+    words: Optional[List[Word]]
+
+
+class FakePipeline:
+    """
+    Stands in for BatchedInferencePipeline: one segment per clip, timed in
+    seconds into the batched audio like the real one, its text the value the
+    clip's audio is filled with.
+    """
+
+    def __init__(self, model):
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps, **options):
+        self.calls.append(clip_timestamps)
+        segments = []
+        for clip in clip_timestamps:
+            # Slicing like collect_chunks does fails for anything but sample indices
+            chunk = audio[clip["start"]:clip["end"]]
+            start, end = clip["start"] / SAMPLE_RATE, clip["end"] / SAMPLE_RATE
+            text = f" {chunk[0]:.0f}"
+            segments.append(Segment(start, end, text, [Word(start + 0.1, end, text, 0.9)]))
+        return iter(segments), types.SimpleNamespace(language="en")
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    try:
+        importlib.import_module("faster_whisper")
+    except ImportError:
+        fake = types.ModuleType("faster_whisper")
+        fake.BatchedInferencePipeline = FakePipeline
+        fake.WhisperModel = object
+        monkeypatch.setitem(sys.modules, "faster_whisper", fake)
+    sys.modules.pop("plugins.stt_whisper_batcher", None)
+    module = importlib.import_module("plugins.stt_whisper_batcher")
+    monkeypatch.setattr(module, "BatchedInferencePipeline", FakePipeline)
+    yield module
+    sys.modules.pop("plugins.stt_whisper_batcher", None)
+
+
+@pytest.fixture
+def scheduler(batcher):
+    scheduler = batcher.WhisperBatchScheduler(object(), max_batch_size=8, max_wait=0.05)
+    yield scheduler
+    scheduler.close()
+
+
+def utterance(value: float, seconds: float) -> np.ndarray:
+    return np.full(int(seconds * SAMPLE_RATE), value, dtype=np.float32)
+
+
+def test_requests_get_their_own_segments_in_request_time(scheduler):
+    first = scheduler.submit(utterance(1, 1.0), language="en")
+    second = scheduler.submit(utterance(2, 2.0), language="en")
+
+    a = first.result(timeout=5)
+    b = second.result(timeout=5)
+
+    assert [s.text for s in a.segments] == [" 1"]
+    assert [s.text for s in b.segments] == [" 2"]
+    # Shifted from batch time (1.0-3.0 s) to the request's own audio
+    assert (b.segments[0].start, b.segments[0].end) == pytest.approx((0.0, 2.0))
+    assert b.segments[0].words[0].start == pytest.approx(0.1)
+    assert scheduler.stats().batches == 1
+
+
+def test_clip_bounds_are_sample_indices(scheduler):
+    scheduler.submit(utterance(1, 1.0), language="en")
+    scheduler.submit(utterance(2, 0.5), language="en").result(timeout=5)
+
+    clips = scheduler._pipeline.calls[0]
+    assert clips == [{"start": 0, "end": 16000}, {"start": 16000, "end": 24000}]
+    assert all(isinstance(v, int) for clip in clips for v in clip.values())
+
+
+def test_long_request_is_split_into_clips(scheduler, batcher):
+    seconds = batcher.MAX_CLIP_SECONDS + 2
+    result = scheduler.submit(utterance(3, seconds), language="en").result(timeout=5)
+
+    assert [s.text for s in result.segments] == [" 3", " 3"]
+    assert result.segments[1].start == pytest.approx(batcher.MAX_CLIP_SECONDS)
+    assert result.segments[1].end == pytest.approx(seconds)
+
+
+def test_cancelled_request_does_not_fail_its_batch(scheduler, batcher):
+    scheduler.close()
+    requests = [
+        batcher._Request(utterance(value, 1.0), ("en",), {"language": "en"}, concurrent.futures.Future())
+        for value in (1, 2)
+    ]
+    requests[0].future.cancel()
+
+    scheduler._decode(requests)
+
+    assert requests[0].future.cancelled()
+    assert [s.text for s in requests[1].future.result(timeout=0).segments] == [" 2"]
+
+
+def test_scheduler_survives_a_queue_of_cancelled_requests(scheduler):
+    scheduler.submit(utterance(1, 1.0), language="en").cancel()
+
+    later = scheduler.submit(utterance(2, 1.0), language="en")
+
+    assert [s.text for s in later.result(timeout=5).segments] == [" 2"]
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from plugins import stt_whisper_server
+from plugins.stt_whisper_server import ensure_private_dir, server_authkey
+
+
+def test_authkey_is_required(monkeypatch):
+    monkeypatch.delenv("FASTER_WHISPER_SERVER_AUTHKEY", raising=False)
+    with pytest.raises(RuntimeError):
+        server_authkey()
+    with pytest.raises(RuntimeError):
+        stt_whisper_server.WhisperServer("/nonexistent/whisper.sock")
+
+    monkeypatch.setenv("FASTER_WHISPER_SERVER_AUTHKEY", "s3cret")
+    assert server_authkey() == b"s3cret"
+
+
+def test_runtime_dir_is_per_user(monkeypatch, tmp_path):
+    monkeypatch.delenv("FASTER_WHISPER_RUNTIME_DIR", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert stt_whisper_server.default_address() == str(tmp_path / f"whisper-stt-{os.getuid()}" / "whisper-stt-0.sock")
+
+
+def test_private_dir_is_created_0700(tmp_path):
+    path = tmp_path / "run"
+    ensure_private_dir(str(path), create=True)
+    assert (path.stat().st_mode & 0o777) == 0o700
+    # Existing and private: accepted again
+    ensure_private_dir(str(path), create=True)
+
+
+def test_open_dir_is_refused(tmp_path):
+    path = tmp_path / "run"
+    path.mkdir(mode=0o700)
+    path.chmod(0o777)
+    with pytest.raises(RuntimeError, match="0700"):
+        ensure_private_dir(str(path), create=True)
+
+
+def test_symlink_is_refused(tmp_path):
+    target = tmp_path / "elsewhere"
+    target.mkdir(mode=0o700)
+    link = tmp_path / "run"
+    link.symlink_to(target)
+    with pytest.raises(RuntimeError, match="not a directory"):
+        ensure_private_dir(str(link))
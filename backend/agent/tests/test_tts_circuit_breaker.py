@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+
+from plugins import tts_circuit_breaker
+from plugins.tts_circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the breaker's view of time; the real clock stays untouched
+    monkeypatch.setattr(tts_circuit_breaker, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(window=10, min_samples=4, max_unhealthy=0.5, slow_first_audio=2.0, cooldown=15.0)
+    options.update(kwargs)
+    return CircuitBreaker("edge", **options)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_samples):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_until_enough_samples(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_opens_on_errors_and_slow_first_audio(clock):
+    breaker = make_breaker()
+    breaker.record_success(0.3)
+    breaker.record_success(2.5)  # slow counts as unhealthy
+    breaker.record_failure()
+    breaker.record_success(0.4)
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_at() == pytest.approx(clock.now + 15.0)
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = make_breaker()
+    trip(breaker)
+
+    clock.now += 15.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_healthy_probe_closes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 15.0
+    assert breaker.allow()
+
+    breaker.record_success(0.5)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["samples"] == 0
+
+
+def test_failed_probe_doubles_the_cooldown_up_to_the_cap(clock):
+    breaker = make_breaker(max_cooldown=40.0)
+    trip(breaker)
+
+    for expected in (30.0, 40.0, 40.0):
+        clock.now += breaker.retry_at() - clock.now
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.retry_at() - clock.now == pytest.approx(expected)
+
+
+def test_slow_probe_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 15.0
+    assert breaker.allow()
+
+    breaker.record_success(3.0)
+
+    assert breaker.state == OPEN
+
+
+def test_abandoned_requests(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 15.0
+    assert breaker.allow()
+
+    # Lost a race quickly: no verdict, the probe is handed back
+    breaker.record_abandoned(0.5)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+    # Cancelled after already waiting too long: counts as slow
+    breaker.record_abandoned(2.5)
+    assert breaker.state == OPEN
+
+
+def test_reset_and_stats(clock):
+    breaker = make_breaker()
+    breaker.record_success(0.2)
+    breaker.record_success(0.4)
+    breaker.record_failure()
+
+    stats = breaker.stats()
+    assert stats["state"] == CLOSED
+    assert stats["samples"] == 3
+    assert stats["error_rate"] == pytest.approx(0.333)
+    assert stats["p50_first_audio_ms"] == 300
+
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.stats()["samples"] == 0
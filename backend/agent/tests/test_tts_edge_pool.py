@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("edge_tts")
+
+from plugins.tts_edge_pool import build_ssml
+
+
+def test_short_voice_name_is_expanded():
+    ssml = build_ssml("Hi", "en-US-AriaNeural", "+0%", "+0Hz")
+    assert "name='Microsoft Server Speech Text to Speech Voice (en-US, AriaNeural)'" in ssml
+
+
+def test_text_is_escaped():
+    assert "a &lt;b&gt; &amp; c" in build_ssml("a <b> & c", "en-US-AriaNeural", "+0%", "+0Hz")
+
+
+@pytest.mark.parametrize("voice, rate, pitch", [
+    ("en-US-AriaNeural' xml:lang='x", "+0%", "+0Hz"),
+    ("en-US-AriaNeural", "+0%'/><x", "+0Hz"),
+    ("en-US-AriaNeural", "+0%", "high"),
+])
+def test_malformed_settings_are_rejected(voice, rate, pitch):
+    with pytest.raises(ValueError):
+        build_ssml("Hi", voice, rate, pitch)
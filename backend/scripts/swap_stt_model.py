@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Swap the Whisper models of running agent workers without restarting them
+Usage: python3 swap_stt_model.py <model> [small_model|none]
+
+Writes the STT control file every worker on this host watches. Each worker
+loads and warms the new model in the background, new turns switch over once it
+is ready, and the old model is unloaded when its last turn finishes.
+
+Run it as the user the workers run as: the control file lives in that user's
+private STT runtime directory (mode 0700), and workers ignore a control file
+other users could write.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Same default as plugins.stt_model_swap.control_file()
+RUNTIME_DIR = os.getenv("FASTER_WHISPER_RUNTIME_DIR") or os.path.join(
+    os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"whisper-stt-{os.getuid()}"
+)
+CONTROL_FILE = os.getenv("FASTER_WHISPER_CONTROL_FILE") or os.path.join(RUNTIME_DIR, "models.json")
+
+if len(sys.argv) < 2:
+    print(__doc__)
+    sys.exit(1)
+
+config = {"model": sys.argv[1]}
+if len(sys.argv) > 2:
+    # "none" turns routing of short answers to a small model off
+    config["small_model"] = None if sys.argv[2].lower() == "none" else sys.argv[2]
+
+# Write atomically so a worker never reads a half-written file
+directory = os.path.dirname(os.path.abspath(CONTROL_FILE))
+os.makedirs(directory, mode=0o700, exist_ok=True)
+fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".stt-swap-")
+with os.fdopen(fd, "w") as f:
+    json.dump(config, f)
+os.replace(tmp_path, CONTROL_FILE)
+
+print("=" * 70)
+print(f"Control file:    {CONTROL_FILE}")
+print(f"Requested:       {config}")
+print("Workers pick this up within a few seconds; watch their logs for")
+print("'Whisper models now ...' to confirm the swap.")
+print("=" * 70)